@@ -1,20 +1,58 @@
 """
-This script allows users to calculate the payment for an employee based on their work history. 
-Simply enter the employee's work history and the script will calculate their payment. 
-Users can choose to calculate payments for multiple employees in a row. 
+This script allows users to calculate the payment for an employee based on their work history.
+Simply enter the employee's work history and the script will calculate their payment.
+Users can choose to calculate payments for multiple employees in a row.
 
-Usage: 
-python payroll.py
+When timesheet files are given the script runs in batch mode instead, pricing every
+line of the files (or stdin for '-') and writing the results without prompting.
+Directories and glob patterns stand for the files they contain, and .gz files are
+decompressed.
+
+Usage:
+python app.py
+python app.py [--schedule NAME] [--schedule-map FILE] [--rejects FILE] [--workers N]
+              [--read-threads N] [--merge-employees [--memory-budget BYTES] [--spill-dir DIR]]
+              [--summary FILE [--summary-top N]] [--stats] [--mmap] [--breakdown]
+              [--watch-config SECONDS]
+              [--format {text,csv,jsonl,binary}] [--output FILE] [--gzip]
+              [--checkpoint FILE [--checkpoint-interval BYTES] [--resume]] FILE [FILE ...]
 """
+import argparse
+import sys
+from contextlib import contextmanager
+from typing import Iterable, Iterator, Optional, TextIO, Union
+
+from payroll import instrumentation
+from payroll.batch import GZIP_SUFFIX, price_lines, read_lines, write_results
+from payroll.breakdown import run_breakdown
+from payroll.checkpoint import DEFAULT_CHECKPOINT_INTERVAL, run_checkpointed
+from payroll.data_classes import PaymentResult, RejectedLine
+from payroll.ingest import expand_sources, read_lines_concurrently
+from payroll.merge import DEFAULT_MEMORY_BUDGET, EmployeeMerger, price_merged
+from payroll.parallel import DEFAULT_CHUNK_SIZE, price_files_parallel
 from payroll.parser import InputParser
+from payroll.reader import price_mapped_files
+from payroll.sinks import SINKS, open_sink
+from payroll.summary import DEFAULT_TOP_N, PayrollSummary, SummarizingCalculator
 from payroll.calculator import PayrollCalculator
+from payroll.multi_schedule import (
+    MultiSchedulePayrollCalculator,
+    create_calculator,
+    load_schedule_map,
+)
+from payroll.schedule import ScheduleWatcher
 
-if __name__ == "__main__":
-    payroll_calculator = PayrollCalculator("default")
-    input_parser = InputParser()
+
+def interactive(
+    payroll_calculator: Union[PayrollCalculator, MultiSchedulePayrollCalculator],
+    input_parser: InputParser,
+):
+    """
+    Runs the interactive prompt, one employee at a time.
+    """
     print("\033[1;33m" + "Welcome to the Employee Payment Software" + "\033[0m")
-    CALCULATE_PAYMENT = True
-    while CALCULATE_PAYMENT:
+    calculate_payment = True
+    while calculate_payment:
         work_data = input("Please enter the employee's work history: ")
         work_history = input_parser.parse(work_data)
         payment = payroll_calculator.calculate_payment(work_history)
@@ -26,9 +64,383 @@ if __name__ == "__main__":
             if another_calculation.lower() == "y":
                 break
             if another_calculation.lower() == "n":
-                CALCULATE_PAYMENT = False
+                calculate_payment = False
                 break
             print("Please enter a valid option [y/n]")
     print(
         "\033[1;33m" + "Thank you for using the Employee Payment Software" + "\033[0m"
     )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+    """
+    arg_parser = argparse.ArgumentParser(
+        description="Calculate employee payments from their work histories."
+    )
+    arg_parser.add_argument(
+        "files",
+        nargs="*",
+        help="timesheet files, directories or glob patterns to price in batch mode, "
+        "'-' reads stdin",
+    )
+    arg_parser.add_argument(
+        "--schedule", default="default", help="payment schedule name"
+    )
+    arg_parser.add_argument(
+        "--schedule-map",
+        metavar="FILE",
+        help="JSON object mapping employee names to payment schedule names, "
+        "the others are paid on --schedule",
+    )
+    arg_parser.add_argument(
+        "--rejects",
+        help="file receiving the lines that could not be priced (default: stderr)",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="number of worker processes for batch mode (default: 1)",
+    )
+    arg_parser.add_argument(
+        "--read-threads",
+        type=int,
+        default=1,
+        help="number of threads reading the files concurrently in batch mode (default: 1)",
+    )
+    arg_parser.add_argument(
+        "--merge-employees",
+        action="store_true",
+        help="merge the lines of every employee and drop duplicate work days before "
+        "pricing, one result per employee",
+    )
+    arg_parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=DEFAULT_MEMORY_BUDGET,
+        metavar="BYTES",
+        help="approximate memory of --merge-employees before it spills to disk "
+        "(default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--spill-dir",
+        metavar="DIR",
+        help="directory of the --merge-employees spill files (default: the temporary directory)",
+    )
+    arg_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help="approximate bytes of input per worker task (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=0,
+        help="number of distinct shifts whose payment is memoized (default: off)",
+    )
+    arg_parser.add_argument(
+        "--line-cache-size",
+        type=int,
+        default=0,
+        help="number of distinct input lines whose parsing is memoized (default: off)",
+    )
+    arg_parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print per-stage counters and timings to stderr after a batch run",
+    )
+    arg_parser.add_argument(
+        "--summary",
+        metavar="FILE",
+        help="write the totals per day and slot, the top payments and a payment "
+        "histogram of the batch run to FILE as JSON",
+    )
+    arg_parser.add_argument(
+        "--summary-top",
+        type=int,
+        default=DEFAULT_TOP_N,
+        metavar="N",
+        help="number of highest payments in the --summary (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--mmap",
+        action="store_true",
+        help="memory-map the timesheet files and parse their raw bytes",
+    )
+    arg_parser.add_argument(
+        "--breakdown",
+        action="store_true",
+        help="write the hours and pay of every schedule slot as CSV instead of the totals",
+    )
+    arg_parser.add_argument(
+        "--format",
+        choices=["text"] + sorted(SINKS),
+        default="text",
+        help="output format of the batch results (default: text)",
+    )
+    arg_parser.add_argument(
+        "--output",
+        default="-",
+        help="file receiving the csv, jsonl or binary results (default: stdout)",
+    )
+    arg_parser.add_argument(
+        "--gzip", action="store_true", help="gzip the csv, jsonl or binary results"
+    )
+    arg_parser.add_argument(
+        "--watch-config",
+        type=float,
+        metavar="SECONDS",
+        help="reload the payment schedules when the configuration file changes, "
+        "checking every SECONDS",
+    )
+    arg_parser.add_argument(
+        "--checkpoint",
+        metavar="FILE",
+        help="write the progress of the run to FILE so that it can be resumed, "
+        "requires --format csv, jsonl or binary and --output",
+    )
+    arg_parser.add_argument(
+        "--checkpoint-interval",
+        type=int,
+        default=DEFAULT_CHECKPOINT_INTERVAL,
+        metavar="BYTES",
+        help="approximate bytes of input between two checkpoints (default: %(default)s)",
+    )
+    arg_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the run recorded in the --checkpoint file, if any",
+    )
+    args = arg_parser.parse_args(argv)
+    try:
+        args.files = expand_sources(args.files)
+    except FileNotFoundError as error:
+        arg_parser.error(str(error))
+    if args.workers < 1:
+        arg_parser.error("--workers must be at least 1")
+    if args.read_threads < 1:
+        arg_parser.error("--read-threads must be at least 1")
+    if args.read_threads > 1 and (
+        args.workers > 1 or args.mmap or args.breakdown or args.checkpoint is not None
+    ):
+        arg_parser.error(
+            "--read-threads is not supported with --workers, --mmap, --breakdown "
+            "or --checkpoint"
+        )
+    if args.merge_employees and (
+        args.workers > 1 or args.mmap or args.breakdown or args.checkpoint is not None
+    ):
+        arg_parser.error(
+            "--merge-employees is not supported with --workers, --mmap, --breakdown "
+            "or --checkpoint"
+        )
+    if args.summary is not None and (args.breakdown or args.checkpoint is not None):
+        arg_parser.error("--summary is not supported with --breakdown or --checkpoint")
+    if args.summary_top < 1:
+        arg_parser.error("--summary-top must be at least 1")
+    if args.memory_budget < 1:
+        arg_parser.error("--memory-budget must be at least 1")
+    if any(source.endswith(GZIP_SUFFIX) for source in args.files) and (
+        args.workers > 1 or args.mmap or args.checkpoint is not None
+    ):
+        arg_parser.error(
+            ".gz files cannot be memory-mapped, drop --workers, --mmap and --checkpoint"
+        )
+    if args.chunk_size < 1:
+        arg_parser.error("--chunk-size must be at least 1")
+    if args.cache_size < 0 or args.line_cache_size < 0:
+        arg_parser.error("cache sizes cannot be negative")
+    if args.workers > 1 and "-" in args.files:
+        arg_parser.error("stdin cannot be split across workers, use --workers 1")
+    if args.watch_config is not None:
+        if args.watch_config <= 0:
+            arg_parser.error("--watch-config must be positive")
+        if args.workers > 1:
+            arg_parser.error("--watch-config is not supported with --workers")
+    if args.mmap and "-" in args.files:
+        arg_parser.error("stdin cannot be memory-mapped, drop --mmap")
+    if args.breakdown and (args.workers > 1 or args.mmap or args.format != "text"):
+        arg_parser.error("--breakdown is not supported with --workers, --mmap or --format")
+    if args.format == "text" and (args.output != "-" or args.gzip):
+        arg_parser.error("--output and --gzip require --format csv, jsonl or binary")
+    if args.resume and args.checkpoint is None:
+        arg_parser.error("--resume requires --checkpoint")
+    if args.checkpoint is not None:
+        if args.format == "text" or args.output == "-" or args.gzip:
+            arg_parser.error(
+                "--checkpoint requires --format csv, jsonl or binary, --output and no --gzip"
+            )
+        if not args.files or "-" in args.files:
+            arg_parser.error("--checkpoint requires timesheet files, stdin cannot be resumed")
+        if args.workers > 1 or args.breakdown:
+            arg_parser.error("--checkpoint is not supported with --workers or --breakdown")
+        if args.checkpoint_interval < 1:
+            arg_parser.error("--checkpoint-interval must be at least 1")
+    if args.schedule_map is not None:
+        try:
+            args.schedule_map = load_schedule_map(args.schedule_map)
+        except (OSError, ValueError) as error:
+            arg_parser.error(f"invalid --schedule-map: {error}")
+    return args
+
+
+@contextmanager
+def open_rejects(path: Optional[str]) -> Iterator[TextIO]:
+    """
+    Opens the rejects file, falling back to stderr when no path is given.
+    """
+    if path is None:
+        yield sys.stderr
+        return
+    with open(path, "w", encoding="utf-8") as rejects:
+        yield rejects
+
+
+def write_items(
+    args: argparse.Namespace,
+    items: Iterable[Union[PaymentResult, RejectedLine]],
+    rejects: TextIO,
+):
+    """
+    Writes the batch results in the requested output format. The structured formats
+    include the rejected lines, the text format writes them to rejects.
+    """
+    if args.format == "text":
+        write_results(items, sys.stdout, rejects)
+        return
+    with open_sink(args.output, args.format, args.schedule, args.gzip) as sink:
+        sink.write(items)
+
+
+def write_summary(path: str, summary: PayrollSummary):
+    """
+    Writes the summary of a batch run as JSON.
+    """
+    with open(path, "w", encoding="utf-8") as file:
+        summary.write_json(file)
+
+
+def main(argv=None) -> int:
+    """
+    Runs the application in interactive or batch mode.
+    """
+    args = parse_args(argv)
+    if args.stats and args.files:
+        instrumentation.enable()
+        try:
+            return run(args)
+        finally:
+            sys.stderr.write(instrumentation.format_summary() + "\n")
+    return run(args)
+
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Runs the application with the parsed arguments.
+    """
+    calculator_options = {
+        "schedule_name": args.schedule,
+        "schedule_map": args.schedule_map,
+        "cache_size": args.cache_size,
+    }
+    parser_options = {"fast": True, "cache_size": args.line_cache_size}
+    merger = None
+    summary = PayrollSummary(args.summary_top) if args.summary is not None else None
+    if args.workers > 1 and args.files:
+        items = price_files_parallel(
+            args.files,
+            calculator_options=calculator_options,
+            parser_options=parser_options,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            summary=summary,
+        )
+        with open_rejects(args.rejects) as rejects:
+            write_items(args, items, rejects)
+        if summary is not None:
+            write_summary(args.summary, summary)
+        return 0
+
+    watcher = None
+    if args.watch_config is not None:
+        calculator_options["hot_reload"] = True
+        watcher = ScheduleWatcher(
+            interval=args.watch_config,
+            on_error=lambda error: sys.stderr.write(f"Configuration not reloaded: {error}\n"),
+        )
+        watcher.start()
+    try:
+        payroll_calculator = create_calculator(**calculator_options)
+        input_parser = InputParser(**parser_options)
+        if not args.files:
+            interactive(payroll_calculator, input_parser)
+            return 0
+        pricing_calculator = payroll_calculator
+        if summary is not None:
+            pricing_calculator = SummarizingCalculator(payroll_calculator, summary)
+
+        if args.checkpoint is not None:
+            checkpoint = run_checkpointed(
+                args.files,
+                input_parser,
+                payroll_calculator,
+                args.output,
+                args.format,
+                args.checkpoint,
+                schedule_name=args.schedule,
+                interval=args.checkpoint_interval,
+                resume=args.resume,
+                schedule_map=args.schedule_map,
+            )
+            if args.stats:
+                sys.stderr.write(
+                    f"priced: {checkpoint.priced}, rejected: {checkpoint.rejected}, "
+                    f"total payment: {checkpoint.payment_total}\n"
+                )
+        else:
+            with open_rejects(args.rejects) as rejects:
+                if args.breakdown:
+                    run_breakdown(
+                        args.files, input_parser, payroll_calculator, sys.stdout, rejects
+                    )
+                elif args.mmap:
+                    items = price_mapped_files(args.files, input_parser, pricing_calculator)
+                    write_items(args, items, rejects)
+                else:
+                    if args.read_threads > 1:
+                        lines = read_lines_concurrently(args.files, args.read_threads)
+                    else:
+                        lines = read_lines(args.files)
+                    if args.merge_employees:
+                        merger = EmployeeMerger(args.memory_budget, spill_dir=args.spill_dir)
+                        merged = merger.merge(lines, input_parser)
+                        items = price_merged(merged, pricing_calculator)
+                    else:
+                        items = price_lines(lines, input_parser, pricing_calculator)
+                    write_items(args, items, rejects)
+            if summary is not None:
+                write_summary(args.summary, summary)
+    finally:
+        if watcher is not None:
+            watcher.stop()
+    if args.stats:
+        if isinstance(payroll_calculator, MultiSchedulePayrollCalculator):
+            shift_caches = [
+                (f"shift cache {schedule_name}", calculator.shift_cache)
+                for schedule_name, calculator in payroll_calculator.calculators.items()
+            ]
+        else:
+            shift_caches = [("shift cache", payroll_calculator.shift_cache)]
+        for name, cache in shift_caches + [("line cache", input_parser.line_cache)]:
+            if cache is not None:
+                sys.stderr.write(f"{name}: {cache.stats()}\n")
+        if merger is not None:
+            sys.stderr.write(f"merge: {merger.stats()}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
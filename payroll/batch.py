@@ -0,0 +1,163 @@
+"""
+This module contains the non-interactive batch pipeline. Timesheet lines in the
+NAME=DAYhh:mm-hh:mm,... format are streamed from files or stdin through the input
+parser and the payroll calculator one at a time, so memory usage does not depend
+on the size of the input.
+"""
+import gzip
+import io
+import sys
+from typing import Iterable, Iterator, Optional, TextIO, Tuple, Union
+
+from .calculator import PayrollCalculator
+from .data_classes import PaymentResult, RejectedLine
+from .errors import PayrollError
+from .parser import InputParser
+
+STDIN_SOURCE = "-"
+GZIP_SUFFIX = ".gz"
+PRICING_ERRORS = (PayrollError, ValueError)
+
+
+def read_lines(sources: Iterable[str]) -> Iterator[Tuple[str, int, str]]:
+    """
+    Lazily reads the lines of every source, skipping blank lines.
+
+    Args:
+        sources (Iterable[str]): File paths to read, '-' stands for stdin. Files
+            ending in .gz are decompressed.
+
+    Returns:
+        Iterator[Tuple[str, int, str]]: The source, 1-based line number and the line
+            without its line terminator. The bytes of a line that are not valid UTF-8
+            are kept as surrogate escapes, so InputParser.parse rejects that line
+            only.
+    """
+    for source in sources:
+        if source == STDIN_SOURCE:
+            if isinstance(sys.stdin, io.TextIOWrapper):
+                sys.stdin.reconfigure(errors="surrogateescape")
+            yield from _numbered_lines(source, sys.stdin)
+            continue
+        with open_source(source) as file:
+            yield from _numbered_lines(source, file)
+
+
+def open_source(path: str) -> TextIO:
+    """
+    Opens a timesheet file as text, decompressing it when its name ends in .gz.
+    Bytes that are not valid UTF-8 are decoded as surrogate escapes, see read_lines.
+    """
+    if path.endswith(GZIP_SUFFIX):
+        return gzip.open(path, "rt", encoding="utf-8", errors="surrogateescape")
+    # pylint: disable-next=consider-using-with
+    return open(path, "r", encoding="utf-8", errors="surrogateescape")
+
+
+def _numbered_lines(source: str, file: TextIO) -> Iterator[Tuple[str, int, str]]:
+    """
+    Numbers the non-blank lines of an open text file.
+    """
+    for line_number, line in enumerate(file, start=1):
+        line = line.rstrip("\r\n")
+        if line.strip():
+            yield source, line_number, line
+
+
+def price_lines(
+    lines: Iterable[Tuple[str, int, str]],
+    input_parser: InputParser,
+    payroll_calculator: PayrollCalculator,
+) -> Iterator[Union[PaymentResult, RejectedLine]]:
+    """
+    Parses and prices every line, turning failures into rejected lines.
+
+    Args:
+        lines (Iterable[Tuple[str, int, str]]): The numbered lines, see read_lines.
+        input_parser (InputParser): The parser for the work histories.
+        payroll_calculator (PayrollCalculator): The calculator pricing the work histories.
+
+    Returns:
+        Iterator[Union[PaymentResult, RejectedLine]]: A result or a rejection per line,
+            in input order.
+    """
+    parse = input_parser.parse
+    calculate_payment = payroll_calculator.calculate_scheduled_payment
+    for source, line_number, line in lines:
+        try:
+            work_history = parse(line)
+            payment, schedule_version, schedule = calculate_payment(work_history)
+        except PRICING_ERRORS as error:
+            yield RejectedLine(source, line_number, line, error)
+            continue
+        yield PaymentResult(
+            source, line_number, work_history.name, payment, schedule_version, schedule
+        )
+
+
+def format_result(result: PaymentResult) -> str:
+    """
+    Formats a payment result the same way the interactive application does.
+    """
+    return f"The payment for {result.name} is: {round(result.payment)} USD\n"
+
+
+def format_reject(reject: RejectedLine) -> str:
+    """
+    Formats a rejected line as 'source:line: ErrorType: message'.
+    """
+    return f"{reject.source}:{reject.line_number}: {reject.error_type}: {reject.error}\n"
+
+
+def run_batch(
+    sources: Iterable[str],
+    input_parser: InputParser,
+    payroll_calculator: PayrollCalculator,
+    output: TextIO,
+    rejects: Optional[TextIO] = None,
+) -> Tuple[int, int]:
+    """
+    Prices every line of the sources, writing results as they are produced.
+
+    Args:
+        sources (Iterable[str]): File paths to read, '-' stands for stdin.
+        input_parser (InputParser): The parser for the work histories.
+        payroll_calculator (PayrollCalculator): The calculator pricing the work histories.
+        output (TextIO): The stream receiving the payment results.
+        rejects (Optional[TextIO]): The stream receiving the rejected lines,
+            stderr by default.
+
+    Returns:
+        Tuple[int, int]: The number of priced and rejected lines.
+    """
+    items = price_lines(read_lines(sources), input_parser, payroll_calculator)
+    return write_results(items, output, rejects)
+
+
+def write_results(
+    items: Iterable[Union[PaymentResult, RejectedLine]],
+    output: TextIO,
+    rejects: Optional[TextIO] = None,
+) -> Tuple[int, int]:
+    """
+    Writes the payment results and the rejected lines to their streams.
+
+    Args:
+        items (Iterable[Union[PaymentResult, RejectedLine]]): The results to write.
+        output (TextIO): The stream receiving the payment results.
+        rejects (Optional[TextIO]): The stream receiving the rejected lines,
+            stderr by default.
+
+    Returns:
+        Tuple[int, int]: The number of priced and rejected lines.
+    """
+    rejects = sys.stderr if rejects is None else rejects
+    priced = rejected = 0
+    for item in items:
+        if isinstance(item, RejectedLine):
+            rejects.write(format_reject(item))
+            rejected += 1
+        else:
+            output.write(format_result(item))
+            priced += 1
+    return priced, rejected
@@ -0,0 +1,235 @@
+"""
+This module contains the benchmark harness of the payroll package. It generates a
+seeded synthetic workload of NAME=DAYhh:mm-hh:mm,... lines and measures the
+throughput, per-call latency percentiles and peak RSS of every stage, using only
+the standard library (the NumPy batch stage is skipped when numpy is missing).
+
+Usage:
+python -m payroll.benchmark [--lines N] [--seed N] [--output FILE]
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, Sequence
+
+from .calculator import PayrollCalculator
+from .constants import DAYS_OF_WEEK
+from .parser import InputParser
+from .schedule import ScheduleHandler, ScheduleRegistry
+from . import vectorized
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+WEEKDAYS = DAYS_OF_WEEK[:5]
+WEEKEND = DAYS_OF_WEEK[5:]
+# Typical shift starts, in minutes since midnight, some of them right at the
+# schedule slot boundaries so shifts cross from one rate to the next.
+SHIFT_STARTS = [0, 360, 420, 480, 540, 541, 600, 720, 840, 960, 1080, 1081, 1200, 1320]
+SHIFT_LENGTHS = [60, 120, 240, 360, 480, 510, 540, 600, 720]
+
+
+def generate_lines(
+    count: int, seed: int = 0, weekend_ratio: float = 0.2, max_shifts: int = 7
+) -> List[str]:
+    """
+    Generates a reproducible synthetic workload.
+
+    Args:
+        count (int): The number of lines to generate.
+        seed (int): The seed of the random generator.
+        weekend_ratio (float): The probability of a shift falling on a weekend day.
+        max_shifts (int): The maximum number of shifts per line.
+
+    Returns:
+        List[str]: The lines, without line terminators.
+    """
+    rng = random.Random(seed)
+    lines = []
+    for employee in range(count):
+        shifts = []
+        for _ in range(rng.randint(1, max_shifts)):
+            day = rng.choice(WEEKEND if rng.random() < weekend_ratio else WEEKDAYS)
+            start = rng.choice(SHIFT_STARTS) + rng.choice([0, 0, 0, 15, 30, 45])
+            end = min(start + rng.choice(SHIFT_LENGTHS) + rng.randint(-20, 20), 1439)
+            start = min(start, end - 1)
+            shifts.append(f"{day}{start // 60:02}:{start % 60:02}-{end // 60:02}:{end % 60:02}")
+        lines.append(f"EMPLOYEE{employee}=" + ",".join(shifts))
+    return lines
+
+
+def peak_rss_kib() -> int:
+    """
+    Returns the peak resident set size of the process in KiB, 0 when unknown.
+    """
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def percentiles(samples: Sequence[int]) -> Dict[str, float]:
+    """
+    Summarizes latency samples in nanoseconds as microsecond percentiles.
+    """
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def pick(fraction):
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] / 1000
+
+    return {
+        "p50_us": pick(0.50),
+        "p90_us": pick(0.90),
+        "p99_us": pick(0.99),
+        "max_us": ordered[-1] / 1000,
+    }
+
+
+def measure(name: str, func: Callable, items: Iterable, shifts: int) -> Dict:
+    """
+    Calls func once per item, timing every call.
+
+    Args:
+        name (str): The name of the stage.
+        func (Callable): The function to benchmark.
+        items (Iterable): The argument of every call.
+        shifts (int): The number of shifts processed by all the calls.
+
+    Returns:
+        Dict: The stage results.
+    """
+    clock = time.perf_counter_ns
+    samples = []
+    append = samples.append
+    started = clock()
+    for item in items:
+        call_started = clock()
+        func(item)
+        append(clock() - call_started)
+    elapsed = (clock() - started) / 1e9
+    return {
+        "stage": name,
+        "calls": len(samples),
+        "seconds": elapsed,
+        "calls_per_second": len(samples) / elapsed if elapsed else None,
+        "shifts_per_second": shifts / elapsed if shifts and elapsed else None,
+        "latency": percentiles(samples),
+        "peak_rss_kib": peak_rss_kib(),
+    }
+
+
+def run_benchmarks(lines: List[str], repeat_schedule_load: int = 200) -> Dict:
+    """
+    Runs every benchmark stage over the lines.
+
+    Args:
+        lines (List[str]): The workload, see generate_lines.
+        repeat_schedule_load (int): The number of cold schedule loads to time.
+
+    Returns:
+        Dict: The environment and the results of every stage.
+    """
+    shifts = sum(line.count(",") + 1 for line in lines)
+    stages = []
+
+    def load_schedule(_):
+        ScheduleHandler(ScheduleRegistry()).get_compiled_schedule("default")
+
+    stages.append(measure("schedule_load", load_schedule, range(repeat_schedule_load), 0))
+    stages.append(measure("parse", InputParser().parse, lines, shifts))
+    stages.append(measure("parse_fast", InputParser(fast=True).parse, lines, shifts))
+    stages.append(
+        measure("parse_columnar", InputParser(columnar=True).parse, lines, shifts)
+    )
+    stages.append(
+        measure(
+            "parse_bytes",
+            InputParser(fast=True).parse_bytes,
+            [line.encode("utf-8") for line in lines],
+            shifts,
+        )
+    )
+
+    payroll_calculator = PayrollCalculator("default")
+    work_histories = [InputParser(fast=True).parse(line) for line in lines]
+    stages.append(
+        measure("calculate", payroll_calculator.calculate_payment, work_histories, shifts)
+    )
+    stages.append(
+        measure(
+            "calculate_breakdown",
+            payroll_calculator.calculate_breakdown,
+            work_histories,
+            shifts,
+        )
+    )
+    columnar_histories = [InputParser(columnar=True).parse(line) for line in lines]
+    stages.append(
+        measure(
+            "calculate_columnar",
+            payroll_calculator.calculate_payment,
+            columnar_histories,
+            shifts,
+        )
+    )
+    if vectorized.np is not None:
+        stages.append(
+            measure(
+                "calculate_batch",
+                payroll_calculator.calculate_payments_batch,
+                [work_histories],
+                shifts,
+            )
+        )
+        columns = vectorized.flatten_work_histories(work_histories)
+        stages.append(
+            measure(
+                "calculate_columns",
+                lambda arrays: payroll_calculator.calculate_payments_columns(*arrays),
+                [columns],
+                shifts,
+            )
+        )
+
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "numpy": getattr(vectorized.np, "__version__", None),
+        "lines": len(lines),
+        "shifts": shifts,
+        "stages": stages,
+        "peak_rss_kib": peak_rss_kib(),
+    }
+
+
+def main(argv=None) -> int:
+    """
+    Runs the benchmarks and writes the results as JSON.
+    """
+    arg_parser = argparse.ArgumentParser(description="Benchmark the payroll package.")
+    arg_parser.add_argument("--lines", type=int, default=100_000, help="workload lines")
+    arg_parser.add_argument("--seed", type=int, default=0, help="workload seed")
+    arg_parser.add_argument("--output", help="JSON results file (default: stdout)")
+    args = arg_parser.parse_args(argv)
+
+    results = run_benchmarks(generate_lines(args.lines, args.seed))
+    results["seed"] = args.seed
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+This module contains the itemized export of the batch mode. Every line is priced
+with PayrollCalculator.calculate_breakdown and written as CSV rows, one per
+schedule slot the employee worked in plus a total row, as soon as it is priced.
+"""
+import csv
+import sys
+from typing import Iterable, Iterator, Optional, TextIO, Tuple, Union
+
+from .batch import PRICING_ERRORS, format_reject, read_lines
+from .calculator import PayrollCalculator
+from .data_classes import PaymentBreakdown, RejectedLine
+from .parser import InputParser
+
+BREAKDOWN_HEADER = ("name", "day", "slot_start", "slot_end", "rate", "hours", "amount")
+TOTAL_DAY = "TOTAL"
+
+
+def breakdown_lines(
+    lines: Iterable[Tuple[str, int, str]],
+    input_parser: InputParser,
+    payroll_calculator: PayrollCalculator,
+) -> Iterator[Union[PaymentBreakdown, RejectedLine]]:
+    """
+    Parses and itemizes every line, turning failures into rejected lines.
+
+    Args:
+        lines (Iterable[Tuple[str, int, str]]): The numbered lines, see read_lines.
+        input_parser (InputParser): The parser for the work histories.
+        payroll_calculator (PayrollCalculator): The calculator pricing the work histories.
+
+    Returns:
+        Iterator[Union[PaymentBreakdown, RejectedLine]]: A breakdown or a rejection per
+            line, in input order.
+    """
+    parse = input_parser.parse
+    calculate_breakdown = payroll_calculator.calculate_breakdown
+    for source, line_number, line in lines:
+        try:
+            yield calculate_breakdown(parse(line))
+        except PRICING_ERRORS as error:
+            yield RejectedLine(source, line_number, line, error)
+
+
+def _format_minutes(minutes: int) -> str:
+    """
+    Formats minutes since midnight as hh:mm, 24:00 for the end of the day.
+    """
+    return f"{minutes // 60:02}:{minutes % 60:02}"
+
+
+def write_breakdowns(
+    items: Iterable[Union[PaymentBreakdown, RejectedLine]],
+    output: TextIO,
+    rejects: TextIO,
+    header: bool = True,
+) -> Tuple[int, int]:
+    """
+    Writes the breakdowns as CSV rows and the rejected lines to their stream.
+
+    Args:
+        items (Iterable[Union[PaymentBreakdown, RejectedLine]]): The breakdowns to write.
+        output (TextIO): The stream receiving the CSV rows.
+        rejects (TextIO): The stream receiving the rejected lines.
+        header (bool): Whether to write the header row first.
+
+    Returns:
+        Tuple[int, int]: The number of itemized and rejected lines.
+    """
+    writer = csv.writer(output, lineterminator="\n")
+    if header:
+        writer.writerow(BREAKDOWN_HEADER)
+    itemized = rejected = 0
+    for item in items:
+        if isinstance(item, RejectedLine):
+            rejects.write(format_reject(item))
+            rejected += 1
+            continue
+        name = item.name
+        total_hours = 0.0
+        for day, start, end, rate, hours, amount in item.items():
+            total_hours += hours
+            writer.writerow(
+                (name, day, _format_minutes(start), _format_minutes(end), rate, hours, amount)
+            )
+        writer.writerow((name, TOTAL_DAY, "", "", "", total_hours, item.payment))
+        itemized += 1
+    return itemized, rejected
+
+
+def run_breakdown(
+    sources: Iterable[str],
+    input_parser: InputParser,
+    payroll_calculator: PayrollCalculator,
+    output: TextIO,
+    rejects: Optional[TextIO] = None,
+) -> Tuple[int, int]:
+    """
+    Itemizes every line of the sources, writing the CSV rows as they are produced.
+
+    Args:
+        sources (Iterable[str]): File paths to read, '-' stands for stdin.
+        input_parser (InputParser): The parser for the work histories.
+        payroll_calculator (PayrollCalculator): The calculator pricing the work histories.
+        output (TextIO): The stream receiving the CSV rows.
+        rejects (Optional[TextIO]): The stream receiving the rejected lines,
+            stderr by default.
+
+    Returns:
+        Tuple[int, int]: The number of itemized and rejected lines.
+    """
+    rejects = sys.stderr if rejects is None else rejects
+    items = breakdown_lines(read_lines(sources), input_parser, payroll_calculator)
+    return write_breakdowns(items, output, rejects)
@@ -0,0 +1,76 @@
+"""
+This module contains the bounded LRU cache used to memoize repeated shifts and
+input lines.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable
+
+MISSING = object()
+
+
+class LRUCache:
+    """
+    A bounded least-recently-used cache keeping hit, miss and eviction counts.
+
+    Args:
+        maxsize (int): The maximum number of entries.
+
+    Attributes:
+        maxsize (int): The maximum number of entries.
+        hits (int): The number of lookups that found an entry.
+        misses (int): The number of lookups that did not find an entry.
+        evictions (int): The number of entries dropped to make room for new ones.
+    """
+
+    __slots__ = ("maxsize", "hits", "misses", "evictions", "_entries")
+
+    def __init__(self, maxsize: int):
+        if maxsize < 1:
+            raise ValueError(f"Invalid cache size: {maxsize}")
+        self.maxsize = maxsize
+        self.hits = self.misses = self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Returns the entry of the key and marks it as recently used, or default.
+        """
+        value = self._entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """
+        Stores an entry, evicting the least recently used one when full.
+        """
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+        if len(entries) > self.maxsize:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Drops every entry, keeping the counters.
+        """
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the cache counters and its current size.
+        """
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
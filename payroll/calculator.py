@@ -2,10 +2,17 @@
 This module contains the class PayrollCalculator to calculate the payroll based on
 the employee's work history and the payment schedule configuration.
 """
-from datetime import datetime, time
+from array import array
+from datetime import date
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
 
+from .cache import LRUCache
 from .schedule import ScheduleHandler
-from .data_classes import WorkDay, WorkHistory
+from .compiled import CompiledDay, CompiledSchedule
+from .constants import DAYS_OF_WEEK
+from .data_classes import ColumnarWorkHistory, PaymentBreakdown, WorkDay, WorkHistory
+from .pay_period import PayPeriodIndex, ScheduleCalendar
+from . import vectorized
 
 
 class PayrollCalculator:
@@ -15,6 +22,14 @@ class PayrollCalculator:
 
     Args:
         schedule_name (str): The name of the payment schedule to be used for the calculation.
+        round_slot_hours (bool): Whether the hours worked in every time slot are rounded to
+            whole hours before applying the rate. Enabled by default to keep the original
+            payments; disable it to prorate the payment by the minute.
+        cache_size (int): The number of distinct shifts whose payment is memoized in
+            a bounded LRU cache. Disabled by default.
+        hot_reload (bool): Whether every calculation uses the latest configuration
+            version installed in the registry, e.g. by a ScheduleWatcher. A
+            calculation in progress keeps the version it started with.
 
     Attributes:
         schedule_handler (ScheduleHandler): A ScheduleHandler object that retrieves
@@ -22,73 +37,477 @@ class PayrollCalculator:
         payment_schedule (Dict[str, List[TimeSlot]]): A dictionary where each key is a day of
             the week and the value is a list of TimeSlot dataclasses representing the
             time slots for that day.
+        snapshot (ScheduleSnapshot): The configuration version the payment schedule
+            was compiled from, whose revisions and holidays price the dated work days.
+            With hot_reload it follows the configuration versions.
+        compiled_schedule (CompiledSchedule): The payment schedule compiled into integer-minute
+            boundaries used to price the work days. With hot_reload it follows the
+            configuration versions.
+        shift_cache (Optional[LRUCache]): The memoized shift payments keyed by schedule
+            name, day or date, start and end minute, None when disabled. It is cleared
+            whenever the compiled schedule changes.
     """
 
-    def __init__(self, schedule_name: str):
+    def __init__(
+        self,
+        schedule_name: str,
+        round_slot_hours: bool = True,
+        cache_size: int = 0,
+        hot_reload: bool = False,
+    ):
+        self.schedule_name = schedule_name
+        self.round_slot_hours = round_slot_hours
+        self.hot_reload = hot_reload
         self.schedule_handler = ScheduleHandler()
-        self.payment_schedule = self.schedule_handler.get_schedule(
-            schedule_name
-        ).to_time_slots()
+        self.snapshot = self.schedule_handler.get_snapshot(schedule_name)
+        self.payment_schedule = self.snapshot.get_schedule(schedule_name).to_time_slots()
+        self.compiled_schedule = self.snapshot.get_compiled(schedule_name, round_slot_hours)
+        self._slot_table = None
+        self._slot_table_schedule = None
+        self.shift_cache = LRUCache(cache_size) if cache_size else None
+        self._cached_schedule = self.compiled_schedule
+        self._pay_periods: Dict[Tuple[date, date], PayPeriodIndex] = {}
+        self._calendar: Optional[ScheduleCalendar] = None
+        self._calendar_schedule = None
+        self._breakdown_slots: List[Tuple[str, int, int, float]] = []
+        self._breakdown_offsets: Dict[date, int] = {}
+        self._breakdown_schedule = None
 
-    @staticmethod
-    def _calculate_overlap(start1: time, end1: time, start2: time, end2: time) -> float:
+    def _get_compiled_schedule(self) -> CompiledSchedule:
+        """
+        Returns the compiled schedule a calculation should use, switching to the
+        current configuration version when hot reloading.
+        """
+        if not self.hot_reload:
+            return self.compiled_schedule
+        snapshot = self.schedule_handler.registry.current()
+        compiled_schedule = snapshot.get_compiled(self.schedule_name, self.round_slot_hours)
+        if compiled_schedule is not self.compiled_schedule:
+            self.payment_schedule = snapshot.get_schedule(self.schedule_name).to_time_slots()
+            self.snapshot = snapshot
+            self.compiled_schedule = compiled_schedule
+        return compiled_schedule
+
+    def get_pay_period(self, start: date, end: date) -> PayPeriodIndex:
         """
-        Calculates the overlap between two time periods in hours.
+        Returns the date index of a pay period for pricing dated work days, with the
+        revisions and the holiday calendar of the payment schedule resolved for every
+        date, from the configuration version of the compiled schedule. The index is
+        memoized per period and rebuilt when that version changes.
+
+        calculate_payment prices dated work days the same way, resolving every date
+        as it is met instead of the whole period at once.
 
         Args:
-            start1 (time): The start time of the first time period.
-            end1 (time): The end time of the first time period.
-            start2 (time): The start time of the second time period.
-            end2 (datetime): The end time of the second time period.
+            start (date): The first date of the pay period.
+            end (date): The last date of the pay period.
+
+        Raises:
+            ValueError: If the pay period ends before it starts.
+            InvalidScheduleError: If the holiday calendar of the schedule is not configured.
+
+        Returns:
+            PayPeriodIndex: The date index of the pay period.
+        """
+        self._get_compiled_schedule()
+        snapshot = self.snapshot
+        pay_period = self._pay_periods.get((start, end))
+        if pay_period is not None and pay_period.version == snapshot.version:
+            return pay_period
+        schedule = snapshot.get_schedule(self.schedule_name)
+        holidays = self._get_holidays(snapshot, schedule)
+        pay_period = PayPeriodIndex(
+            schedule, start, end, holidays, self.round_slot_hours, snapshot.version
+        )
+        self._pay_periods[(start, end)] = pay_period
+        return pay_period
+
+    @staticmethod
+    def _get_holidays(snapshot, schedule) -> FrozenSet[date]:
+        """
+        Returns the holidays of the calendar of a payment schedule, none without one.
+        """
+        if schedule.holiday_calendar is None:
+            return frozenset()
+        return snapshot.get_holidays(schedule.holiday_calendar)
+
+    def _get_calendar(self, compiled_schedule: CompiledSchedule) -> ScheduleCalendar:
+        """
+        Lazily builds the calendar pricing the dated work days, with the revisions and
+        the holidays of the payment schedule in the configuration version it was
+        compiled from, rebuilding it when the compiled schedule changes. The calendar
+        prices the dates of the first revision with the compiled schedule itself.
+        """
+        calendar = self._calendar
+        if calendar is None or self._calendar_schedule is not compiled_schedule:
+            snapshot = self.snapshot
+            schedule = snapshot.get_schedule(self.schedule_name)
+            calendar = ScheduleCalendar(
+                schedule,
+                self._get_holidays(snapshot, schedule),
+                self.round_slot_hours,
+                compiled_schedule.version,
+                compiled_schedule,
+            )
+            self._calendar = calendar
+            self._calendar_schedule = compiled_schedule
+        return calendar
+
+    def _get_breakdown_slots(
+        self, compiled_schedule: CompiledSchedule
+    ) -> List[Tuple[str, int, int, float]]:
+        """
+        Returns the slots of the breakdowns priced with a compiled schedule: the slots
+        of the schedule followed by those of every date priced with other time slots,
+        see _get_date_offset. The list is shared by the breakdowns and only grows
+        until the compiled schedule changes.
+        """
+        if self._breakdown_schedule is not compiled_schedule:
+            self._breakdown_slots = list(compiled_schedule.slots)
+            self._breakdown_offsets = {}
+            self._breakdown_schedule = compiled_schedule
+        return self._breakdown_slots
+
+    def _get_date_offset(self, work_date: date, compiled_day: CompiledDay) -> int:
+        """
+        Returns the index in the breakdown slots of the first time slot of a date
+        priced with the holiday time slots or with a later revision, adding the time
+        slots under the date in yyyy-mm-dd format the first time the date is met.
+        """
+        offset = self._breakdown_offsets.get(work_date)
+        if offset is None:
+            slots = self._breakdown_slots
+            offset = self._breakdown_offsets[work_date] = len(slots)
+            label = work_date.isoformat()
+            slots.extend(
+                (label, start, end, rate)
+                for start, end, rate in zip(
+                    compiled_day.starts, compiled_day.ends, compiled_day.rates
+                )
+            )
+        return offset
+
+    def get_compiled_day(self, work_day: WorkDay) -> CompiledDay:
+        """
+        Retrieves the compiled time slots a work day is priced with, see
+        calculate_payment: those of its date for a dated work day, of its day of the
+        week otherwise.
+
+        Raises:
+            ValueError: If the work day falls on a day without payment configuration.
 
         Returns:
-            float: The number of hours of overlap between the two time periods.
+            CompiledDay: The compiled time slots of the work day.
         """
-        overlap_start = datetime.combine(datetime.min, max(start1, start2))
-        overlap_end = datetime.combine(datetime.min, min(end1, end2))
-        overlap = (overlap_end - overlap_start).total_seconds() / 3600.0
-        return max(0, overlap)
+        compiled_schedule = self._get_compiled_schedule()
+        if work_day.date is None:
+            return compiled_schedule.get_day(work_day.day)
+        return self._get_calendar(compiled_schedule).get_day(work_day.date)
 
-    def _get_day_payments(self, day: WorkDay, time_slots: list) -> float:
+    @staticmethod
+    def _get_day_payments(day: WorkDay, compiled_day: CompiledDay) -> float:
         """
-        Calculates the payment for a work day based on its time slots.
+        Calculates the payment for a work day based on its compiled time slots.
 
         Args:
             day (WorkDay): A WorkDay object representing the work day to be calculated.
-            time_slots (List[TimeSlot]): A list of TimeSlot dataclasses representing
-                the time slots for the day.
+            compiled_day (CompiledDay): The compiled time slots for the day.
 
         Returns:
             float: The payment for the work day based on its time slots.
         """
-        day_payment = 0.0
-        for time_slot in time_slots:
-            overlap = self._calculate_overlap(
-                day.start, day.end, time_slot.start, time_slot.end
-            )
-            day_payment += round(overlap) * time_slot.rate
-        return day_payment
+        return compiled_day.price(
+            day.start.hour * 60 + day.start.minute, day.end.hour * 60 + day.end.minute
+        )
 
-    def calculate_payment(self, work_history: WorkHistory) -> float:
+    def calculate_payment(
+        self, work_history: Union[WorkHistory, ColumnarWorkHistory]
+    ) -> float:
         """
         Calculates the payment for an employee based on their work history and payment schedule.
 
+        Work days without a date are priced by their day of the week. Dated work days
+        are priced with the revision of the schedule in effect on their date, and with
+        the holiday time slots on the holidays of its calendar, like a pay period.
+
         Args:
-            work_history (WorkHistory): A WorkHistory object with the work history of an employee.
+            work_history (Union[WorkHistory, ColumnarWorkHistory]): A WorkHistory object
+                with the work history of an employee.
+
+        Raises:
+            ValueError: If a work day falls on a day without payment configuration.
 
         Returns:
             float: The payment for the employee based on their work history and payment schedule.
         """
+        return self._calculate(work_history, self._get_compiled_schedule())
+
+    def calculate_versioned_payment(
+        self, work_history: Union[WorkHistory, ColumnarWorkHistory]
+    ) -> Tuple[float, int]:
+        """
+        Calculates the payment for an employee, see calculate_payment, together with
+        the configuration version it was priced with.
+
+        Returns:
+            Tuple[float, int]: The payment and the version of the payment schedule.
+        """
+        compiled_schedule = self._get_compiled_schedule()
+        return self._calculate(work_history, compiled_schedule), compiled_schedule.version
+
+    def calculate_scheduled_payment(
+        self, work_history: Union[WorkHistory, ColumnarWorkHistory]
+    ) -> Tuple[float, int, str]:
+        """
+        Calculates the payment for an employee, see calculate_payment, together with
+        the configuration version and the name of the payment schedule it was priced
+        with. The batch mode records both with every result.
+
+        Returns:
+            Tuple[float, int, str]: The payment, the version and the name of the
+                payment schedule.
+        """
+        compiled_schedule = self._get_compiled_schedule()
+        return (
+            self._calculate(work_history, compiled_schedule),
+            compiled_schedule.version,
+            self.schedule_name,
+        )
+
+    def calculate_breakdown(
+        self, work_history: Union[WorkHistory, ColumnarWorkHistory]
+    ) -> PaymentBreakdown:
+        """
+        Calculates the payment for an employee itemized by schedule slot, gathering
+        the hours and the pay of every slot in the same pass as the total.
+
+        The payment is equal to calculate_payment. In the rounded pricing mode the
+        amounts add up to it exactly; in the prorated mode up to rounding errors.
+        The slots are those of the schedule, followed by the holiday or revised time
+        slots of the dated work days priced with them, whose day is their date.
+
+        Args:
+            work_history (Union[WorkHistory, ColumnarWorkHistory]): A WorkHistory object
+                with the work history of an employee.
+
+        Raises:
+            ValueError: If a work day falls on a day without payment configuration.
+
+        Returns:
+            PaymentBreakdown: The payment and the hours and pay per slot.
+        """
+        compiled_schedule = self._get_compiled_schedule()
+        slots = self._get_breakdown_slots(compiled_schedule)
+        hours = array("d", bytes(8 * len(slots)))
+        amounts = array("d", bytes(8 * len(slots)))
+
+        day_payments = []
+        if isinstance(work_history, ColumnarWorkHistory):
+            by_index = compiled_schedule.by_index
+            shifts = zip(work_history.days, work_history.starts, work_history.ends)
+            for day, start, end in shifts:
+                compiled_day = by_index[day]
+                if compiled_day is None:
+                    raise ValueError(
+                        f"Failed to get payement configuration for {DAYS_OF_WEEK[day]}"
+                    )
+                day_payments.append(compiled_day.itemize(start, end, hours, amounts))
+        else:
+            get_day = compiled_schedule.get_day
+            for work_day in work_history.schedule:
+                if work_day.date is None:
+                    compiled_day = get_day(work_day.day)
+                    offset = compiled_day.offset
+                else:
+                    compiled_day = self._get_calendar(compiled_schedule).get_day(work_day.date)
+                    if compiled_day is compiled_schedule.by_index[work_day.date.weekday()]:
+                        offset = compiled_day.offset
+                    else:
+                        offset = self._get_date_offset(work_day.date, compiled_day)
+                        missing = len(slots) - len(hours)
+                        if missing:
+                            hours.frombytes(bytes(8 * missing))
+                            amounts.frombytes(bytes(8 * missing))
+                start, end = work_day.start, work_day.end
+                day_payments.append(
+                    compiled_day.itemize(
+                        start.hour * 60 + start.minute,
+                        end.hour * 60 + end.minute,
+                        hours,
+                        amounts,
+                        offset,
+                    )
+                )
+
+        return PaymentBreakdown(
+            name=work_history.name,
+            payment=sum(day_payments),
+            hours=hours,
+            amounts=amounts,
+            slots=slots,
+            schedule_version=compiled_schedule.version,
+            schedule=compiled_schedule.name,
+        )
+
+    def _calculate(
+        self,
+        work_history: Union[WorkHistory, ColumnarWorkHistory],
+        compiled_schedule: CompiledSchedule,
+    ) -> float:
+        """
+        Calculates the payment for an employee with a given compiled schedule.
+        """
+        if self.shift_cache is not None:
+            return self._calculate_cached_payment(work_history, compiled_schedule)
+        if isinstance(work_history, ColumnarWorkHistory):
+            return self._calculate_columnar_payment(work_history, compiled_schedule)
+
         day_payments = []
+        get_day = compiled_schedule.get_day
         for work_day in work_history.schedule:
-            time_slots = self.payment_schedule.get(work_day.day)
-            if time_slots is None:
+            if work_day.date is None:
+                compiled_day = get_day(work_day.day)
+            else:
+                compiled_day = self._get_calendar(compiled_schedule).get_day(work_day.date)
+            day_payments.append(self._get_day_payments(work_day, compiled_day))
+
+        return sum(day_payments)
+
+    @staticmethod
+    def _calculate_columnar_payment(
+        work_history: ColumnarWorkHistory, compiled_schedule: CompiledSchedule
+    ) -> float:
+        """
+        Calculates the payment for a work history stored in arrays.
+        """
+        day_payments = []
+        by_index = compiled_schedule.by_index
+        for day, start, end in zip(work_history.days, work_history.starts, work_history.ends):
+            compiled_day = by_index[day]
+            if compiled_day is None:
                 raise ValueError(
-                    f"Failed to get payement configuration for {work_day.day}"
+                    f"Failed to get payement configuration for {DAYS_OF_WEEK[day]}"
                 )
-            day_payments.append(self._get_day_payments(work_day, time_slots))
+            day_payments.append(compiled_day.price(start, end))
 
         return sum(day_payments)
 
+    def _calculate_cached_payment(
+        self,
+        work_history: Union[WorkHistory, ColumnarWorkHistory],
+        compiled_schedule: CompiledSchedule,
+    ) -> float:
+        """
+        Calculates the payment for an employee looking up every shift in the cache.
+        """
+        cache = self.shift_cache
+        if compiled_schedule is not self._cached_schedule:
+            cache.clear()
+            self._cached_schedule = compiled_schedule
+        name = compiled_schedule.name
+
+        day_payments = []
+        if isinstance(work_history, ColumnarWorkHistory):
+            shifts = zip(work_history.days, work_history.starts, work_history.ends)
+            for day, start, end in shifts:
+                key = (name, day, start, end)
+                payment = cache.get(key, None)
+                if payment is None:
+                    compiled_day = compiled_schedule.by_index[day]
+                    if compiled_day is None:
+                        raise ValueError(
+                            f"Failed to get payement configuration for {DAYS_OF_WEEK[day]}"
+                        )
+                    payment = compiled_day.price(start, end)
+                    cache.put(key, payment)
+                day_payments.append(payment)
+            return sum(day_payments)
+
+        for work_day in work_history.schedule:
+            start, end = work_day.start, work_day.end
+            key = (
+                name,
+                work_day.day if work_day.date is None else work_day.date,
+                start.hour * 60 + start.minute,
+                end.hour * 60 + end.minute,
+            )
+            payment = cache.get(key, None)
+            if payment is None:
+                if work_day.date is None:
+                    compiled_day = compiled_schedule.get_day(work_day.day)
+                else:
+                    compiled_day = self._get_calendar(compiled_schedule).get_day(work_day.date)
+                payment = self._get_day_payments(work_day, compiled_day)
+                cache.put(key, payment)
+            day_payments.append(payment)
+        return sum(day_payments)
+
+    def _get_slot_table(self) -> "vectorized.SlotTable":
+        """
+        Lazily builds the NumPy slot table of the compiled schedule, rebuilding it
+        when the configuration version changes.
+        """
+        compiled_schedule = self._get_compiled_schedule()
+        if self._slot_table is None or self._slot_table_schedule is not compiled_schedule:
+            self._slot_table = vectorized.SlotTable(compiled_schedule)
+            self._slot_table_schedule = compiled_schedule
+        return self._slot_table
+
+    def calculate_payments_batch(self, work_histories: Sequence[WorkHistory]):
+        """
+        Calculates the payments for many employees at once using NumPy.
+
+        The results are equal to calling calculate_payment for every work history.
+
+        Args:
+            work_histories (Sequence[WorkHistory]): The work histories of the employees.
+
+        Raises:
+            ImportError: If numpy is not installed.
+            ValueError: If a work day falls on a day without payment configuration.
+
+        Returns:
+            ndarray: The payment of every employee, in the order of the work histories.
+        """
+        columns = vectorized.flatten_work_histories(work_histories)
+        return vectorized.calculate_payments(
+            self._get_slot_table(), *columns, employee_count=len(work_histories)
+        )
+
+    def calculate_payments_columns(
+        self,
+        employee_index,
+        day_index,
+        start_minute,
+        end_minute,
+        employee_count: Optional[int] = None,
+    ):
+        """
+        Calculates the payments for shifts given as parallel arrays using NumPy.
+
+        Args:
+            employee_index (ArrayLike): The employee index of every shift.
+            day_index (ArrayLike): The DAYS_OF_WEEK index of every shift.
+            start_minute (ArrayLike): The start of every shift in minutes since midnight.
+            end_minute (ArrayLike): The end of every shift in minutes since midnight.
+            employee_count (Optional[int]): The number of employees, by default one
+                more than the highest employee index.
+
+        Raises:
+            ImportError: If numpy is not installed.
+            ValueError: If a shift falls on a day without payment configuration.
+
+        Returns:
+            ndarray: The payment of every employee.
+        """
+        return vectorized.calculate_payments(
+            self._get_slot_table(),
+            employee_index,
+            day_index,
+            start_minute,
+            end_minute,
+            employee_count,
+        )
+
     def __str__(self):
         return str(self.__dict__)
@@ -0,0 +1,214 @@
+"""
+This module contains the checkpointed batch mode for very long runs. The files are
+read through memory mappings in newline-aligned byte ranges, see MappedFile, and
+after every range the output is flushed to disk and a checkpoint with the position
+reached is written atomically next to it. A run that stops for any reason can be
+resumed from its last checkpoint: the output is truncated to the checkpointed size
+and pricing continues with the following range, so the final output is the same as
+the one of an uninterrupted run.
+
+Usage:
+    run_checkpointed(["timesheet.txt"], input_parser, payroll_calculator,
+                     "results.csv", "csv", "results.checkpoint", resume=True)
+"""
+import dataclasses
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from .calculator import PayrollCalculator
+from .data_classes import Checkpoint, PaymentResult, RejectedLine
+from .errors import InvalidCheckpointError
+from .parser import InputParser
+from .reader import MappedFile, price_mapped_lines
+from .schedule import get_registry
+from .sinks import DEFAULT_BUFFER_SIZE, SINKS
+
+# Checkpointing every 64 MiB of input keeps the flushes and fsyncs far below one
+# percent of the run time while losing at most a few seconds of work.
+DEFAULT_CHECKPOINT_INTERVAL = 64 * 1024 * 1024
+
+
+def load_checkpoint(path: str) -> Optional[Checkpoint]:
+    """
+    Reads a checkpoint file.
+
+    Raises:
+        InvalidCheckpointError: If the file is not a checkpoint.
+
+    Returns:
+        Optional[Checkpoint]: The checkpoint, None when the file does not exist.
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            return Checkpoint(**json.load(file))
+    except FileNotFoundError:
+        return None
+    except (ValueError, TypeError) as error:
+        raise InvalidCheckpointError(f"Invalid checkpoint {path}: {error}") from error
+
+
+def write_checkpoint(path: str, checkpoint: Checkpoint):
+    """
+    Writes a checkpoint file atomically, replacing the previous one only once the
+    new one is on disk.
+    """
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as file:
+        json.dump(dataclasses.asdict(checkpoint), file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
+
+
+def _source_stats(sources: List[str]) -> List[List[int]]:
+    """
+    Returns the size and modification time in nanoseconds of every source.
+    """
+    stats = []
+    for source in sources:
+        stat = os.stat(source)
+        stats.append([stat.st_size, stat.st_mtime_ns])
+    return stats
+
+
+def _check_resumable(checkpoint: Checkpoint, expected: Checkpoint):
+    """
+    Checks a checkpoint belongs to a run with the same files, unchanged since, the
+    same payment schedules and configuration and the same output.
+
+    Raises:
+        InvalidCheckpointError: If the checkpoint belongs to another run, a source or
+            the configuration changed or the output was truncated since.
+    """
+    for attribute in (
+        "sources",
+        "source_stats",
+        "output",
+        "output_format",
+        "schedule",
+        "schedule_map",
+        "config_hash",
+    ):
+        if getattr(checkpoint, attribute) != getattr(expected, attribute):
+            raise InvalidCheckpointError(
+                f"The checkpoint has other {attribute}: {getattr(checkpoint, attribute)}"
+            )
+    if checkpoint.source_index > len(checkpoint.sources):
+        raise InvalidCheckpointError(f"Invalid checkpoint source: {checkpoint.source_index}")
+    if not os.path.exists(checkpoint.output) or (
+        os.path.getsize(checkpoint.output) < checkpoint.output_position
+    ):
+        raise InvalidCheckpointError(
+            f"The output {checkpoint.output} is shorter than the checkpoint"
+        )
+
+
+def _count(
+    items: Iterable[Union[PaymentResult, RejectedLine]],
+    checkpoint: Checkpoint,
+    line_offset: int,
+) -> Iterator[Union[PaymentResult, RejectedLine]]:
+    """
+    Renumbers the results of a range relative to the start of its file and adds
+    them to the aggregates of the checkpoint.
+    """
+    for item in items:
+        item.line_number += line_offset
+        if isinstance(item, RejectedLine):
+            checkpoint.rejected += 1
+        else:
+            checkpoint.priced += 1
+            checkpoint.payment_total += item.payment
+        yield item
+
+
+def run_checkpointed(
+    sources: List[str],
+    input_parser: InputParser,
+    payroll_calculator: PayrollCalculator,
+    output: str,
+    output_format: str,
+    checkpoint_path: str,
+    schedule_name: str = "default",
+    interval: int = DEFAULT_CHECKPOINT_INTERVAL,
+    resume: bool = False,
+    schedule_map: Optional[Dict[str, str]] = None,
+) -> Checkpoint:
+    """
+    Prices every line of the files into an output sink, writing a checkpoint after
+    every interval bytes of input. The checkpoint is removed once the run completes.
+    It records the hash of the schedule configuration, so a run is not resumed with
+    other rates than it started with.
+
+    Args:
+        sources (List[str]): The paths of the files to price.
+        input_parser (InputParser): The parser for the work histories.
+        payroll_calculator (PayrollCalculator): The calculator pricing the work histories.
+        output (str): The path of the output file.
+        output_format (str): One of the SINKS formats.
+        checkpoint_path (str): The path of the checkpoint file.
+        schedule_name (str): The payment schedule name written with the results.
+        schedule_map (Optional[Dict[str, str]]): The payment schedule of every
+            employee name the calculator was created with, recorded to check a
+            resumed run prices the same way.
+        interval (int): The approximate number of input bytes between two checkpoints.
+        resume (bool): Whether to continue from the checkpoint file. A new run is
+            started when there is none.
+
+    Raises:
+        InvalidCheckpointError: If the checkpoint to resume from is unreadable,
+            belongs to another run, or a source or the configuration changed since
+            it was written.
+        ValueError: If the format is unknown or the interval is not positive.
+
+    Returns:
+        Checkpoint: The final position and aggregates of the run.
+    """
+    sink_class = SINKS.get(output_format)
+    if sink_class is None:
+        raise ValueError(f"Unknown output format: {output_format}")
+    if interval < 1:
+        raise ValueError(f"Invalid checkpoint interval: {interval}")
+    checkpoint = Checkpoint(
+        list(sources),
+        output,
+        output_format,
+        _source_stats(sources),
+        schedule_name,
+        schedule_map,
+        get_registry().current().config_hash,
+    )
+    previous = load_checkpoint(checkpoint_path) if resume else None
+    if previous is not None:
+        _check_resumable(previous, checkpoint)
+        checkpoint = previous
+    # pylint: disable-next=consider-using-with
+    file = open(output, "r+b" if previous else "wb", buffering=DEFAULT_BUFFER_SIZE)
+    if previous is not None:
+        file.truncate(checkpoint.output_position)
+        file.seek(checkpoint.output_position)
+        sink = sink_class(file, schedule_name, [file.close], checkpoint.sink_state)
+    else:
+        sink = sink_class(file, schedule_name, [file.close])
+
+    with sink:
+        for source_index in range(checkpoint.source_index, len(sources)):
+            with MappedFile(sources[source_index]) as mapped_file:
+                for start, end in mapped_file.split_ranges(interval, checkpoint.offset):
+                    items = price_mapped_lines(
+                        mapped_file, input_parser, payroll_calculator, start, end
+                    )
+                    sink.write(_count(items, checkpoint, checkpoint.line_number))
+                    file.flush()
+                    os.fsync(file.fileno())
+                    checkpoint.offset = end
+                    checkpoint.line_number += mapped_file.count_lines(start, end)
+                    checkpoint.output_position = file.tell()
+                    checkpoint.sink_state = sink.state()
+                    write_checkpoint(checkpoint_path, checkpoint)
+            checkpoint.source_index = source_index + 1
+            checkpoint.offset = checkpoint.line_number = 0
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return checkpoint
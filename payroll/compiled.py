@@ -0,0 +1,354 @@
+"""
+This module contains the compiled form of a payment schedule. The time slots of
+every day are converted once into integer-minute boundaries and prefix sums so a
+work day can be priced with a couple of bisects instead of datetime arithmetic.
+
+The slots of a day are validated when they are compiled: overlapping slots, which
+would pay the same minutes twice, are rejected, and the minutes no slot covers are
+reported as gaps.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import time
+from typing import Dict, List, Optional, Tuple
+
+from .constants import DAYS_OF_WEEK, END_OF_DAY, MINUTES_PER_DAY
+from .data_classes import PaymentSchedule, TimeSlot, WorkDay
+from .errors import InvalidScheduleError
+
+
+def time_to_minutes(value: time) -> int:
+    """
+    Converts a time into minutes since midnight.
+
+    Args:
+        value (time): A time with minute resolution, or END_OF_DAY.
+
+    Raises:
+        ValueError: If the time has a seconds component other than END_OF_DAY.
+
+    Returns:
+        int: The minutes elapsed since midnight, MINUTES_PER_DAY for END_OF_DAY.
+    """
+    if value == END_OF_DAY:
+        return MINUTES_PER_DAY
+    if value.second or value.microsecond:
+        raise ValueError(f"Time {value} is not aligned to a minute")
+    return value.hour * 60 + value.minute
+
+
+def index_time_slots(
+    time_slots: List[TimeSlot],
+) -> Tuple[List[Tuple[int, int, float, int]], List[Tuple[int, int]]]:
+    """
+    Sorts the time slots of a day into a non-overlapping interval index. The index
+    only serves to find the slots a shift overlaps: every slot keeps its position in
+    the configured time slots, the order of the original pricing.
+
+    Args:
+        time_slots (List[TimeSlot]): The time slots configured for the day.
+
+    Raises:
+        InvalidScheduleError: If a slot is empty or overlaps another slot.
+
+    Returns:
+        Tuple[List[Tuple[int, int, float, int]], List[Tuple[int, int]]]: The slot
+            start minute, end minute, rate and configured position sorted by start,
+            and the start and end minute of every part of the day no slot covers.
+    """
+    slots = sorted(
+        (time_to_minutes(slot.start), time_to_minutes(slot.end), slot.rate, position)
+        for position, slot in enumerate(time_slots)
+    )
+    gaps = []
+    covered = 0
+    for start, end, _, _ in slots:
+        if end <= start:
+            raise InvalidScheduleError(
+                f"Invalid time slot {start // 60:02}:{start % 60:02}-{end // 60:02}:{end % 60:02}"
+            )
+        if start < covered:
+            raise InvalidScheduleError(
+                f"Time slots overlap between {start // 60:02}:{start % 60:02} and "
+                f"{covered // 60:02}:{covered % 60:02}"
+            )
+        if start > covered:
+            gaps.append((covered, start))
+        covered = end
+    if covered < MINUTES_PER_DAY:
+        gaps.append((covered, MINUTES_PER_DAY))
+    return slots, gaps
+
+
+class CompiledDay:
+    """
+    The time slots of a single day compiled into a sorted interval index, so
+    pricing a shift only visits the slots it overlaps.
+
+    Two pricing modes are available. With round_slot_hours the overlap with every
+    slot is rounded to whole hours before applying the rate, exactly as the original
+    datetime implementation did, including the order in which the slot payments are
+    added, which is the configured order of the slots. Otherwise the payment is
+    prorated by the minute using the cumulative pay prefix sums.
+
+    Args:
+        time_slots (List[TimeSlot]): The time slots configured for the day.
+        round_slot_hours (bool): Whether to round the hours worked in every slot.
+
+    Raises:
+        InvalidScheduleError: If a slot is empty or overlaps another slot.
+
+    Attributes:
+        starts (List[int]): The slot start minutes, sorted.
+        ends (List[int]): The slot end minutes, sorted.
+        rates (List[float]): The slot hourly rates.
+        positions (List[int]): The position of every sorted slot in the configured
+            time slots.
+        in_order (bool): Whether the time slots were configured sorted by start.
+        gaps (List[Tuple[int, int]]): The start and end minutes no slot covers.
+        boundaries (List[int]): Every distinct slot boundary between 0 and MINUTES_PER_DAY.
+        segment_rates (List[float]): The combined hourly rate between two boundaries.
+        cumulative (List[float]): The pay per hour-minute accumulated up to each boundary.
+        round_slot_hours (bool): Whether the hours worked in every slot are rounded.
+        offset (int): The index of the first slot of the day in the slots of its
+            schedule, see CompiledSchedule.slots.
+    """
+
+    __slots__ = (
+        "starts",
+        "ends",
+        "rates",
+        "positions",
+        "in_order",
+        "gaps",
+        "boundaries",
+        "segment_rates",
+        "cumulative",
+        "round_slot_hours",
+        "offset",
+        "price",
+    )
+
+    def __init__(self, time_slots: List[TimeSlot], round_slot_hours: bool = True):
+        slots, self.gaps = index_time_slots(time_slots)
+        self.starts = [slot[0] for slot in slots]
+        self.ends = [slot[1] for slot in slots]
+        self.rates = [slot[2] for slot in slots]
+        self.positions = [slot[3] for slot in slots]
+        self.in_order = self.positions == sorted(self.positions)
+
+        # The slots do not overlap, so the day splits into the slots and the gaps.
+        self.boundaries = [0]
+        self.segment_rates = []
+        for start, end, rate, _ in slots:
+            if start > self.boundaries[-1]:
+                self.boundaries.append(start)
+                self.segment_rates.append(0)
+            self.boundaries.append(end)
+            self.segment_rates.append(rate)
+        if self.boundaries[-1] < MINUTES_PER_DAY:
+            self.boundaries.append(MINUTES_PER_DAY)
+            self.segment_rates.append(0)
+        self.cumulative = [0.0]
+        for low, high, rate in zip(self.boundaries, self.boundaries[1:], self.segment_rates):
+            self.cumulative.append(self.cumulative[-1] + rate * (high - low))
+
+        self.round_slot_hours = round_slot_hours
+        self.offset = 0
+        self.price = self._price_rounded if round_slot_hours else self._price_prorated
+
+    def _price_rounded(self, start: int, end: int) -> float:
+        """
+        Prices a shift rounding the overlap with every slot to whole hours.
+
+        Args:
+            start (int): The shift start in minutes since midnight.
+            end (int): The shift end in minutes since midnight.
+
+        Returns:
+            float: The payment for the shift.
+        """
+        starts, ends, rates = self.starts, self.ends, self.rates
+        # Only the slots ending after the start and starting before the end overlap.
+        first = bisect_right(ends, start)
+        last = bisect_left(starts, end, first)
+        indexes = range(first, last)
+        if not self.in_order and last - first > 1:
+            # Floating-point addition is not associative: add in the configured order.
+            indexes = sorted(indexes, key=self.positions.__getitem__)
+        day_payment = 0.0
+        for index in indexes:
+            overlap = min(end, ends[index]) - max(start, starts[index])
+            day_payment += round(overlap / 60.0) * rates[index]
+        return day_payment
+
+    def itemize(
+        self, start: int, end: int, hours, amounts, offset: Optional[int] = None
+    ) -> float:
+        """
+        Prices a shift like price while adding the hours and the pay of every slot
+        it overlaps to the accumulators, at the index of the slot in its schedule.
+
+        Args:
+            start (int): The shift start in minutes since midnight.
+            end (int): The shift end in minutes since midnight.
+            hours (MutableSequence[float]): The hours accumulated per schedule slot.
+            amounts (MutableSequence[float]): The pay accumulated per schedule slot.
+            offset (Optional[int]): The index of the first slot of the day in the
+                accumulators, the offset of the day in its schedule by default.
+
+        Returns:
+            float: The payment for the shift, equal to price.
+        """
+        starts, ends, rates = self.starts, self.ends, self.rates
+        first = bisect_right(ends, start)
+        last = bisect_left(starts, end, first)
+        if offset is None:
+            offset = self.offset
+        rounded = self.round_slot_hours
+        day_payment = 0.0
+        for index in range(first, last):
+            overlap = min(end, ends[index]) - max(start, starts[index])
+            if rounded:
+                slot_hours = round(overlap / 60.0)
+                slot_payment = slot_hours * rates[index]
+                day_payment += slot_payment
+            else:
+                slot_hours = overlap / 60.0
+                slot_payment = overlap * rates[index] / 60.0
+            hours[offset + index] += slot_hours
+            amounts[offset + index] += slot_payment
+        if rounded and self.in_order:
+            return day_payment
+        return self.price(start, end)
+
+    def _accumulated(self, minute: int) -> float:
+        """
+        Returns the pay accumulated from midnight up to the given minute.
+        """
+        boundaries = self.boundaries
+        index = min(bisect_right(boundaries, minute), len(boundaries) - 1) - 1
+        return self.cumulative[index] + self.segment_rates[index] * (
+            minute - boundaries[index]
+        )
+
+    def _price_prorated(self, start: int, end: int) -> float:
+        """
+        Prices a shift by the exact number of minutes worked in every slot.
+
+        Args:
+            start (int): The shift start in minutes since midnight.
+            end (int): The shift end in minutes since midnight.
+
+        Returns:
+            float: The payment for the shift.
+        """
+        return (self._accumulated(end) - self._accumulated(start)) / 60.0
+
+
+class CompiledSchedule:
+    """
+    A payment schedule compiled for fast pricing of work days.
+
+    Args:
+        payment_schedule (PaymentSchedule): The payment schedule to compile.
+        round_slot_hours (bool): Whether to round the hours worked in every slot to
+            whole hours. Keep it enabled to reproduce the original payments.
+        version (int): The configuration version the schedule was compiled from.
+
+    Raises:
+        InvalidScheduleError: If the time slots of a day overlap.
+
+    Attributes:
+        name (str): The name of the compiled payment schedule.
+        round_slot_hours (bool): The pricing mode used by the compiled days.
+        version (int): The configuration version the schedule was compiled from.
+        days (Dict[str, CompiledDay]): The compiled days by day abbreviation.
+        by_index (List[Optional[CompiledDay]]): The compiled days by DAYS_OF_WEEK index.
+        slots (List[Tuple[str, int, int, float]]): The day, start minute, end minute
+            and rate of every slot of the schedule, the items of a breakdown.
+        table_key (Tuple): The pricing mode, the slots and their configured order,
+            equal for the schedules that price every shift the same, whatever their
+            names.
+    """
+
+    def __init__(
+        self, payment_schedule: PaymentSchedule, round_slot_hours: bool = True, version: int = 0
+    ):
+        self.name = payment_schedule.name
+        self.round_slot_hours = round_slot_hours
+        self.version = version
+        self.days: Dict[str, CompiledDay] = {}
+        for day, time_slots in payment_schedule.to_time_slots().items():
+            try:
+                self.days[day] = CompiledDay(time_slots, round_slot_hours)
+            except InvalidScheduleError as error:
+                raise InvalidScheduleError(
+                    f"Schedule '{self.name}' on {day}: {error}"
+                ) from error
+        self.by_index: List[Optional[CompiledDay]] = [
+            self.days.get(day) for day in DAYS_OF_WEEK
+        ]
+        self.slots: List[Tuple[str, int, int, float]] = []
+        for day, compiled_day in self.days.items():
+            compiled_day.offset = len(self.slots)
+            self.slots.extend(
+                (day, start, end, rate)
+                for start, end, rate in zip(
+                    compiled_day.starts, compiled_day.ends, compiled_day.rates
+                )
+            )
+        positions = tuple(tuple(compiled_day.positions) for compiled_day in self.days.values())
+        self.table_key = (round_slot_hours, tuple(self.slots), positions)
+
+    def share_tables(self, other: "CompiledSchedule"):
+        """
+        Replaces the compiled days and slots with those of a schedule with the same
+        table_key, so identical schedules share one set of tables.
+        """
+        if other.table_key != self.table_key:
+            raise ValueError(f"Schedules '{self.name}' and '{other.name}' price differently")
+        self.days, self.by_index, self.slots = other.days, other.by_index, other.slots
+
+    @property
+    def gaps(self) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        The start and end minutes no time slot covers, by day abbreviation, for the
+        days that have any.
+        """
+        return {day: compiled.gaps for day, compiled in self.days.items() if compiled.gaps}
+
+    def get_day(self, day: str) -> CompiledDay:
+        """
+        Retrieves the compiled time slots for a day.
+
+        Args:
+            day (str): The abbreviated day of the week.
+
+        Raises:
+            ValueError: If the schedule has no time slots for the day.
+
+        Returns:
+            CompiledDay: The compiled time slots for the day.
+        """
+        compiled_day = self.days.get(day)
+        if compiled_day is None:
+            raise ValueError(f"Failed to get payement configuration for {day}")
+        return compiled_day
+
+    def price_work_day(self, work_day: WorkDay) -> float:
+        """
+        Prices a single work day.
+
+        Args:
+            work_day (WorkDay): A WorkDay with minute resolution times.
+
+        Returns:
+            float: The payment for the work day.
+        """
+        start, end = work_day.start, work_day.end
+        return self.get_day(work_day.day).price(
+            start.hour * 60 + start.minute, end.hour * 60 + end.minute
+        )
+
+    def __str__(self):
+        return str(self.__dict__)
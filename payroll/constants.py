@@ -1,6 +1,12 @@
 """
     This file contains the constants for the payroll package
 """
+from datetime import time
 
 DAYS_OF_WEEK = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+DAY_INDEX = {day: index for index, day in enumerate(DAYS_OF_WEEK)}
 DEFAULT_CONFIG_FILE = "config.json"
+MINUTES_PER_DAY = 24 * 60
+END_OF_DAY = time(23, 59, 59)
+# Memory target of a ColumnarWorkHistory holding a month of shifts, in bytes per shift
+COLUMNAR_BYTES_PER_SHIFT = 24
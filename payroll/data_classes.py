@@ -1,12 +1,16 @@
 """
 This module contains all the data classes used in the Payroll package.
 """
-from dataclasses import dataclass
-from typing import List, Dict
-from datetime import time
+import datetime
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from datetime import date, time
 
+from .constants import DAYS_OF_WEEK
 
-@dataclass
+
+@dataclass(slots=True)
 class WorkDay:
     """
     Represents a work schedule for a single day.
@@ -15,14 +19,18 @@ class WorkDay:
     day(str): The abbreviated day of the week (e.g. 'MO', 'TU', etc.).
     start(time): The time the work shift starts.
     en(time): The time the work shift ends.
+    date(Optional[date]): The calendar date of a dated shift, whose day is then
+        the day of the week of the date.
     """
 
     day: str
     start: time
     end: time
+    # datetime.date: a bare date annotation would resolve to this field's default.
+    date: Optional[datetime.date] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class WorkHistory:
     """
     Represents an employee's work history, including the name of the employee
@@ -38,7 +46,77 @@ class WorkHistory:
     schedule: List[WorkDay]
 
 
-@dataclass
+@dataclass(slots=True)
+class ColumnarWorkHistory:
+    """
+    A compact WorkHistory storing the work days as three parallel unsigned 16-bit
+    arrays instead of WorkDay objects.
+
+    Every shift takes 6 bytes of array storage, and a whole history of a month of
+    shifts stays under COLUMNAR_BYTES_PER_SHIFT bytes per shift including the
+    containers, against roughly 100 bytes per shift for a WorkHistory.
+
+    Attributes:
+    name(str): The name of the employee.
+    days(array): The DAYS_OF_WEEK index of every work day.
+    starts(array): The start of every work day in minutes since midnight.
+    ends(array): The end of every work day in minutes since midnight.
+    """
+
+    name: str
+    days: array = field(default_factory=lambda: array("H"))
+    starts: array = field(default_factory=lambda: array("H"))
+    ends: array = field(default_factory=lambda: array("H"))
+
+    def append(self, day_index: int, start: int, end: int):
+        """
+        Adds a work day given as a DAYS_OF_WEEK index and minutes since midnight.
+        """
+        self.days.append(day_index)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    @property
+    def schedule(self) -> List[WorkDay]:
+        """
+        Returns the work days as WorkDay objects, for code expecting a WorkHistory.
+        """
+        return [
+            WorkDay(
+                day=DAYS_OF_WEEK[day],
+                start=time(start // 60, start % 60),
+                end=time(end // 60, end % 60),
+            )
+            for day, start, end in zip(self.days, self.starts, self.ends)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+
+@dataclass(slots=True)
+class MergedWorkHistory:
+    """
+    The work history of an employee merged from all the lines with their name.
+
+    Attributes:
+    work_history(Union[WorkHistory, ColumnarWorkHistory]): The distinct work days
+        of the employee, columnar unless a work day is dated.
+    source(str): The name of the input of the first line of the employee.
+    line_number(int): The 1-based line number of that line within its source.
+    lines(int): The number of lines merged.
+    duplicates(int): The number of work days dropped because an identical work
+        day was already merged.
+    """
+
+    work_history: Union[WorkHistory, ColumnarWorkHistory]
+    source: str
+    line_number: int
+    lines: int = 1
+    duplicates: int = 0
+
+
+@dataclass(slots=True)
 class TimeSlot:
     """
     A time slot during which work was performed and the corresponding hourly rate.
@@ -54,7 +132,7 @@ class TimeSlot:
     rate: float
 
 
-@dataclass
+@dataclass(slots=True)
 class Period:
     """
     Represents a period of time during which an employee works, consisting of one or
@@ -71,7 +149,7 @@ class Period:
     time_slots: List[TimeSlot]
 
 
-@dataclass
+@dataclass(slots=True)
 class PaymentSchedule:
     """
     A dataclass representing a payment schedule for employees.
@@ -80,10 +158,21 @@ class PaymentSchedule:
     name(str): A string representing the name of the payment schedule.
     periods(List[Period]): A list of Period dataclasses representing the periods of
         time during which the employee is expected to work.
+    effective_from(Optional[date]): The first date the periods apply to dated
+        shifts, None for the base schedule.
+    holiday_calendar(Optional[str]): The name of the holiday calendar of the schedule.
+    holiday_time_slots(List[TimeSlot]): The time slots that replace the slots of
+        the day of the week on holidays, no replacement when empty.
+    revisions(List[PaymentSchedule]): The effective-dated revisions replacing the
+        periods and holiday time slots from their effective_from date on.
     """
 
     name: str
     periods: List[Period]
+    effective_from: Optional[date] = None
+    holiday_calendar: Optional[str] = None
+    holiday_time_slots: List[TimeSlot] = field(default_factory=list)
+    revisions: List["PaymentSchedule"] = field(default_factory=list)
 
     def to_time_slots(self) -> Dict[str, TimeSlot]:
         """
@@ -97,3 +186,145 @@ class PaymentSchedule:
                 time_slots = day_to_time_dict.setdefault(day, [])
                 time_slots.extend(period.time_slots)
         return day_to_time_dict
+
+
+@dataclass(slots=True)
+class PaymentResult:
+    """
+    The payment calculated for one line of a batch input.
+
+    Attributes:
+    source(str): The name of the input the line was read from.
+    line_number(int): The 1-based line number within the source.
+    name(str): The name of the employee.
+    payment(float): The payment for the employee's work history.
+    schedule_version(int): The configuration version the payment was priced with.
+    schedule(str): The name of the payment schedule the payment was priced with,
+        empty when not recorded.
+    """
+
+    source: str
+    line_number: int
+    name: str
+    payment: float
+    schedule_version: int = 0
+    schedule: str = ""
+
+
+@dataclass(slots=True)
+class RejectedLine:
+    """
+    A line of a batch input that could not be priced.
+
+    Attributes:
+    source(str): The name of the input the line was read from.
+    line_number(int): The 1-based line number within the source.
+    line(str): The raw line without its line terminator.
+    error(Exception): The error raised while parsing or pricing the line.
+    """
+
+    source: str
+    line_number: int
+    line: str
+    error: Exception
+
+    @property
+    def error_type(self) -> str:
+        """
+        Returns the class name of the error, e.g. 'InvalidDayAbbreviationError'.
+        """
+        return type(self.error).__name__
+
+
+@dataclass(slots=True)
+class LedgerSnapshot:
+    """
+    The employee totals of a payroll ledger at a given version.
+
+    Attributes:
+    version(int): The ledger version, incremented on every change.
+    totals(Dict[str, float]): The total payment of every employee.
+    """
+
+    version: int
+    totals: Dict[str, float]
+
+
+@dataclass(slots=True)
+class PaymentBreakdown:
+    """
+    The payment of an employee itemized by schedule slot.
+
+    Attributes:
+    name(str): The name of the employee.
+    payment(float): The payment for the employee's work history.
+    hours(array): The hours worked in every slot of the schedule, rounded like the
+        payment in the rounded pricing mode.
+    amounts(array): The pay earned in every slot of the schedule.
+    slots(List[Tuple[str, int, int, float]]): The day, start minute, end minute and
+        rate of every slot of the schedule, then of the holiday or revised slots of
+        the dates priced with them, whose day is the yyyy-mm-dd date. Shared by the
+        breakdowns of a schedule, the list may have grown past hours and amounts.
+    schedule_version(int): The configuration version the payment was priced with.
+    schedule(str): The name of the payment schedule the payment was priced with.
+    """
+
+    name: str
+    payment: float
+    hours: array
+    amounts: array
+    slots: List[Tuple[str, int, int, float]]
+    schedule_version: int = 0
+    schedule: str = ""
+
+    def items(self) -> Iterator[Tuple[str, int, int, float, float, float]]:
+        """
+        Returns the day, start minute, end minute, rate, hours and amount of every
+        slot the employee worked in.
+        """
+        for (day, start, end, rate), hours, amount in zip(self.slots, self.hours, self.amounts):
+            if hours or amount:
+                yield day, start, end, rate, hours, amount
+
+
+@dataclass(slots=True)
+class Checkpoint:
+    """
+    The progress of a checkpointed batch run, enough to resume it.
+
+    Attributes:
+    sources(List[str]): The paths of the files of the run.
+    output(str): The path of the output file of the run.
+    output_format(str): The output format of the run.
+    source_stats(List[List[int]]): The size and modification time in nanoseconds of
+        every source when the run started.
+    schedule(str): The payment schedule name of the run.
+    schedule_map(Optional[Dict[str, str]]): The payment schedule of every employee
+        name of the run, see --schedule-map.
+    config_hash(Optional[str]): The SHA-256 hex digest of the schedule configuration
+        when the run started.
+    source_index(int): The index of the source being read.
+    offset(int): The byte offset in that source of the first line not yet written.
+    line_number(int): The number of lines of that source before the offset.
+    output_position(int): The size of the output written so far.
+    priced(int): The number of priced lines written so far.
+    rejected(int): The number of rejected lines written so far.
+    payment_total(float): The sum of the payments written so far.
+    sink_state(dict): The state of the output sink, see ResultSink.state.
+    """
+
+    sources: List[str]
+    output: str
+    output_format: str
+    source_stats: List[List[int]] = field(default_factory=list)
+    schedule: str = "default"
+    schedule_map: Optional[Dict[str, str]] = None
+    config_hash: Optional[str] = None
+    source_index: int = 0
+    offset: int = 0
+    line_number: int = 0
+    output_position: int = 0
+    priced: int = 0
+    rejected: int = 0
+    payment_total: float = 0.0
+    sink_state: dict = field(default_factory=dict)
@@ -24,3 +24,15 @@ class InvalidTimeIntervalError(PayrollError):
 
 class PaymentScheduleNotFound(PayrollError):
     """Raised when the required payment schedule is not configured"""
+
+
+class InvalidScheduleError(PayrollError):
+    """Raised when a payment schedule configuration is invalid"""
+
+
+class ShiftNotFoundError(PayrollError):
+    """Raised when a shift to remove or replace is not in the ledger"""
+
+
+class InvalidCheckpointError(PayrollError):
+    """Raised when a batch checkpoint is unreadable or belongs to another run"""
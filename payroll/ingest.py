@@ -0,0 +1,164 @@
+"""
+This module contains the concurrent ingestion stage of the batch mode. Every site
+drops its own timesheet file, often on slow network storage, so the files are read
+by a pool of threads, decompressing .gz files on the way, while the calling thread
+parses and prices the lines. The waits for the storage then overlap with the
+pricing instead of adding up file by file.
+
+Every file being read feeds a bounded queue of line blocks and at most one file
+per thread is read ahead, so a reader blocks once it is that far ahead of the
+pricing and memory usage is capped at about threads * (queue_size + 1) *
+block_lines lines, whatever the size and the number of the files. The lines are
+yielded file by file in the order of the sources, tagged with their source and
+line number, so the results are the same as with read_lines.
+
+Usage:
+    lines = read_lines_concurrently(expand_sources(["/mnt/sites/*.txt.gz"]), threads=8)
+    items = price_lines(lines, input_parser, payroll_calculator)
+"""
+import glob
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Tuple
+
+from .batch import STDIN_SOURCE, read_lines
+
+DEFAULT_READ_THREADS = 4
+DEFAULT_QUEUE_SIZE = 16
+DEFAULT_BLOCK_LINES = 1024
+
+# How long a blocked reader waits before checking whether the run was stopped.
+_PUT_TIMEOUT = 0.1
+_GLOB_CHARACTERS = frozenset("*?[")
+
+
+def expand_sources(sources: Iterable[str]) -> List[str]:
+    """
+    Expands directories and glob patterns into the timesheet files they contain.
+
+    A directory stands for the files directly inside it and a pattern for the files
+    it matches, both sorted by name and without hidden files. Other sources,
+    including '-' for stdin, are kept as they are.
+
+    Args:
+        sources (Iterable[str]): File paths, directories and glob patterns.
+
+    Raises:
+        FileNotFoundError: If a directory or a pattern has no file.
+
+    Returns:
+        List[str]: The file paths, in the order of the sources.
+    """
+    expanded = []
+    for source in sources:
+        if os.path.isdir(source):
+            pattern = os.path.join(glob.escape(source), "*")
+        elif (
+            source != STDIN_SOURCE
+            and not os.path.exists(source)
+            and not _GLOB_CHARACTERS.isdisjoint(source)
+        ):
+            pattern = source
+        else:
+            expanded.append(source)
+            continue
+        paths = sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+        if not paths:
+            raise FileNotFoundError(f"No timesheet file in {source}")
+        expanded.extend(paths)
+    return expanded
+
+
+def _read_source(
+    source: str, blocks: queue.Queue, block_lines: int, stopped: threading.Event
+):
+    """
+    Reads the numbered lines of a source into its queue in blocks of block_lines
+    lines, ending with None, or with the exception that stopped the reading. Gives
+    up as soon as the run is stopped.
+    """
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                blocks.put(item, timeout=_PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        block = []
+        for line in read_lines([source]):
+            block.append(line)
+            if len(block) == block_lines:
+                if not put(block):
+                    return
+                block = []
+        if block and not put(block):
+            return
+    except Exception as error:  # pylint: disable=broad-except
+        put(error)
+        return
+    put(None)
+
+
+def read_lines_concurrently(
+    sources: Iterable[str],
+    threads: int = DEFAULT_READ_THREADS,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    block_lines: int = DEFAULT_BLOCK_LINES,
+) -> Iterator[Tuple[str, int, str]]:
+    """
+    Reads the lines of every source with a pool of threads, skipping blank lines,
+    see read_lines.
+
+    Args:
+        sources (Iterable[str]): File paths to read, '-' stands for stdin. Files
+            ending in .gz are decompressed.
+        threads (int): The number of files read at the same time.
+        queue_size (int): The number of line blocks a thread reads ahead of the
+            consumer.
+        block_lines (int): The number of lines passed to the consumer at once.
+
+    Raises:
+        ValueError: If a size is not positive or a file is not valid UTF-8.
+        OSError: If a file cannot be read. The lines before the failure are
+            yielded first.
+
+    Returns:
+        Iterator[Tuple[str, int, str]]: The source, 1-based line number and the line
+            without its line terminator, in the order of the sources.
+    """
+    if min(threads, queue_size, block_lines) < 1:
+        raise ValueError(
+            f"Invalid ingestion sizes: {threads} threads, queue of {queue_size} "
+            f"blocks of {block_lines} lines"
+        )
+    remaining = iter(sources)
+    stopped = threading.Event()
+    pending: deque = deque()
+    executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="payroll-reader")
+
+    def submit(source: str):
+        blocks: queue.Queue = queue.Queue(maxsize=queue_size)
+        executor.submit(_read_source, source, blocks, block_lines, stopped)
+        pending.append(blocks)
+
+    try:
+        for _, source in zip(range(threads), remaining):
+            submit(source)
+        while pending:
+            for block in iter(pending.popleft().get, None):
+                if isinstance(block, Exception):
+                    raise block
+                yield from block
+            source = next(remaining, None)
+            if source is not None:
+                submit(source)
+    finally:
+        stopped.set()
+        executor.shutdown()
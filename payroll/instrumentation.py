@@ -0,0 +1,281 @@
+"""
+This module contains the optional instrumentation of the payroll package. When
+enabled, the parser, schedule handler and calculator methods are wrapped to keep
+counters and timing histograms per stage; configuration reads are timed in the
+ScheduleRegistry that ScheduleHandler._read_config goes through. When disabled the
+original methods are restored, so the instrumentation costs nothing in the inner
+loops.
+
+Usage:
+    from payroll import instrumentation
+
+    instrumentation.enable()
+    ...
+    print(instrumentation.format_summary())
+"""
+import functools
+from collections import Counter
+from time import perf_counter_ns
+from typing import Callable, Dict, List, Optional
+
+from .calculator import PayrollCalculator
+from .parser import InputParser
+from .data_classes import ColumnarWorkHistory
+from .schedule import ScheduleHandler, ScheduleRegistry
+
+HISTOGRAM_BUCKETS = 40
+
+
+class StageStats:
+    """
+    The timings of a single instrumented stage.
+
+    Attributes:
+        calls (int): The number of calls.
+        total_ns (int): The cumulative time spent in the stage, in nanoseconds.
+        max_ns (int): The slowest call, in nanoseconds.
+        histogram (List[int]): The number of calls per power-of-two bucket of
+            nanoseconds, bucket i counting calls that took less than 2**i ns.
+    """
+
+    __slots__ = ("calls", "total_ns", "max_ns", "histogram")
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """
+        Resets the timings to zero.
+        """
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * HISTOGRAM_BUCKETS
+
+    def record(self, elapsed_ns: int):
+        """
+        Records the duration of a call.
+        """
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.histogram[min(elapsed_ns.bit_length(), HISTOGRAM_BUCKETS - 1)] += 1
+
+    def merge(self, other: Dict):
+        """
+        Adds the counts of a snapshot of another StageStats, see to_dict.
+        """
+        self.calls += other["calls"]
+        self.total_ns += other["total_ns"]
+        self.max_ns = max(self.max_ns, other["max_ns"])
+        for bucket, count in enumerate(other["histogram"]):
+            self.histogram[bucket] += count
+
+    def percentile_ns(self, fraction: float) -> int:
+        """
+        Returns the upper bound of the histogram bucket holding the percentile,
+        capped to the slowest call.
+        """
+        target = fraction * self.calls
+        seen = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return min(1 << bucket, self.max_ns)
+        return 0
+
+    def to_dict(self) -> Dict:
+        """
+        Returns the stage timings as a dictionary.
+        """
+        return {
+            "calls": self.calls,
+            "total_ns": self.total_ns,
+            "max_ns": self.max_ns,
+            "histogram": list(self.histogram),
+        }
+
+
+class Instrumentation:
+    """
+    The counters and stage timings of the process.
+
+    The counters are updated without locking; under concurrent threads they are
+    best-effort.
+
+    Attributes:
+        enabled (bool): Whether the instrumented methods are installed.
+        counters (Counter): The lines, shifts and errors by error class.
+        stages (Dict[str, StageStats]): The timings per stage.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.counters = Counter()
+        self.stages: Dict[str, StageStats] = {}
+        self._originals: List = []
+
+    def stage(self, name: str) -> StageStats:
+        """
+        Returns the timings of a stage, creating them on first use.
+        """
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = StageStats()
+        return stats
+
+    def count_error(self, error: Exception):
+        """
+        Counts an error by its class name.
+        """
+        self.counters["errors"] += 1
+        self.counters[f"errors.{type(error).__name__}"] += 1
+
+    def reset(self):
+        """
+        Clears every counter and timing. The stages are cleared in place because
+        the installed wrappers keep a reference to them.
+        """
+        self.counters.clear()
+        for stats in self.stages.values():
+            stats.clear()
+
+    def snapshot(self) -> Dict:
+        """
+        Returns the counters and the timings as a dictionary.
+        """
+        return {
+            "counters": dict(self.counters),
+            "stages": {name: stats.to_dict() for name, stats in self.stages.items()},
+        }
+
+    def merge(self, snapshot: Dict):
+        """
+        Adds a snapshot, e.g. from a worker process, to the counters and timings.
+        """
+        self.counters.update(snapshot["counters"])
+        for name, stats in snapshot["stages"].items():
+            self.stage(name).merge(stats)
+
+    def _wrap(self, name: str, func: Callable, on_result: Optional[Callable] = None):
+        """
+        Wraps a function to time its calls under the stage name.
+        """
+        stats = self.stage(name)
+        record = stats.record
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = perf_counter_ns()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as error:
+                if on_result is not None:
+                    self.count_error(error)
+                raise
+            finally:
+                record(perf_counter_ns() - started)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        return wrapper
+
+    def _count_parsed(self, work_history):
+        """
+        Counts a parsed line and its shifts.
+        """
+        self.counters["lines"] += 1
+        if isinstance(work_history, ColumnarWorkHistory):
+            self.counters["shifts"] += len(work_history)
+        else:
+            self.counters["shifts"] += len(work_history.schedule)
+
+    def _count_priced(self, _payment):
+        """
+        Counts a calculated payment.
+        """
+        self.counters["payments"] += 1
+
+    def enable(self):
+        """
+        Installs the instrumented methods. Calling it again has no effect.
+        """
+        if self.enabled:
+            return
+        hooks = [
+            (InputParser, "parse", "parse", self._count_parsed),
+            (InputParser, "parse_bytes", "parse", self._count_parsed),
+            (ScheduleRegistry, "_refresh", "read_config", None),
+            (ScheduleHandler, "get_schedule", "get_schedule", None),
+            (PayrollCalculator, "calculate_payment", "calculate_payment", self._count_priced),
+            (
+                PayrollCalculator,
+                "calculate_versioned_payment",
+                "calculate_payment",
+                self._count_priced,
+            ),
+            (
+                PayrollCalculator,
+                "calculate_scheduled_payment",
+                "calculate_payment",
+                self._count_priced,
+            ),
+            (PayrollCalculator, "_get_day_payments", "day_payments", None),
+        ]
+        for cls, attribute, name, on_result in hooks:
+            original = cls.__dict__[attribute]
+            if isinstance(original, staticmethod):
+                wrapped = staticmethod(self._wrap(name, original.__func__, on_result))
+            else:
+                wrapped = self._wrap(name, original, on_result)
+            self._originals.append((cls, attribute, original))
+            setattr(cls, attribute, wrapped)
+        self.enabled = True
+
+    def disable(self):
+        """
+        Restores the original methods, keeping the collected statistics.
+        """
+        while self._originals:
+            cls, attribute, original = self._originals.pop()
+            setattr(cls, attribute, original)
+        self.enabled = False
+
+    def format_summary(self) -> str:
+        """
+        Formats the counters and timings as a human readable table.
+        """
+        lines = ["counters:"]
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"  {name:<40} {value:>12}")
+        lines.append(
+            f"{'stage':<20} {'calls':>10} {'total ms':>10} {'mean us':>9} "
+            f"{'p99 us':>9} {'max us':>9}"
+        )
+        for name, stats in self.stages.items():
+            if not stats.calls:
+                continue
+            lines.append(
+                f"{name:<20} {stats.calls:>10} {stats.total_ns / 1e6:>10.1f} "
+                f"{stats.total_ns / stats.calls / 1e3:>9.2f} "
+                f"{stats.percentile_ns(0.99) / 1e3:>9.2f} {stats.max_ns / 1e3:>9.2f}"
+            )
+        return "\n".join(lines)
+
+
+_instrumentation = Instrumentation()
+enable = _instrumentation.enable
+disable = _instrumentation.disable
+reset = _instrumentation.reset
+snapshot = _instrumentation.snapshot
+merge = _instrumentation.merge
+format_summary = _instrumentation.format_summary
+
+
+def is_enabled() -> bool:
+    """
+    Returns whether the instrumentation is enabled.
+    """
+    return _instrumentation.enabled
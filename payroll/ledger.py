@@ -0,0 +1,283 @@
+"""
+This module contains the incremental payroll ledger. The ledger keeps the priced
+shifts of every employee and their running totals, so a corrected shift is priced
+on its own instead of re-running the calculator over the whole work history.
+
+Every change increments the ledger version and is recorded in a bounded journal,
+so a dashboard can poll the employees whose total changed since the version it
+last saw instead of reading every total again.
+"""
+from collections import deque
+from itertools import islice
+from typing import Deque, Dict, Iterable, Optional, Tuple, Union
+
+from .calculator import PayrollCalculator
+from .constants import DAY_INDEX
+from .data_classes import LedgerSnapshot, WorkDay, WorkHistory
+from .errors import InvalidDayAbbreviationError, ShiftNotFoundError
+
+ShiftKey = Tuple[int, int, int, int]
+DEFAULT_JOURNAL_SIZE = 1_000_000
+
+
+class _EmployeeEntry:
+    """
+    The priced shifts of an employee, keyed by day index, date ordinal (0 without a
+    date), start and end minute, with the number of identical shifts and the
+    payment of one of them.
+    """
+
+    __slots__ = ("shifts", "total")
+
+    def __init__(self):
+        self.shifts: Dict[ShiftKey, list] = {}
+        self.total = 0.0
+
+
+class PayrollLedger:
+    """
+    The priced shifts and running totals of many employees.
+
+    Adding, removing or replacing a shift prices that shift only and updates the
+    total of its employee in constant time. The totals are running sums, so whenever
+    the shift payments are fractional, in the prorated pricing mode or in the
+    rounded mode with fractional rates, they may differ from calculate_payment in
+    the last bits; call recompute to resum an employee.
+
+    Args:
+        payroll_calculator (PayrollCalculator): The calculator whose compiled schedule
+            prices the shifts.
+        journal_size (int): The number of changes kept for diff.
+
+    Attributes:
+        version (int): The number of changes applied to the ledger.
+    """
+
+    def __init__(
+        self, payroll_calculator: PayrollCalculator, journal_size: int = DEFAULT_JOURNAL_SIZE
+    ):
+        self.payroll_calculator = payroll_calculator
+        self.version = 0
+        self._employees: Dict[str, _EmployeeEntry] = {}
+        self._journal: Deque[str] = deque(maxlen=journal_size)
+
+    def _price(self, work_day: WorkDay) -> Tuple[ShiftKey, float]:
+        """
+        Prices a shift with the compiled schedule of the calculator, a dated shift
+        with the revision and the holidays of its date like calculate_payment.
+
+        Raises:
+            InvalidDayAbbreviationError: If the day of the work day is unknown.
+            ValueError: If the schedule has no time slots for the day or the date.
+        """
+        key = self._shift_key(work_day)
+        compiled_day = self.payroll_calculator.get_compiled_day(work_day)
+        return key, compiled_day.price(key[2], key[3])
+
+    def _changed(self, name: str):
+        """
+        Records a change of the total of an employee.
+        """
+        self.version += 1
+        self._journal.append(name)
+
+    def _add(self, entry: _EmployeeEntry, key: ShiftKey, payment: float):
+        """
+        Adds a priced shift to an employee.
+        """
+        shift = entry.shifts.get(key)
+        if shift is None:
+            entry.shifts[key] = [1, payment]
+        else:
+            shift[0] += 1
+        entry.total += payment
+
+    def _remove(self, name: str, entry: _EmployeeEntry, key: ShiftKey):
+        """
+        Removes a priced shift from an employee.
+
+        Raises:
+            ShiftNotFoundError: If the employee has no such shift.
+        """
+        shift = entry.shifts.get(key)
+        if shift is None:
+            raise ShiftNotFoundError(f"Shift {key} not found for {name}")
+        shift[0] -= 1
+        if not shift[0]:
+            del entry.shifts[key]
+        entry.total = entry.total - shift[1] if entry.shifts else 0.0
+
+    def set_work_history(self, work_history: WorkHistory) -> float:
+        """
+        Replaces every shift of an employee with the shifts of a work history.
+
+        Raises:
+            InvalidDayAbbreviationError: If the day of a work day is unknown.
+            ValueError: If a work day falls on a day without payment configuration.
+                The ledger is left unchanged.
+
+        Returns:
+            float: The new total of the employee.
+        """
+        priced = [self._price(work_day) for work_day in work_history.schedule]
+        entry = _EmployeeEntry()
+        for key, payment in priced:
+            self._add(entry, key, payment)
+        self._employees[work_history.name] = entry
+        self._changed(work_history.name)
+        return entry.total
+
+    def add_shift(self, name: str, work_day: WorkDay) -> float:
+        """
+        Adds a shift to an employee, creating the employee if needed.
+
+        Raises:
+            InvalidDayAbbreviationError: If the day of the work day is unknown.
+            ValueError: If the work day falls on a day without payment configuration.
+
+        Returns:
+            float: The new total of the employee.
+        """
+        key, payment = self._price(work_day)
+        entry = self._employees.get(name)
+        if entry is None:
+            entry = self._employees[name] = _EmployeeEntry()
+        self._add(entry, key, payment)
+        self._changed(name)
+        return entry.total
+
+    def remove_shift(self, name: str, work_day: WorkDay) -> float:
+        """
+        Removes one shift from an employee.
+
+        Raises:
+            ShiftNotFoundError: If the employee has no such shift.
+            InvalidDayAbbreviationError: If the day of the work day is unknown.
+
+        Returns:
+            float: The new total of the employee.
+        """
+        entry = self._employees.get(name)
+        if entry is None:
+            raise ShiftNotFoundError(f"Employee {name} not found")
+        self._remove(name, entry, self._shift_key(work_day))
+        self._changed(name)
+        return entry.total
+
+    def replace_shift(self, name: str, old_work_day: WorkDay, new_work_day: WorkDay) -> float:
+        """
+        Replaces one shift of an employee, e.g. a shift that was moved.
+
+        Raises:
+            ShiftNotFoundError: If the employee does not have the old shift.
+            InvalidDayAbbreviationError: If the day of a work day is unknown.
+            ValueError: If the new work day falls on a day without payment
+                configuration. The ledger is left unchanged.
+
+        Returns:
+            float: The new total of the employee.
+        """
+        entry = self._employees.get(name)
+        if entry is None:
+            raise ShiftNotFoundError(f"Employee {name} not found")
+        key, payment = self._price(new_work_day)
+        self._remove(name, entry, self._shift_key(old_work_day))
+        self._add(entry, key, payment)
+        self._changed(name)
+        return entry.total
+
+    def remove_employee(self, name: str):
+        """
+        Removes an employee and all their shifts.
+
+        Raises:
+            ShiftNotFoundError: If the employee is not in the ledger.
+        """
+        if self._employees.pop(name, None) is None:
+            raise ShiftNotFoundError(f"Employee {name} not found")
+        self._changed(name)
+
+    @staticmethod
+    def _shift_key(work_day: WorkDay) -> ShiftKey:
+        """
+        Returns the ledger key of a shift without pricing it.
+
+        Raises:
+            InvalidDayAbbreviationError: If the day of the work day is unknown.
+        """
+        day_index = DAY_INDEX.get(work_day.day)
+        if day_index is None:
+            raise InvalidDayAbbreviationError(f"Invalid day abbreviation: {work_day.day}")
+        start, end = work_day.start, work_day.end
+        return (
+            day_index,
+            work_day.date.toordinal() if work_day.date is not None else 0,
+            start.hour * 60 + start.minute,
+            end.hour * 60 + end.minute,
+        )
+
+    def total(self, name: str) -> float:
+        """
+        Returns the running total of an employee, 0.0 for an unknown employee.
+        """
+        entry = self._employees.get(name)
+        return entry.total if entry is not None else 0.0
+
+    def recompute(self, name: str) -> float:
+        """
+        Resums the priced shifts of an employee, discarding the running sum error.
+
+        Returns:
+            float: The total of the employee.
+        """
+        entry = self._employees.get(name)
+        if entry is None:
+            return 0.0
+        entry.total = sum(count * payment for count, payment in entry.shifts.values())
+        return entry.total
+
+    def snapshot(self) -> LedgerSnapshot:
+        """
+        Returns a copy of the totals of every employee at the current version.
+        """
+        return LedgerSnapshot(
+            self.version, {name: entry.total for name, entry in self._employees.items()}
+        )
+
+    def diff(self, since: Union[int, LedgerSnapshot]) -> Dict[str, Optional[float]]:
+        """
+        Returns the totals that changed after a version.
+
+        Args:
+            since (Union[int, LedgerSnapshot]): A version or a snapshot of the ledger.
+
+        Raises:
+            ValueError: If the version is older than the journal; take a new snapshot.
+
+        Returns:
+            Dict[str, Optional[float]]: The current total of every employee whose total
+                changed, None for the removed employees.
+        """
+        if isinstance(since, LedgerSnapshot):
+            since = since.version
+        changes = self.version - since
+        if changes < 0 or changes > len(self._journal):
+            raise ValueError(f"Version {since} is not in the ledger journal")
+        changed = set(islice(reversed(self._journal), changes))
+        employees = self._employees
+        return {
+            name: employees[name].total if name in employees else None for name in changed
+        }
+
+    def update(self, work_histories: Iterable[WorkHistory]):
+        """
+        Loads many work histories, see set_work_history.
+        """
+        for work_history in work_histories:
+            self.set_work_history(work_history)
+
+    def __len__(self) -> int:
+        return len(self._employees)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._employees
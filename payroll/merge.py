@@ -0,0 +1,344 @@
+"""
+This module contains the group-by-employee mode of the batch pipeline. Exports
+split the week of an employee across several lines and files, so the lines are
+merged by employee name before pricing, and identical work days listed more than
+once are priced once.
+
+The work days of every employee are kept in memory as packed integers while they
+fit the memory budget. Past it, the employees in memory are spilled to temporary
+partition files by a hash of their name, and every partition is then merged in one
+sequential pass; a partition that still exceeds the budget is partitioned again
+with other bits of the hash. Memory usage thus stays around the budget whatever
+the number of lines and employees, as long as a single employee fits in it.
+
+Usage:
+    merger = EmployeeMerger(memory_budget=512 * 1024 * 1024)
+    merged = merger.merge(read_lines(["site1.txt", "site2.txt"]), input_parser)
+    items = price_merged(merged, payroll_calculator)
+"""
+import os
+import pickle
+import tempfile
+import zlib
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .batch import PRICING_ERRORS
+from .calculator import PayrollCalculator
+from .constants import DAY_INDEX, DAYS_OF_WEEK, MINUTES_PER_DAY
+from .data_classes import (
+    ColumnarWorkHistory,
+    MergedWorkHistory,
+    PaymentResult,
+    RejectedLine,
+    WorkDay,
+    WorkHistory,
+)
+from .parser import TIMES_BY_MINUTE, InputParser
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024 * 1024
+DEFAULT_PARTITIONS = 64
+# Approximate memory held per employee and per distinct work day of the merge,
+# measured with tracemalloc on CPython 3.11.
+EMPLOYEE_BYTES = 400
+WORK_DAY_BYTES = 72
+# Work days packed above this value are dated, see pack_work_day.
+FIRST_DATED_KEY = len(DAYS_OF_WEEK) * MINUTES_PER_DAY * MINUTES_PER_DAY
+_HASH_RANGE = 2**32
+
+MergedRecord = Tuple[str, str, int, int, int, List[int]]
+
+
+def pack_work_day(day_index: int, start: int, end: int, ordinal: int = 0) -> int:
+    """
+    Packs a work day into one integer, equal for identical work days and ordered
+    by date, day of the week, start and end.
+
+    Args:
+        day_index (int): The DAYS_OF_WEEK index of the work day.
+        start (int): The start of the work day in minutes since midnight.
+        end (int): The end of the work day in minutes since midnight.
+        ordinal (int): The proleptic Gregorian ordinal of the date of a dated work
+            day, 0 when the work day has no date.
+    """
+    key = (ordinal * len(DAYS_OF_WEEK) + day_index) * MINUTES_PER_DAY + start
+    return key * MINUTES_PER_DAY + end
+
+
+def _pack_work_history(work_history: Union[WorkHistory, ColumnarWorkHistory]) -> List[int]:
+    """
+    Packs every work day of a work history, see pack_work_day.
+    """
+    if isinstance(work_history, ColumnarWorkHistory):
+        # pack_work_day inlined for undated work days, the common case of big runs
+        return [
+            (day * MINUTES_PER_DAY + start) * MINUTES_PER_DAY + end
+            for day, start, end in zip(work_history.days, work_history.starts, work_history.ends)
+        ]
+    return [
+        pack_work_day(
+            DAY_INDEX[work_day.day],
+            work_day.start.hour * 60 + work_day.start.minute,
+            work_day.end.hour * 60 + work_day.end.minute,
+            work_day.date.toordinal() if work_day.date is not None else 0,
+        )
+        for work_day in work_history.schedule
+    ]
+
+
+def _unpack_work_history(
+    name: str, keys: Iterable[int]
+) -> Union[WorkHistory, ColumnarWorkHistory]:
+    """
+    Builds the work history of packed work days, in packing order. The work history
+    is columnar unless a work day is dated.
+    """
+    keys = sorted(keys)
+    if keys and keys[-1] >= FIRST_DATED_KEY:
+        schedule = []
+        for key in keys:
+            key, end = divmod(key, MINUTES_PER_DAY)
+            key, start = divmod(key, MINUTES_PER_DAY)
+            ordinal, day = divmod(key, len(DAYS_OF_WEEK))
+            schedule.append(
+                WorkDay(
+                    DAYS_OF_WEEK[day],
+                    TIMES_BY_MINUTE[start],
+                    TIMES_BY_MINUTE[end],
+                    date.fromordinal(ordinal) if ordinal else None,
+                )
+            )
+        return WorkHistory(name, schedule)
+    work_history = ColumnarWorkHistory(name)
+    for key in keys:
+        key, end = divmod(key, MINUTES_PER_DAY)
+        day, start = divmod(key, MINUTES_PER_DAY)
+        work_history.append(day, start, end)
+    return work_history
+
+
+class _EmployeeTable:
+    """
+    The employees merged in memory, spilled to hash partitions past the memory
+    budget. Every entry holds the source and line number of the first line of the
+    employee, the numbers of lines and duplicates and the set of packed work days.
+    """
+
+    def __init__(self, merger: "EmployeeMerger", level: int = 0):
+        self.merger = merger
+        self.level = level
+        self.entries: Dict[str, list] = {}
+        self.usage = 0
+        # Every level partitions on the next digit of the hash in base partitions.
+        self.divisor = merger.partitions**level
+        self.can_spill = self.divisor * merger.partitions <= _HASH_RANGE
+        self._directory: Optional[tempfile.TemporaryDirectory] = None
+        self._files: List = []
+
+    def add(
+        self,
+        name: str,
+        source: str,
+        line_number: int,
+        lines: int,
+        duplicates: int,
+        keys: List[int],
+    ):
+        """
+        Merges the packed work days of a line or of a spilled record.
+        """
+        entry = self.entries.get(name)
+        if entry is None:
+            entry = self.entries[name] = [source, line_number, 0, 0, set()]
+            self.usage += EMPLOYEE_BYTES
+        work_days = entry[4]
+        count = len(work_days)
+        work_days.update(keys)
+        added = len(work_days) - count
+        entry[2] += lines
+        entry[3] += duplicates + len(keys) - added
+        self.usage += added * WORK_DAY_BYTES
+        # Spilling a single employee cannot bring the usage under the budget.
+        if self.usage > self.merger.memory_budget and self.can_spill and len(self.entries) > 1:
+            self._spill()
+
+    def _spill(self):
+        """
+        Appends the entries in memory to their partition files and clears them.
+        """
+        partitions = self.merger.partitions
+        if self._directory is None:
+            self._directory = tempfile.TemporaryDirectory(
+                prefix="payroll-merge-", dir=self.merger.spill_dir
+            )
+            self._files = [
+                # pylint: disable-next=consider-using-with
+                open(os.path.join(self._directory.name, f"{partition}.pickle"), "w+b")
+                for partition in range(partitions)
+            ]
+        records: List[List[MergedRecord]] = [[] for _ in range(partitions)]
+        for name, (source, line_number, lines, duplicates, work_days) in self.entries.items():
+            partition = zlib.crc32(name.encode("utf-8")) // self.divisor % partitions
+            records[partition].append(
+                (name, source, line_number, lines, duplicates, list(work_days))
+            )
+        for file, partition_records in zip(self._files, records):
+            if partition_records:
+                pickle.dump(partition_records, file, pickle.HIGHEST_PROTOCOL)
+        self.merger.spills += 1
+        self.entries.clear()
+        self.usage = 0
+
+    def results(self) -> Iterator[MergedWorkHistory]:
+        """
+        Yields the merged employees, in first line order when nothing was spilled
+        and partition by partition otherwise.
+        """
+        if self._directory is None:
+            for name, (source, line_number, lines, duplicates, work_days) in self.entries.items():
+                yield MergedWorkHistory(
+                    _unpack_work_history(name, work_days), source, line_number, lines, duplicates
+                )
+            return
+        self._spill()
+        try:
+            for file in self._files:
+                file.seek(0)
+                table = _EmployeeTable(self.merger, self.level + 1)
+                while True:
+                    try:
+                        records = pickle.load(file)
+                    except EOFError:
+                        break
+                    for record in records:
+                        table.add(*record)
+                file.close()
+                yield from table.results()
+        finally:
+            for file in self._files:
+                file.close()
+            self._directory.cleanup()
+
+
+class EmployeeMerger:
+    """
+    Merges the lines of a batch input by employee name, in bounded memory.
+
+    The work days of the lines of every employee are merged into one work history,
+    dropping the work days identical to one already merged, i.e. with the same day,
+    start, end and date. When the merged work days exceed the memory budget, they
+    are spilled to temporary files in hash partitions, each merged in one pass at
+    the end.
+
+    Args:
+        memory_budget (int): The approximate number of bytes of work days kept in
+            memory, see EMPLOYEE_BYTES and WORK_DAY_BYTES.
+        partitions (int): The number of partition files a spill writes.
+        spill_dir (Optional[str]): The directory of the partition files, the
+            temporary directory by default.
+
+    Raises:
+        ValueError: If the memory budget is not positive or there are less than two
+            partitions.
+
+    Attributes:
+        lines (int): The number of lines merged.
+        employees (int): The number of merged work histories yielded.
+        duplicates (int): The number of work days dropped as duplicates.
+        spills (int): The number of times work days were spilled to disk.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        partitions: int = DEFAULT_PARTITIONS,
+        spill_dir: Optional[str] = None,
+    ):
+        if memory_budget < 1:
+            raise ValueError(f"Invalid memory budget: {memory_budget}")
+        if partitions < 2:
+            raise ValueError(f"Invalid number of partitions: {partitions}")
+        self.memory_budget = memory_budget
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.lines = 0
+        self.employees = 0
+        self.duplicates = 0
+        self.spills = 0
+
+    def merge(
+        self, lines: Iterable[Tuple[str, int, str]], input_parser: InputParser
+    ) -> Iterator[Union[MergedWorkHistory, RejectedLine]]:
+        """
+        Parses every line and merges the work histories by employee name. The lines
+        that cannot be parsed are yielded as rejected lines while reading, the
+        merged work histories once every line was read.
+
+        Args:
+            lines (Iterable[Tuple[str, int, str]]): The numbered lines, see read_lines.
+            input_parser (InputParser): The parser for the work histories.
+
+        Returns:
+            Iterator[Union[MergedWorkHistory, RejectedLine]]: The rejected lines,
+                then a merged work history per employee.
+        """
+        table = _EmployeeTable(self)
+        parse = input_parser.parse
+        for source, line_number, line in lines:
+            try:
+                work_history = parse(line)
+                keys = _pack_work_history(work_history)
+            except PRICING_ERRORS as error:
+                yield RejectedLine(source, line_number, line, error)
+                continue
+            self.lines += 1
+            table.add(work_history.name, source, line_number, 1, 0, keys)
+        for merged in table.results():
+            self.employees += 1
+            self.duplicates += merged.duplicates
+            yield merged
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the merge counters.
+        """
+        return {
+            "lines": self.lines,
+            "employees": self.employees,
+            "duplicates": self.duplicates,
+            "spills": self.spills,
+        }
+
+
+def price_merged(
+    items: Iterable[Union[MergedWorkHistory, RejectedLine]],
+    payroll_calculator: PayrollCalculator,
+) -> Iterator[Union[PaymentResult, RejectedLine]]:
+    """
+    Prices every merged work history, turning failures into rejected lines. The
+    results carry the source and line number of the first line of the employee,
+    and a rejected employee carries their name as its line.
+
+    Args:
+        items (Iterable[Union[MergedWorkHistory, RejectedLine]]): The merged work
+            histories, see EmployeeMerger.merge.
+        payroll_calculator (PayrollCalculator): The calculator pricing the work histories.
+
+    Returns:
+        Iterator[Union[PaymentResult, RejectedLine]]: A result or a rejection per
+            employee, after the rejected lines.
+    """
+    calculate_payment = payroll_calculator.calculate_scheduled_payment
+    for item in items:
+        if isinstance(item, RejectedLine):
+            yield item
+            continue
+        work_history = item.work_history
+        try:
+            payment, schedule_version, schedule = calculate_payment(work_history)
+        except PRICING_ERRORS as error:
+            yield RejectedLine(item.source, item.line_number, work_history.name, error)
+            continue
+        yield PaymentResult(
+            item.source, item.line_number, work_history.name, payment, schedule_version, schedule
+        )
@@ -0,0 +1,272 @@
+"""
+This module contains the calculator of mixed payrolls, where the employees are
+paid on different payment schedules. The schedule of every work history is
+resolved by employee name or by a resolver function, so a mixed file is priced in
+a single pass.
+
+Schedules with identical periods share their compiled days, see
+ScheduleSnapshot.get_compiled, and the batch calculations stack the slot tables of
+every schedule in use into one table, so a mixed batch is priced in the same array
+operations as a single-schedule one.
+
+Usage:
+    payroll_calculator = MultiSchedulePayrollCalculator(
+        "default", schedule_map={"RENE": "night", "ASTRID": "default"}
+    )
+    payment = payroll_calculator.calculate_payment(work_history)
+"""
+import json
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .calculator import PayrollCalculator
+from .compiled import CompiledSchedule
+from .constants import DAYS_OF_WEEK
+from .data_classes import ColumnarWorkHistory, PaymentBreakdown, WorkHistory
+from . import vectorized
+
+# The stacked slot table is rebuilt from scratch once it holds this many tables,
+# which only happens when hot reloading keeps installing different schedules.
+MAX_STACKED_TABLES = 64
+
+Resolver = Callable[[Union[WorkHistory, ColumnarWorkHistory]], Optional[str]]
+
+
+class MultiSchedulePayrollCalculator:
+    """
+    This class calculates the payments of employees on different payment schedules.
+
+    It offers the pricing methods of PayrollCalculator, each taking an optional
+    schedule name that overrides the resolved one, and keeps one warm
+    PayrollCalculator per schedule.
+
+    Args:
+        default_schedule (str): The payment schedule of the employees the map or the
+            resolver leaves unassigned.
+        schedule_map (Optional[Dict[str, str]]): The payment schedule name by
+            employee name.
+        resolver (Optional[Callable]): Returns the payment schedule name of a work
+            history, or None for the default schedule. Replaces the schedule map.
+        round_slot_hours (bool): The pricing mode, see PayrollCalculator.
+        cache_size (int): The shift cache size of every schedule, see PayrollCalculator.
+        hot_reload (bool): Whether the schedules follow the configuration versions,
+            see PayrollCalculator.
+    """
+
+    def __init__(
+        self,
+        default_schedule: str = "default",
+        schedule_map: Optional[Dict[str, str]] = None,
+        resolver: Optional[Resolver] = None,
+        round_slot_hours: bool = True,
+        cache_size: int = 0,
+        hot_reload: bool = False,
+    ):
+        self.default_schedule = default_schedule
+        self.schedule_map = schedule_map or {}
+        self.resolver = resolver
+        self.round_slot_hours = round_slot_hours
+        self.cache_size = cache_size
+        self.hot_reload = hot_reload
+        self._calculators: Dict[str, PayrollCalculator] = {}
+        self._table_positions: Dict[Tuple, int] = {}
+        self._table_schedules: List[CompiledSchedule] = []
+        self._slot_table = None
+        self.get_calculator(default_schedule)
+
+    def resolve(self, work_history: Union[WorkHistory, ColumnarWorkHistory]) -> str:
+        """
+        Returns the payment schedule name of a work history.
+        """
+        if self.resolver is not None:
+            schedule_name = self.resolver(work_history)
+        else:
+            schedule_name = self.schedule_map.get(work_history.name)
+        return schedule_name or self.default_schedule
+
+    def get_calculator(self, schedule_name: str) -> PayrollCalculator:
+        """
+        Returns the warm calculator of a payment schedule, creating it on first use.
+
+        Raises:
+            PaymentScheduleNotFound: If the payment schedule is not configured.
+        """
+        calculator = self._calculators.get(schedule_name)
+        if calculator is None:
+            calculator = PayrollCalculator(
+                schedule_name, self.round_slot_hours, self.cache_size, self.hot_reload
+            )
+            self._calculators[schedule_name] = calculator
+        return calculator
+
+    def _get_calculator_for(
+        self,
+        work_history: Union[WorkHistory, ColumnarWorkHistory],
+        schedule_name: Optional[str],
+    ) -> PayrollCalculator:
+        """
+        Returns the calculator of the given or the resolved payment schedule.
+        """
+        return self.get_calculator(schedule_name or self.resolve(work_history))
+
+    def calculate_payment(
+        self,
+        work_history: Union[WorkHistory, ColumnarWorkHistory],
+        schedule_name: Optional[str] = None,
+    ) -> float:
+        """
+        Calculates the payment for an employee, see PayrollCalculator.calculate_payment.
+
+        Raises:
+            PaymentScheduleNotFound: If the payment schedule is not configured.
+            ValueError: If a work day falls on a day without payment configuration.
+        """
+        return self._get_calculator_for(work_history, schedule_name).calculate_payment(
+            work_history
+        )
+
+    def calculate_versioned_payment(
+        self,
+        work_history: Union[WorkHistory, ColumnarWorkHistory],
+        schedule_name: Optional[str] = None,
+    ) -> Tuple[float, int]:
+        """
+        Calculates the payment for an employee together with the configuration
+        version, see PayrollCalculator.calculate_versioned_payment.
+        """
+        calculator = self._get_calculator_for(work_history, schedule_name)
+        return calculator.calculate_versioned_payment(work_history)
+
+    def calculate_scheduled_payment(
+        self,
+        work_history: Union[WorkHistory, ColumnarWorkHistory],
+        schedule_name: Optional[str] = None,
+    ) -> Tuple[float, int, str]:
+        """
+        Calculates the payment for an employee together with the configuration
+        version and the payment schedule name, see
+        PayrollCalculator.calculate_scheduled_payment.
+        """
+        calculator = self._get_calculator_for(work_history, schedule_name)
+        return calculator.calculate_scheduled_payment(work_history)
+
+    def calculate_breakdown(
+        self,
+        work_history: Union[WorkHistory, ColumnarWorkHistory],
+        schedule_name: Optional[str] = None,
+    ) -> PaymentBreakdown:
+        """
+        Calculates the payment for an employee itemized by the slots of their payment
+        schedule, see PayrollCalculator.calculate_breakdown.
+        """
+        calculator = self._get_calculator_for(work_history, schedule_name)
+        return calculator.calculate_breakdown(work_history)
+
+    def _get_table_position(self, schedule_name: str) -> int:
+        """
+        Returns the position of the slot table of a payment schedule in the stacked
+        slot table, adding it when no schedule with the same table was priced yet.
+        """
+        calculator = self.get_calculator(schedule_name)
+        compiled_schedule = calculator._get_compiled_schedule()  # pylint: disable=protected-access
+        position = self._table_positions.get(compiled_schedule.table_key)
+        if position is None:
+            position = len(self._table_schedules)
+            self._table_positions[compiled_schedule.table_key] = position
+            self._table_schedules.append(compiled_schedule)
+            self._slot_table = None
+        return position
+
+    def calculate_payments_batch(
+        self,
+        work_histories: Sequence[Union[WorkHistory, ColumnarWorkHistory]],
+        schedule_names: Optional[Sequence[str]] = None,
+    ):
+        """
+        Calculates the payments for many employees on any mix of payment schedules
+        at once using NumPy.
+
+        The shifts of every schedule are moved to the rows of its slot table in the
+        stacked slot table, so the whole batch is priced in one pass. The results are
+        equal to calling calculate_payment for every work history.
+
+        Args:
+            work_histories (Sequence[Union[WorkHistory, ColumnarWorkHistory]]): The
+                work histories of the employees.
+            schedule_names (Optional[Sequence[str]]): The payment schedule name of
+                every work history, resolved by default.
+
+        Raises:
+            ImportError: If numpy is not installed.
+            PaymentScheduleNotFound: If a payment schedule is not configured.
+            ValueError: If a work day falls on a day without payment configuration.
+
+        Returns:
+            ndarray: The payment of every employee, in the order of the work histories.
+        """
+        numpy = vectorized.require_numpy()
+        if schedule_names is None:
+            schedule_names = [self.resolve(work_history) for work_history in work_histories]
+        distinct_names = set(schedule_names)
+        if len(self._table_schedules) + len(distinct_names) > MAX_STACKED_TABLES:
+            self._table_positions.clear()
+            self._table_schedules.clear()
+        positions = {
+            schedule_name: self._get_table_position(schedule_name)
+            for schedule_name in distinct_names
+        }
+        table_positions = numpy.fromiter(
+            (positions[schedule_name] for schedule_name in schedule_names),
+            dtype=numpy.intp,
+            count=len(work_histories),
+        )
+        employees, days, starts, ends = vectorized.flatten_work_histories(work_histories)
+        days = days + table_positions[employees] * len(DAYS_OF_WEEK)
+        if self._slot_table is None:
+            self._slot_table = vectorized.SlotTable(self._table_schedules)
+        return vectorized.calculate_payments(
+            self._slot_table, employees, days, starts, ends, employee_count=len(work_histories)
+        )
+
+    @property
+    def calculators(self) -> Dict[str, PayrollCalculator]:
+        """
+        The calculators created so far, by payment schedule name.
+        """
+        return dict(self._calculators)
+
+    def __str__(self):
+        return str(self.__dict__)
+
+
+def load_schedule_map(path: str) -> Dict[str, str]:
+    """
+    Reads a JSON object mapping employee names to payment schedule names.
+
+    Raises:
+        ValueError: If the file is not such a JSON object.
+    """
+    with open(path, encoding="utf-8") as file:
+        schedule_map = json.load(file)
+    if not isinstance(schedule_map, dict) or not all(
+        isinstance(value, str) for value in schedule_map.values()
+    ):
+        raise ValueError(f"{path} must map employee names to schedule names")
+    return schedule_map
+
+
+def create_calculator(
+    schedule_name: str, schedule_map: Optional[Dict[str, str]] = None, **options
+) -> Union[PayrollCalculator, MultiSchedulePayrollCalculator]:
+    """
+    Creates a single schedule calculator, or a multi-schedule calculator when a
+    schedule map is given, with schedule_name as its default schedule.
+
+    Args:
+        schedule_name (str): The payment schedule name.
+        schedule_map (Optional[Dict[str, str]]): The payment schedule name by
+            employee name.
+        **options: The other arguments of the calculators.
+    """
+    if schedule_map is None:
+        return PayrollCalculator(schedule_name, **options)
+    return MultiSchedulePayrollCalculator(schedule_name, schedule_map, **options)
@@ -0,0 +1,204 @@
+"""
+This module contains the multi-process batch mode. Timesheet files are split into
+byte ranges aligned to line boundaries, the ranges are priced by a pool of worker
+processes and the results are written back in input order. Every worker maps each
+file once and parses its ranges straight from the mapping, see MappedFile. With a
+summary, every worker keeps a partial PayrollSummary that is merged with the
+results of each range.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+
+from . import instrumentation
+from .batch import write_results
+from .calculator import PayrollCalculator
+from .data_classes import PaymentResult, RejectedLine
+from .multi_schedule import MultiSchedulePayrollCalculator, create_calculator
+from .parser import InputParser
+from .reader import MappedFile, price_mapped_lines
+from .summary import PayrollSummary, SummarizingCalculator
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+_input_parser: Optional[InputParser] = None
+_payroll_calculator: Optional[
+    Union[PayrollCalculator, MultiSchedulePayrollCalculator, SummarizingCalculator]
+] = None
+_summary: Optional[PayrollSummary] = None
+_mapped_files: Dict[str, MappedFile] = {}
+
+
+def split_ranges(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, int]]:
+    """
+    Splits a file into byte ranges of about chunk_size bytes ending on a newline.
+
+    Args:
+        path (str): The path of the file to split.
+        chunk_size (int): The minimum size of every range but the last one.
+
+    Returns:
+        Iterator[Tuple[int, int]]: The start and end offsets of every range.
+    """
+    with MappedFile(path) as mapped_file:
+        yield from mapped_file.split_ranges(chunk_size)
+
+
+def _init_worker(
+    calculator_options: dict,
+    parser_options: dict,
+    stats: bool = False,
+    summary_options: Optional[dict] = None,
+):
+    """
+    Builds the parser, the calculator and the partial summary once per worker process.
+    """
+    global _input_parser, _payroll_calculator, _summary  # pylint: disable=global-statement
+    if stats:
+        instrumentation.enable()
+    _input_parser = InputParser(**parser_options)
+    _payroll_calculator = create_calculator(**calculator_options)
+    if summary_options is not None:
+        _summary = PayrollSummary(**summary_options)
+        _payroll_calculator = SummarizingCalculator(_payroll_calculator, _summary)
+
+
+def _price_range(
+    path: str, start: int, end: int
+) -> Tuple[int, List[Union[PaymentResult, RejectedLine]], Optional[dict], Optional[dict]]:
+    """
+    Prices the lines of a byte range in a worker process.
+
+    Args:
+        path (str): The path of the file.
+        start (int): The offset of the first byte of the range.
+        end (int): The offset following the last byte of the range.
+
+    Returns:
+        Tuple[int, List[Union[PaymentResult, RejectedLine]], Optional[dict],
+            Optional[dict]]: The number of lines in the range, the results numbered
+            from the start of the range, and the instrumentation snapshot and the
+            summary of the range when enabled.
+    """
+    mapped_file = _mapped_files.get(path)
+    if mapped_file is None:
+        mapped_file = _mapped_files[path] = MappedFile(path)
+    results = list(
+        price_mapped_lines(mapped_file, _input_parser, _payroll_calculator, start, end)
+    )
+    stats = None
+    if instrumentation.is_enabled():
+        stats = instrumentation.snapshot()
+        instrumentation.reset()
+    summary = None
+    if _summary is not None:
+        summary = _summary.to_dict()
+        _summary.clear()
+    return mapped_file.count_lines(start, end), results, stats, summary
+
+
+def price_files_parallel(
+    sources: Iterable[str],
+    calculator_options: Optional[dict] = None,
+    parser_options: Optional[dict] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    summary: Optional[PayrollSummary] = None,
+) -> Iterator[Union[PaymentResult, RejectedLine]]:
+    """
+    Prices the lines of the files with a pool of worker processes.
+
+    At most two ranges per worker are in flight at any time, so memory usage is
+    bounded by the chunk size rather than by the size of the files. When the
+    instrumentation is enabled, the worker statistics are merged into this process,
+    and so are the partial summaries of the workers when a summary is given.
+
+    Args:
+        sources (Iterable[str]): The paths of the files to price.
+        calculator_options (Optional[dict]): The create_calculator arguments of the
+            workers, the default schedule by default.
+        parser_options (Optional[dict]): The InputParser arguments of the workers,
+            the fast parse mode by default.
+        workers (Optional[int]): The number of worker processes, the CPU count by default.
+        chunk_size (int): The approximate size in bytes of the ranges sent to the workers.
+        summary (Optional[PayrollSummary]): The summary receiving every payment.
+
+    Returns:
+        Iterator[Union[PaymentResult, RejectedLine]]: A result or a rejection per line,
+            in input order.
+    """
+    workers = workers or os.cpu_count() or 1
+    calculator_options = calculator_options or {"schedule_name": "default"}
+    parser_options = parser_options or {"fast": True}
+    summary_options = None
+    if summary is not None:
+        summary_options = {
+            "top_n": summary.top_n,
+            "bucket_width": summary.bucket_width,
+            "bucket_count": summary.bucket_count,
+        }
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(
+            calculator_options,
+            parser_options,
+            instrumentation.is_enabled(),
+            summary_options,
+        ),
+    ) as executor:
+        ranges = (
+            (file_index, source, start, end)
+            for file_index, source in enumerate(sources)
+            for start, end in split_ranges(source, chunk_size)
+        )
+        pending = deque()
+        line_offsets = {}
+        for file_index, source, start, end in ranges:
+            future = executor.submit(_price_range, source, start, end)
+            pending.append((file_index, future))
+            if len(pending) >= 2 * workers:
+                yield from _merge(*pending.popleft(), line_offsets, summary)
+        while pending:
+            yield from _merge(*pending.popleft(), line_offsets, summary)
+
+
+def _merge(
+    file_index, future, line_offsets, summary=None
+) -> Iterator[Union[PaymentResult, RejectedLine]]:
+    """
+    Renumbers the results of a range relative to the start of its file.
+    """
+    line_count, results, stats, range_summary = future.result()
+    if stats is not None:
+        instrumentation.merge(stats)
+    if range_summary is not None:
+        summary.merge(range_summary)
+    offset = line_offsets.get(file_index, 0)
+    for result in results:
+        result.line_number += offset
+        yield result
+    line_offsets[file_index] = offset + line_count
+
+
+def run_parallel(
+    sources: Iterable[str],
+    output: TextIO,
+    rejects: Optional[TextIO] = None,
+    calculator_options: Optional[dict] = None,
+    parser_options: Optional[dict] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Tuple[int, int]:
+    """
+    Prices the files with a pool of worker processes and writes the results in
+    input order, see price_files_parallel and write_results.
+
+    Returns:
+        Tuple[int, int]: The number of priced and rejected lines.
+    """
+    items = price_files_parallel(
+        sources, calculator_options, parser_options, workers, chunk_size
+    )
+    return write_results(items, output, rejects)
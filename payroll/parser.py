@@ -4,10 +4,12 @@ the input string containing work hostories for employees.
 """
 
 import re
-from datetime import datetime
+from datetime import date, datetime, time
+from typing import Iterator, Optional, Tuple, Union
 
-from .data_classes import WorkHistory, WorkDay
-from .constants import DAYS_OF_WEEK
+from .cache import LRUCache
+from .data_classes import ColumnarWorkHistory, WorkHistory, WorkDay
+from .constants import DAY_INDEX, DAYS_OF_WEEK, MINUTES_PER_DAY
 from .errors import (
     InvalidInputFormatError,
     InvalidDayIntervalFormatError,
@@ -15,6 +17,16 @@ from .errors import (
     InvalidTimeIntervalError,
 )
 
+DAY_INTERVAL_PATTERN = re.compile(r"^([A-Z]{2})(\d{2}:\d{2})-(\d{2}:\d{2})$")
+FAST_DAY_INTERVAL_PATTERN = re.compile(r"([A-Z]{2})(\d{2}):(\d{2})-(\d{2}):(\d{2})$")
+DATED_DAY_INTERVAL_PATTERN = re.compile(
+    r"(\d{4}-\d{2}-\d{2})T(\d{2}):(\d{2})-(\d{2}):(\d{2})$"
+)
+BYTES_NAME_PATTERN = re.compile(rb"([^=]+)=")
+BYTES_DAY_INTERVAL_PATTERN = re.compile(rb"([A-Z]{2})(\d{2}):(\d{2})-(\d{2}):(\d{2})(,|$)")
+BYTES_DAY_INDEX = {day.encode("ascii"): index for day, index in DAY_INDEX.items()}
+TIMES_BY_MINUTE = tuple(time(minute // 60, minute % 60) for minute in range(MINUTES_PER_DAY))
+
 
 class InputParser:
     """
@@ -22,6 +34,20 @@ class InputParser:
     their work data,and returns a WorkHistory object containing their
     name and a list of DaySchedule objects representing their work schedule.
 
+    Besides weekday intervals such as MO10:00-12:00, dated intervals such as
+    2026-10-05T10:00-12:00 are accepted; their WorkDay has the date and the day of
+    the week of the date. Columnar work histories cannot hold dated intervals.
+
+    Args:
+        fast (bool): Whether to use the fast parse mode, which validates the times
+            as integers instead of going through datetime. Both modes return the
+            same WorkHistory and raise the same error classes.
+        columnar (bool): Whether to return ColumnarWorkHistory objects, which store
+            the work days in compact arrays. Implies the fast parse mode.
+        cache_size (int): The number of distinct input lines whose work history is
+            memoized in a bounded LRU cache, so repeated lines skip parsing.
+            Disabled by default.
+
     Raises:
         PayrollError: If the input string is not in the correct format,
             or if the day abbreviation or time format in the schedule is invalid.
@@ -31,6 +57,11 @@ class InputParser:
         and a list of DaySchedule objects representing their work schedule.
     """
 
+    def __init__(self, fast: bool = False, columnar: bool = False, cache_size: int = 0):
+        self.fast = fast or columnar
+        self.columnar = columnar
+        self.line_cache = LRUCache(cache_size) if cache_size else None
+
     def parse(self, input_str: str) -> WorkHistory:
         """
         Parses the input string and returns a WorkHistory object containing
@@ -44,11 +75,139 @@ class InputParser:
         Raises:
             ValueError: If the input string is not in the correct format,
                 or if the day abbreviation or time format in the schedule is invalid.
+            UnicodeDecodeError: If the input string was read with
+                errors="surrogateescape" from bytes that are not valid UTF-8, like
+                parse_bytes.
 
         Returns:
             WorkHistory: A WorkHistory object containing the employee's name
                 and a list of DaySchedule objects representing their work schedule.
         """
+        if not input_str.isascii():
+            # Raises the error a strict decoding of the original bytes would have.
+            input_str.encode("utf-8", "surrogateescape").decode("utf-8")
+        if self.line_cache is not None:
+            return self._parse_cached(input_str)
+        if self.fast:
+            return self._parse_fast(input_str)
+        return self._parse_default(input_str)
+
+    def parse_bytes(
+        self, buffer, start: int = 0, end: Optional[int] = None
+    ) -> Union[WorkHistory, ColumnarWorkHistory]:
+        """
+        Parses a line held in a bytes-like buffer, e.g. a memory-mapped file, without
+        copying or decoding it; only the employee name is decoded. The result and
+        the errors are the same as parse with the fast parse mode.
+
+        Args:
+            buffer (bytes-like): The buffer holding the line, a bytes, bytearray,
+                memoryview or mmap object.
+            start (int): The offset of the first byte of the line.
+            end (Optional[int]): The offset following the last byte of the line,
+                without its line terminator, the end of the buffer by default.
+
+        Raises:
+            PayrollError: If the line is not in the expected format.
+
+        Returns:
+            Union[WorkHistory, ColumnarWorkHistory]: The work history of the line.
+        """
+        if end is None:
+            end = len(buffer)
+        if self.line_cache is not None:
+            return self._parse_cached(bytes(buffer[start:end]).decode("utf-8"))
+        work_history = self._parse_bytes(buffer, start, end)
+        if work_history is None:
+            # Malformed lines are rare: parse the decoded text to raise the same
+            # error as the text parser.
+            return self._parse_fast(bytes(buffer[start:end]).decode("utf-8"))
+        return work_history
+
+    def _parse_bytes(
+        self, buffer, start: int, end: int
+    ) -> Optional[Union[WorkHistory, ColumnarWorkHistory]]:
+        """
+        Parses a well-formed line of a buffer, see parse_bytes.
+
+        Returns:
+            Optional[Union[WorkHistory, ColumnarWorkHistory]]: The work history, None
+                when the line is malformed.
+        """
+        match = BYTES_NAME_PATTERN.match(buffer, start, end)
+        if match is None:
+            return None
+        name = match.group(1).decode("utf-8")
+        if self.columnar:
+            work_history = ColumnarWorkHistory(name=name)
+            append = work_history.append
+        else:
+            work_history = WorkHistory(name=name, schedule=[])
+            schedule = work_history.schedule
+
+        match_interval = BYTES_DAY_INTERVAL_PATTERN.match
+        position = match.end()
+        separator = b","
+        while separator:
+            match = match_interval(buffer, position, end)
+            if match is None:
+                return None
+            day, start_hour, start_minute, end_hour, end_minute, separator = match.groups()
+            day_index = BYTES_DAY_INDEX.get(day)
+            start_hours, end_hours = int(start_hour), int(end_hour)
+            start_minutes, end_minutes = int(start_minute), int(end_minute)
+            if (
+                day_index is None
+                or start_hours > 23
+                or end_hours > 23
+                or start_minutes > 59
+                or end_minutes > 59
+            ):
+                return None
+            work_start = start_hours * 60 + start_minutes
+            work_end = end_hours * 60 + end_minutes
+            if work_end <= work_start:
+                return None
+            if self.columnar:
+                append(day_index, work_start, work_end)
+            else:
+                schedule.append(
+                    WorkDay(
+                        day=DAYS_OF_WEEK[day_index],
+                        start=TIMES_BY_MINUTE[work_start],
+                        end=TIMES_BY_MINUTE[work_end],
+                    )
+                )
+            position = match.end()
+        if position != end:
+            return None
+        return work_history
+
+    def _parse_cached(self, input_str: str) -> Union[WorkHistory, ColumnarWorkHistory]:
+        """
+        Parses the input string through the line cache. Every call returns a new
+        work history so callers may modify it without affecting the cache.
+        """
+        work_history = self.line_cache.get(input_str, None)
+        if work_history is None:
+            if self.fast:
+                work_history = self._parse_fast(input_str)
+            else:
+                work_history = self._parse_default(input_str)
+            self.line_cache.put(input_str, work_history)
+        if isinstance(work_history, ColumnarWorkHistory):
+            return ColumnarWorkHistory(
+                name=work_history.name,
+                days=work_history.days[:],
+                starts=work_history.starts[:],
+                ends=work_history.ends[:],
+            )
+        return WorkHistory(name=work_history.name, schedule=list(work_history.schedule))
+
+    def _parse_default(self, input_str: str) -> WorkHistory:
+        """
+        Default parse mode of parse, see InputParser.
+        """
         username, _, input_str = input_str.partition("=")
 
         if not username or not input_str:
@@ -59,17 +218,22 @@ class InputParser:
         schedule = []
 
         for day_interval_str in day_intervals:
-            match = re.match(
-                r"^([A-Z]{2})(\d{2}:\d{2})-(\d{2}:\d{2})$", day_interval_str
-            )
+            match = DAY_INTERVAL_PATTERN.match(day_interval_str)
+            work_date = None
 
             if not match:
-                raise InvalidDayIntervalFormatError(
-                    f"Invalid day interval format: {day_interval_str}. "
-                    f"Day intervals must be in the format DAY:START-END"
-                )
-
-            day, start_time_str, end_time_str = match.groups()
+                dated_match = DATED_DAY_INTERVAL_PATTERN.match(day_interval_str)
+                if not dated_match:
+                    raise InvalidDayIntervalFormatError(
+                        f"Invalid day interval format: {day_interval_str}. "
+                        f"Day intervals must be in the format DAY:START-END"
+                    )
+                work_date = _to_date(dated_match.group(1), day_interval_str)
+                day = DAYS_OF_WEEK[work_date.weekday()]
+                start_time_str = ":".join(dated_match.group(2, 3))
+                end_time_str = ":".join(dated_match.group(4, 5))
+            else:
+                day, start_time_str, end_time_str = match.groups()
 
             if day not in DAYS_OF_WEEK:
                 raise InvalidDayAbbreviationError(f"Invalid day abbreviation: {day}")
@@ -85,9 +249,115 @@ class InputParser:
                     f"End time must be after start time for day interval {day_interval_str}"
                 )
 
-            schedule.append(WorkDay(day=day, start=start_time, end=end_time))
+            schedule.append(WorkDay(day=day, start=start_time, end=end_time, date=work_date))
 
         return WorkHistory(name=username, schedule=schedule)
 
+    def _parse_fast(self, input_str: str) -> Union[WorkHistory, ColumnarWorkHistory]:
+        """
+        Fast parse mode of parse, see InputParser.
+
+        The times are validated as integers and compared as minutes since midnight,
+        and the WorkDay days and times are shared instances taken from precomputed
+        tables. In columnar mode the work days are stored in arrays instead.
+        """
+        username, _, input_str = input_str.partition("=")
+
+        if not username or not input_str:
+            raise InvalidInputFormatError(f"Invalid input format: {input_str}")
+
+        if self.columnar:
+            work_history = ColumnarWorkHistory(name=username)
+            for day_index, start, end, work_date in self._iter_day_intervals(input_str):
+                if work_date is not None:
+                    raise InvalidDayIntervalFormatError(
+                        f"Invalid day interval format: {input_str}. "
+                        f"Columnar work histories cannot hold dated day intervals"
+                    )
+                work_history.append(day_index, start, end)
+            return work_history
+
+        schedule = [
+            WorkDay(
+                day=DAYS_OF_WEEK[day_index],
+                start=TIMES_BY_MINUTE[start],
+                end=TIMES_BY_MINUTE[end],
+                date=work_date,
+            )
+            for day_index, start, end, work_date in self._iter_day_intervals(input_str)
+        ]
+        return WorkHistory(name=username, schedule=schedule)
+
+    @staticmethod
+    def _iter_day_intervals(
+        input_str: str,
+    ) -> Iterator[Tuple[int, int, int, Optional[date]]]:
+        """
+        Validates the comma separated day intervals of the fast parse mode.
+
+        Returns:
+            Iterator[Tuple[int, int, int, Optional[date]]]: The DAYS_OF_WEEK index,
+                start and end minutes and date, None for weekday intervals, of every
+                day interval.
+        """
+        match_interval = FAST_DAY_INTERVAL_PATTERN.match
+        for day_interval_str in input_str.split(","):
+            match = match_interval(day_interval_str)
+            work_date = None
+
+            if match:
+                day, start_hour, start_minute, end_hour, end_minute = match.groups()
+                day_index = DAY_INDEX.get(day)
+                if day_index is None:
+                    raise InvalidDayAbbreviationError(f"Invalid day abbreviation: {day}")
+            else:
+                match = DATED_DAY_INTERVAL_PATTERN.match(day_interval_str)
+                if not match:
+                    raise InvalidDayIntervalFormatError(
+                        f"Invalid day interval format: {day_interval_str}. "
+                        f"Day intervals must be in the format DAY:START-END"
+                    )
+                date_str, start_hour, start_minute, end_hour, end_minute = match.groups()
+                work_date = _to_date(date_str, day_interval_str)
+                day_index = work_date.weekday()
+
+            start = _to_minutes(start_hour, start_minute)
+            end = _to_minutes(end_hour, end_minute)
+
+            if end <= start:
+                raise InvalidTimeIntervalError(
+                    f"End time must be after start time for day interval {day_interval_str}"
+                )
+
+            yield day_index, start, end, work_date
+
     def __str__(self) -> str:
         return str(self.__dict__)
+
+
+def _to_date(date_str: str, day_interval_str: str) -> date:
+    """
+    Converts the yyyy-mm-dd date of a dated day interval.
+
+    Raises:
+        InvalidDayIntervalFormatError: If the date does not exist.
+    """
+    try:
+        return date.fromisoformat(date_str)
+    except ValueError as error:
+        raise InvalidDayIntervalFormatError(
+            f"Invalid day interval format: {day_interval_str}. {error}"
+        ) from error
+
+
+def _to_minutes(hour: str, minute: str) -> int:
+    """
+    Converts validated hh and mm digits into minutes since midnight.
+
+    Raises:
+        ValueError: If the time is out of range, with the same message strptime uses.
+    """
+    hours, minutes = int(hour), int(minute)
+    if hours > 23 or minutes > 59:
+        raise ValueError(f"time data '{hour}:{minute}' does not match format '%H:%M'")
+    return hours * 60 + minutes
@@ -0,0 +1,202 @@
+"""
+This module contains the date index of a pay period. The calendar of a payment
+schedule, i.e. its effective-dated revisions and its holidays, is resolved once
+per date of the period, so pricing a dated shift is one dictionary lookup followed
+by the usual slot pricing of the compiled day.
+
+Usage:
+    pay_period = payroll_calculator.get_pay_period(date(2026, 10, 1), date(2026, 10, 15))
+    payment = pay_period.calculate_payment(input_parser.parse("RENE=2026-10-05T10:00-12:00"))
+"""
+from bisect import bisect_right
+from datetime import date, timedelta
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from .compiled import CompiledDay, CompiledSchedule
+from .data_classes import PaymentSchedule, WorkDay, WorkHistory
+
+
+class ScheduleCalendar:
+    """
+    The compiled day priced on any date by a payment schedule.
+
+    Every revision of the payment schedule and its holiday time slots are compiled
+    once. A revision applies from its effective_from date until the next revision;
+    a revision without holiday time slots keeps those of the previous one. Dates
+    before the effective_from date of the schedule, and days of the week without
+    time slots, have no compiled day. The compiled day of every date is memoized
+    the first time it is resolved.
+
+    Args:
+        payment_schedule (PaymentSchedule): The payment schedule with its revisions.
+        holidays (FrozenSet[date]): The holidays priced with the holiday time slots.
+        round_slot_hours (bool): The pricing mode, see PayrollCalculator.
+        version (int): The configuration version the schedule was compiled from.
+        compiled_schedule (Optional[CompiledSchedule]): The schedule already compiled
+            without its revisions, reused for the dates of its first revision.
+
+    Raises:
+        InvalidScheduleError: If the time slots of a revision overlap.
+    """
+
+    def __init__(
+        self,
+        payment_schedule: PaymentSchedule,
+        holidays: FrozenSet[date] = frozenset(),
+        round_slot_hours: bool = True,
+        version: int = 0,
+        compiled_schedule: Optional[CompiledSchedule] = None,
+    ):
+        self.name = payment_schedule.name
+        self.holidays = holidays
+        self.version = version
+        self._effective_dates: List[date] = []
+        self._revisions: List[Tuple[CompiledSchedule, Optional[CompiledDay]]] = []
+        holiday_day = None
+        for revision in (payment_schedule, *payment_schedule.revisions):
+            if revision.holiday_time_slots:
+                holiday_day = CompiledDay(revision.holiday_time_slots, round_slot_hours)
+            if revision is payment_schedule and compiled_schedule is not None:
+                compiled_revision = compiled_schedule
+            else:
+                compiled_revision = CompiledSchedule(revision, round_slot_hours, version)
+            self._effective_dates.append(revision.effective_from or date.min)
+            self._revisions.append((compiled_revision, holiday_day))
+        self._days: Dict[date, Optional[CompiledDay]] = {}
+
+    def resolve(self, work_date: date) -> Optional[CompiledDay]:
+        """
+        Returns the compiled time slots priced on a date, None when the date has no
+        payment configuration.
+        """
+        try:
+            return self._days[work_date]
+        except KeyError:
+            pass
+        position = bisect_right(self._effective_dates, work_date) - 1
+        compiled_day = None
+        if position >= 0:
+            compiled_schedule, holiday_day = self._revisions[position]
+            if holiday_day is not None and work_date in self.holidays:
+                compiled_day = holiday_day
+            else:
+                compiled_day = compiled_schedule.by_index[work_date.weekday()]
+        self._days[work_date] = compiled_day
+        return compiled_day
+
+    def get_day(self, work_date: date) -> CompiledDay:
+        """
+        Retrieves the compiled time slots priced on a date.
+
+        Raises:
+            ValueError: If the date has no payment configuration.
+        """
+        compiled_day = self.resolve(work_date)
+        if compiled_day is None:
+            raise ValueError(f"Failed to get payement configuration for {work_date}")
+        return compiled_day
+
+
+class PayPeriodIndex:
+    """
+    The compiled day priced on every date of a pay period, resolved once by a
+    ScheduleCalendar.
+
+    Args:
+        payment_schedule (PaymentSchedule): The payment schedule with its revisions.
+        start (date): The first date of the pay period.
+        end (date): The last date of the pay period.
+        holidays (FrozenSet[date]): The holidays priced with the holiday time slots.
+        round_slot_hours (bool): The pricing mode, see PayrollCalculator.
+        version (int): The configuration version the schedule was compiled from.
+
+    Raises:
+        ValueError: If the pay period ends before it starts.
+        InvalidScheduleError: If the time slots of a revision overlap.
+
+    Attributes:
+        days (Dict[date, Optional[CompiledDay]]): The compiled day of every date of
+            the pay period, None when the date has no payment configuration.
+    """
+
+    def __init__(
+        self,
+        payment_schedule: PaymentSchedule,
+        start: date,
+        end: date,
+        holidays: FrozenSet[date] = frozenset(),
+        round_slot_hours: bool = True,
+        version: int = 0,
+    ):
+        if end < start:
+            raise ValueError(f"Invalid pay period: {start} to {end}")
+        self.name = payment_schedule.name
+        self.start = start
+        self.end = end
+        self.version = version
+
+        calendar = ScheduleCalendar(payment_schedule, holidays, round_slot_hours, version)
+        self.days: Dict[date, Optional[CompiledDay]] = {}
+        day = start
+        while day <= end:
+            self.days[day] = calendar.resolve(day)
+            day += timedelta(days=1)
+
+    def get_day(self, work_date: date) -> CompiledDay:
+        """
+        Retrieves the compiled time slots priced on a date.
+
+        Raises:
+            ValueError: If the date is outside the pay period or has no payment
+                configuration.
+        """
+        compiled_day = self.days.get(work_date)
+        if compiled_day is None:
+            if work_date not in self.days:
+                raise ValueError(
+                    f"Date {work_date} is outside the pay period {self.start} to {self.end}"
+                )
+            raise ValueError(f"Failed to get payement configuration for {work_date}")
+        return compiled_day
+
+    def price_work_day(self, work_day: WorkDay) -> float:
+        """
+        Prices a dated work day.
+
+        Raises:
+            ValueError: If the work day has no date, or its date is outside the pay
+                period or has no payment configuration.
+        """
+        if work_day.date is None:
+            raise ValueError(f"Work day {work_day.day} has no date")
+        start, end = work_day.start, work_day.end
+        return self.get_day(work_day.date).price(
+            start.hour * 60 + start.minute, end.hour * 60 + end.minute
+        )
+
+    def calculate_payment(self, work_history: WorkHistory) -> float:
+        """
+        Calculates the payment for the dated work days of an employee.
+
+        Raises:
+            ValueError: If a work day has no date, or its date is outside the pay
+                period or has no payment configuration.
+
+        Returns:
+            float: The payment for the employee.
+        """
+        days = self.days
+        total_payment = 0.0
+        for work_day in work_history.schedule:
+            compiled_day = days.get(work_day.date)
+            if compiled_day is None:
+                total_payment += self.price_work_day(work_day)  # raises the matching ValueError
+                continue
+            start, end = work_day.start, work_day.end
+            total_payment += compiled_day.price(
+                start.hour * 60 + start.minute, end.hour * 60 + end.minute
+            )
+        return total_payment
+
+    def __len__(self) -> int:
+        return len(self.days)
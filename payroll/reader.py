@@ -0,0 +1,211 @@
+"""
+This module contains the memory-mapped reader of timesheet files. The file is
+mapped read-only and the lines are found by scanning the raw bytes for newlines,
+so the parser sees offsets into the mapping instead of decoded copies of the
+lines. The same reader splits the file into newline-aligned byte ranges for the
+worker processes, which map the file themselves and share the page cache instead
+of reading their range into memory.
+"""
+import mmap
+import re
+from typing import Iterable, Iterator, Optional, TextIO, Tuple, Union
+
+from .batch import PRICING_ERRORS, write_results
+from .calculator import PayrollCalculator
+from .data_classes import PaymentResult, RejectedLine
+from .parser import InputParser
+
+BLANK_LINE_PATTERN = re.compile(rb"\s*$")
+NEWLINE_PATTERN = re.compile(rb"\n")
+
+
+class MappedFile:
+    """
+    A read-only memory mapping of a timesheet file.
+
+    Args:
+        path (str): The path of the file.
+
+    Attributes:
+        path (str): The path of the file.
+        buffer (Union[mmap.mmap, bytes]): The mapping, an empty bytes object for an
+            empty file, which cannot be mapped.
+        size (int): The size of the file in bytes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            file.seek(0, 2)
+            self.size = file.tell()
+            if self.size:
+                self.buffer: Union[mmap.mmap, bytes] = mmap.mmap(
+                    file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            else:
+                self.buffer = b""
+
+    def split_ranges(self, chunk_size: int, start: int = 0) -> Iterator[Tuple[int, int]]:
+        """
+        Splits the file into byte ranges of about chunk_size bytes ending on a newline.
+
+        Args:
+            chunk_size (int): The minimum size of every range but the last one.
+            start (int): The offset of the first range, at a line start.
+
+        Returns:
+            Iterator[Tuple[int, int]]: The start and end offsets of every range.
+        """
+        if chunk_size < 1:
+            raise ValueError(f"Invalid chunk size: {chunk_size}")
+        find, size = self.buffer.find, self.size
+        while start < size:
+            end = start + chunk_size
+            if end < size:
+                # Searching from one byte early keeps a range that already ends on
+                # a newline from swallowing the following line.
+                newline = find(b"\n", end - 1)
+                end = size if newline == -1 else newline + 1
+            end = min(end, size)
+            yield start, end
+            start = end
+
+    def iter_lines(
+        self, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[Tuple[int, int, int]]:
+        """
+        Finds the non-blank lines of a byte range.
+
+        Args:
+            start (int): The offset of the first byte of the range, at a line start.
+            end (Optional[int]): The offset following the last byte of the range, the
+                end of the file by default.
+
+        Returns:
+            Iterator[Tuple[int, int, int]]: The 1-based line number within the range
+                and the start and end offsets of every line, without its line
+                terminator.
+        """
+        buffer = self.buffer
+        find, is_blank = buffer.find, BLANK_LINE_PATTERN.match
+        end = self.size if end is None else end
+        line_number = 0
+        while start < end:
+            line_number += 1
+            newline = find(b"\n", start, end)
+            next_start = end if newline == -1 else newline + 1
+            line_end = next_start if newline == -1 else newline
+            if line_end > start and buffer[line_end - 1] == 13:  # carriage return
+                line_end -= 1
+            if not is_blank(buffer, start, line_end):
+                yield line_number, start, line_end
+            start = next_start
+
+    def count_lines(self, start: int = 0, end: Optional[int] = None) -> int:
+        """
+        Counts the lines of a byte range, including the blank ones.
+        """
+        end = self.size if end is None else end
+        newlines = len(NEWLINE_PATTERN.findall(self.buffer, start, end))
+        if end > start and self.buffer[end - 1] != 10:  # last line without newline
+            newlines += 1
+        return newlines
+
+    def decode(self, start: int, end: int) -> str:
+        """
+        Returns a line of the file as text.
+        """
+        return bytes(self.buffer[start:end]).decode("utf-8", errors="replace")
+
+    def close(self):
+        """
+        Releases the mapping.
+        """
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self) -> "MappedFile":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def price_mapped_lines(
+    mapped_file: MappedFile,
+    input_parser: InputParser,
+    payroll_calculator: PayrollCalculator,
+    start: int = 0,
+    end: Optional[int] = None,
+) -> Iterator[Union[PaymentResult, RejectedLine]]:
+    """
+    Parses and prices every line of a byte range of a mapped file, see price_lines.
+
+    Args:
+        mapped_file (MappedFile): The mapped timesheet file.
+        input_parser (InputParser): The parser for the work histories.
+        payroll_calculator (PayrollCalculator): The calculator pricing the work histories.
+        start (int): The offset of the first byte of the range, at a line start.
+        end (Optional[int]): The offset following the last byte of the range.
+
+    Returns:
+        Iterator[Union[PaymentResult, RejectedLine]]: A result or a rejection per line,
+            numbered from the start of the range, in input order.
+    """
+    source, buffer = mapped_file.path, mapped_file.buffer
+    parse_bytes = input_parser.parse_bytes
+    calculate_payment = payroll_calculator.calculate_scheduled_payment
+    for line_number, line_start, line_end in mapped_file.iter_lines(start, end):
+        try:
+            work_history = parse_bytes(buffer, line_start, line_end)
+            payment, schedule_version, schedule = calculate_payment(work_history)
+        except PRICING_ERRORS as error:
+            yield RejectedLine(
+                source, line_number, mapped_file.decode(line_start, line_end), error
+            )
+            continue
+        yield PaymentResult(
+            source, line_number, work_history.name, payment, schedule_version, schedule
+        )
+
+
+def run_mapped_batch(
+    paths: Iterable[str],
+    input_parser: InputParser,
+    payroll_calculator: PayrollCalculator,
+    output: TextIO,
+    rejects: Optional[TextIO] = None,
+) -> Tuple[int, int]:
+    """
+    Prices every line of the files through memory mappings, see run_batch.
+
+    Args:
+        paths (Iterable[str]): The paths of the files to read.
+        input_parser (InputParser): The parser for the work histories.
+        payroll_calculator (PayrollCalculator): The calculator pricing the work histories.
+        output (TextIO): The stream receiving the payment results.
+        rejects (Optional[TextIO]): The stream receiving the rejected lines,
+            stderr by default.
+
+    Returns:
+        Tuple[int, int]: The number of priced and rejected lines.
+    """
+    items = price_mapped_files(paths, input_parser, payroll_calculator)
+    return write_results(items, output, rejects)
+
+
+def price_mapped_files(
+    paths: Iterable[str],
+    input_parser: InputParser,
+    payroll_calculator: PayrollCalculator,
+) -> Iterator[Union[PaymentResult, RejectedLine]]:
+    """
+    Parses and prices every line of the files through memory mappings.
+
+    Returns:
+        Iterator[Union[PaymentResult, RejectedLine]]: A result or a rejection per line,
+            in input order.
+    """
+    for path in paths:
+        with MappedFile(path) as mapped_file:
+            yield from price_mapped_lines(mapped_file, input_parser, payroll_calculator)
@@ -3,11 +3,663 @@ This module contains the payment schedule handler
 """
 import os
 import json
-from datetime import datetime, time
+import hashlib
+import itertools
+import logging
+import threading
+from datetime import date, datetime, time
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
 
-from .constants import DEFAULT_CONFIG_FILE
+from .compiled import CompiledDay, CompiledSchedule
+from .constants import DEFAULT_CONFIG_FILE, END_OF_DAY
 from .data_classes import PaymentSchedule, TimeSlot, Period
-from .errors import PaymentScheduleNotFound
+from .errors import InvalidScheduleError, PaymentScheduleNotFound, PayrollError
+
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), DEFAULT_CONFIG_FILE
+)
+CACHE_DIR_ENV = "PAYROLL_SCHEDULE_CACHE_DIR"
+# Part of the on-disk cache file name, bumped whenever the cached layout changes.
+CACHE_FORMAT = 3
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_time_slots(time_slots_json: List[dict]) -> List[TimeSlot]:
+    """
+    Converts the configuration of a list of time slots into TimeSlot dataclasses.
+    """
+    time_slots = []
+    for time_slot_json in time_slots_json:
+        start = datetime.strptime(time_slot_json.get("start"), "%H:%M").time()
+        end = datetime.strptime(time_slot_json.get("end"), "%H:%M").time()
+        end = END_OF_DAY if end == time.min else end
+        rate = time_slot_json.get("rate")
+        time_slots.append(TimeSlot(start=start, end=end, rate=rate))
+    return time_slots
+
+
+def _parse_date(date_str: Optional[str]) -> Optional[date]:
+    """
+    Converts an optional yyyy-mm-dd date of the configuration.
+    """
+    return date.fromisoformat(date_str) if date_str is not None else None
+
+
+def parse_schedule(schedule_name: str, schedule_json: dict) -> PaymentSchedule:
+    """
+    Converts the configuration of a payment schedule into a PaymentSchedule dataclass.
+
+    Besides its periods, a schedule may have an effective_from date, a
+    holiday_calendar name with the holiday_time_slots applied on its holidays, and
+    effective-dated revisions, each with an effective_from date, periods and
+    optionally holiday_time_slots.
+    """
+    periods = [
+        Period(
+            days=period_json.get("days"),
+            time_slots=_parse_time_slots(period_json.get("time_slots")),
+        )
+        for period_json in schedule_json.get("periods")
+    ]
+    revisions = [
+        parse_schedule(schedule_name, revision_json)
+        for revision_json in schedule_json.get("revisions", [])
+    ]
+    for revision in revisions:
+        if revision.effective_from is None:
+            raise InvalidScheduleError(
+                f"Schedule '{schedule_name}': every revision needs an effective_from date"
+            )
+
+    return PaymentSchedule(
+        name=schedule_name,
+        periods=periods,
+        effective_from=_parse_date(schedule_json.get("effective_from")),
+        holiday_calendar=schedule_json.get("holiday_calendar"),
+        holiday_time_slots=_parse_time_slots(schedule_json.get("holiday_time_slots", [])),
+        revisions=sorted(revisions, key=lambda revision: revision.effective_from),
+    )
+
+
+def _time_slots_to_json(time_slots: List[TimeSlot]) -> List[list]:
+    """
+    Converts time slots into the [start, end, rate] lists of the on-disk cache, the
+    times in ISO format.
+    """
+    return [[slot.start.isoformat(), slot.end.isoformat(), slot.rate] for slot in time_slots]
+
+
+def _time_slots_from_json(time_slots_json: List[list]) -> List[TimeSlot]:
+    """
+    Converts the time slots of the on-disk cache back into TimeSlot dataclasses.
+    """
+    return [
+        TimeSlot(start=time.fromisoformat(start), end=time.fromisoformat(end), rate=rate)
+        for start, end, rate in time_slots_json
+    ]
+
+
+def schedule_to_json(schedule: PaymentSchedule) -> dict:
+    """
+    Converts a parsed payment schedule into the plain JSON form of the on-disk
+    cache, which schedule_from_json reads back without parsing the times again.
+    """
+    return {
+        "name": schedule.name,
+        "periods": [
+            [period.days, _time_slots_to_json(period.time_slots)] for period in schedule.periods
+        ],
+        "effective_from": (
+            schedule.effective_from.isoformat() if schedule.effective_from else None
+        ),
+        "holiday_calendar": schedule.holiday_calendar,
+        "holiday_time_slots": _time_slots_to_json(schedule.holiday_time_slots),
+        "revisions": [schedule_to_json(revision) for revision in schedule.revisions],
+    }
+
+
+def schedule_from_json(schedule_json: dict) -> PaymentSchedule:
+    """
+    Converts the JSON form of schedule_to_json back into a PaymentSchedule.
+    """
+    return PaymentSchedule(
+        name=schedule_json["name"],
+        periods=[
+            Period(days=days, time_slots=_time_slots_from_json(time_slots))
+            for days, time_slots in schedule_json["periods"]
+        ],
+        effective_from=_parse_date(schedule_json["effective_from"]),
+        holiday_calendar=schedule_json["holiday_calendar"],
+        holiday_time_slots=_time_slots_from_json(schedule_json["holiday_time_slots"]),
+        revisions=[schedule_from_json(revision) for revision in schedule_json["revisions"]],
+    )
+
+
+class ScheduleSnapshot:
+    """
+    One loaded version of the configuration file. A snapshot is never replaced
+    in place: a new configuration produces a new snapshot, so code holding a
+    snapshot, or a schedule compiled from it, keeps a consistent version.
+
+    Attributes:
+        version (int): The registry version of the configuration.
+        config_hash (str): The SHA-256 hex digest of the configuration file.
+        config (Dict[str, dict]): The payment schedules section of the configuration.
+        schedules (Dict[str, PaymentSchedule]): The memoized parsed schedules.
+        compiled (Dict[Tuple[str, bool], CompiledSchedule]): The memoized compiled
+            schedules by name and pricing mode.
+        tables (Dict[Tuple, CompiledSchedule]): The first compiled schedule of every
+            table_key, whose compiled days the identical schedules share.
+        holiday_calendars (Dict[str, List[str]]): The holiday calendars section of the
+            configuration, the yyyy-mm-dd holidays by calendar name.
+        holidays (Dict[str, FrozenSet[date]]): The memoized parsed holiday calendars.
+    """
+
+    __slots__ = (
+        "version",
+        "config_hash",
+        "config",
+        "schedules",
+        "compiled",
+        "tables",
+        "holiday_calendars",
+        "holidays",
+    )
+
+    def __init__(
+        self,
+        version: int,
+        config_hash: str,
+        config: Dict[str, dict],
+        schedules: Dict[str, PaymentSchedule],
+        holiday_calendars: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.version = version
+        self.config_hash = config_hash
+        self.config = config
+        self.schedules = schedules
+        self.compiled: Dict[Tuple[str, bool], CompiledSchedule] = {}
+        self.tables: Dict[Tuple, CompiledSchedule] = {}
+        self.holiday_calendars = holiday_calendars or {}
+        self.holidays: Dict[str, FrozenSet[date]] = {}
+
+    def get_schedule(self, schedule_name: str) -> PaymentSchedule:
+        """
+        Retrieves a memoized payment schedule of this version.
+
+        Raises:
+            PaymentScheduleNotFound: If the payment schedule is not configured.
+        """
+        schedule = self.schedules.get(schedule_name)
+        if schedule is not None:
+            return schedule
+        schedule_json = self.config.get(schedule_name)
+        if not schedule_json:
+            raise PaymentScheduleNotFound(f"Schedule '{schedule_name}' not found")
+        schedule = parse_schedule(schedule_name, schedule_json)
+        self.schedules[schedule_name] = schedule
+        return schedule
+
+    def get_compiled(self, schedule_name: str, round_slot_hours: bool = True) -> CompiledSchedule:
+        """
+        Retrieves a memoized compiled payment schedule of this version. Schedules
+        with identical periods share their compiled days, see CompiledSchedule.table_key.
+
+        Raises:
+            PaymentScheduleNotFound: If the payment schedule is not configured.
+        """
+        key = (schedule_name, round_slot_hours)
+        compiled = self.compiled.get(key)
+        if compiled is None:
+            compiled = CompiledSchedule(
+                self.get_schedule(schedule_name), round_slot_hours, version=self.version
+            )
+            shared = self.tables.setdefault(compiled.table_key, compiled)
+            if shared is not compiled:
+                compiled.share_tables(shared)
+            self.compiled[key] = compiled
+        return compiled
+
+    def get_holidays(self, calendar_name: str) -> FrozenSet[date]:
+        """
+        Retrieves the memoized holidays of a holiday calendar of this version.
+
+        Raises:
+            InvalidScheduleError: If the holiday calendar is not configured or has an
+                invalid date.
+        """
+        holidays = self.holidays.get(calendar_name)
+        if holidays is not None:
+            return holidays
+        dates = self.holiday_calendars.get(calendar_name)
+        if dates is None:
+            raise InvalidScheduleError(f"Holiday calendar '{calendar_name}' not found")
+        try:
+            holidays = frozenset(date.fromisoformat(date_str) for date_str in dates)
+        except (ValueError, TypeError) as error:
+            raise InvalidScheduleError(
+                f"Invalid holiday calendar '{calendar_name}': {error}"
+            ) from error
+        self.holidays[calendar_name] = holidays
+        return holidays
+
+    def validate(self, required: Iterable[str] = ()):
+        """
+        Parses and compiles every schedule of the configuration, with its revisions,
+        holiday time slots and holiday calendar.
+
+        Args:
+            required (Iterable[str]): The names of the schedules that must still be
+                configured, e.g. those in use.
+
+        Raises:
+            InvalidScheduleError: If a schedule cannot be parsed or compiled, or a
+                required schedule is missing.
+        """
+        for schedule_name in required:
+            if not self.config.get(schedule_name):
+                raise InvalidScheduleError(f"Schedule '{schedule_name}' in use was removed")
+        for schedule_name in self.config:
+            try:
+                self.get_compiled(schedule_name)
+                schedule = self.get_schedule(schedule_name)
+                for revision in (schedule, *schedule.revisions):
+                    CompiledSchedule(revision)
+                    if revision.holiday_time_slots:
+                        CompiledDay(revision.holiday_time_slots)
+                if schedule.holiday_calendar is not None:
+                    self.get_holidays(schedule.holiday_calendar)
+            except InvalidScheduleError:
+                raise
+            except (PayrollError, ValueError, TypeError, AttributeError) as error:
+                raise InvalidScheduleError(
+                    f"Invalid schedule '{schedule_name}': {error}"
+                ) from error
+
+
+class ScheduleRegistry:
+    """
+    A process-wide cache of the payment schedule configuration.
+
+    The configuration file is read once and the parsed and compiled schedules are
+    memoized by name. Every lookup checks the modification time and size of the
+    file; when they change the content hash is compared and, if it differs, the
+    configuration is reloaded and the memoized schedules are dropped.
+
+    When a cache directory is given (or set in the PAYROLL_SCHEDULE_CACHE_DIR
+    environment variable), the parsed schedules are also written as plain JSON to a
+    file keyed by the configuration hash, see schedule_to_json. A cold start still
+    decodes the configuration file but reads the schedules from the cache, with
+    their times in ISO format, instead of parsing them with strptime. The cache
+    holds data only, so a cache directory shared with other users cannot run code
+    in the process.
+
+    Every loaded configuration is held in an immutable ScheduleSnapshot that is
+    swapped in atomically, so readers never observe a half-loaded configuration.
+
+    Args:
+        config_path (str): The path of the configuration file.
+        cache_dir (Optional[str]): The directory of the on-disk schedule cache.
+    """
+
+    def __init__(self, config_path: str = DEFAULT_CONFIG_PATH, cache_dir: Optional[str] = None):
+        self.config_path = config_path
+        self.cache_dir = cache_dir if cache_dir is not None else os.environ.get(CACHE_DIR_ENV)
+        self._lock = threading.RLock()
+        self._stat_key = None
+        self._snapshot: Optional[ScheduleSnapshot] = None
+        self._versions = itertools.count(1)
+        # The schedules looked up so far, which a new configuration must keep.
+        self._in_use = set()
+
+    @property
+    def version(self) -> int:
+        """
+        The version of the loaded configuration, incremented on every change.
+        """
+        return self._snapshot.version if self._snapshot else 0
+
+    @property
+    def config_hash(self) -> Optional[str]:
+        """
+        The SHA-256 hex digest of the loaded configuration file.
+        """
+        return self._snapshot.config_hash if self._snapshot else None
+
+    def _read_changed(self) -> Optional[Tuple[tuple, str, bytes]]:
+        """
+        Reads the configuration file when it changed since the last load.
+
+        Returns:
+            Optional[Tuple[tuple, str, bytes]]: The stat key, hash and content of the
+                file, None when its content is unchanged.
+        """
+        stat = os.stat(self.config_path)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+        if stat_key == self._stat_key:
+            return None
+        with open(self.config_path, "rb") as file:
+            content = file.read()
+        config_hash = hashlib.sha256(content).hexdigest()
+        if config_hash == self.config_hash:
+            self._stat_key = stat_key
+            return None
+        return stat_key, config_hash, content
+
+    def _build_snapshot(self, config_hash: str, content: bytes) -> ScheduleSnapshot:
+        """
+        Builds the snapshot of a configuration file content.
+        """
+        config_json = json.loads(content)
+        return ScheduleSnapshot(
+            next(self._versions),
+            config_hash,
+            config_json.get("payment_schedules"),
+            self._load_cache(config_hash),
+            config_json.get("holiday_calendars"),
+        )
+
+    def _install(self, stat_key: tuple, snapshot: ScheduleSnapshot):
+        """
+        Makes a snapshot the current configuration.
+        """
+        self._stat_key = stat_key
+        self._snapshot = snapshot
+
+    def _build_validated(
+        self, stat_key: tuple, config_hash: str, content: bytes
+    ) -> ScheduleSnapshot:
+        """
+        Builds the snapshot of a changed configuration file and validates it, see
+        ScheduleSnapshot.validate. The schedules looked up from the registry must
+        still be configured.
+
+        Raises:
+            InvalidScheduleError: If the configuration is invalid. The file is not
+                read again until it changes.
+
+        Returns:
+            ScheduleSnapshot: The validated snapshot, not installed yet.
+        """
+        with self._lock:
+            in_use = sorted(self._in_use)
+        try:
+            snapshot = self._build_snapshot(config_hash, content)
+            if not isinstance(snapshot.config, dict):
+                raise InvalidScheduleError("Invalid configuration: no payment_schedules")
+            snapshot.validate(in_use)
+        except (ValueError, AttributeError, InvalidScheduleError) as error:
+            with self._lock:
+                # Do not retry the same broken file until it changes again.
+                self._stat_key = stat_key
+            if isinstance(error, InvalidScheduleError):
+                raise
+            raise InvalidScheduleError(f"Invalid configuration: {error}") from error
+        return snapshot
+
+    def _refresh(self) -> ScheduleSnapshot:
+        """
+        Reloads the configuration when the file has changed since the last lookup.
+        A changed configuration is validated like by reload and an invalid one is
+        skipped, keeping the current version in use. The first configuration is
+        loaded without validation, its schedules being checked when looked up.
+
+        Returns:
+            ScheduleSnapshot: The current configuration.
+        """
+        changed = self._read_changed()
+        if changed is None:
+            return self._snapshot
+        stat_key, config_hash, content = changed
+        if self._snapshot is None:
+            self._install(stat_key, self._build_snapshot(config_hash, content))
+            return self._snapshot
+        try:
+            snapshot = self._build_validated(stat_key, config_hash, content)
+        except InvalidScheduleError:
+            return self._snapshot
+        self._install(stat_key, snapshot)
+        return snapshot
+
+    def reload(self) -> bool:
+        """
+        Reloads and validates the configuration if the file changed, swapping the new
+        version in only when every schedule compiles and the schedules in use are
+        still configured. The new version is built
+        without holding the registry lock, so lookups are not stalled meanwhile.
+
+        Raises:
+            InvalidScheduleError: If the changed configuration is invalid; the
+                current version stays in use.
+
+        Returns:
+            bool: Whether a new version was installed.
+        """
+        changed = self._read_changed()
+        if changed is None:
+            return False
+        snapshot = self._build_validated(*changed)
+        stat_key = changed[0]
+        with self._lock:
+            # A lookup may have loaded an even newer file in the meantime.
+            if snapshot.version <= self.version:
+                return False
+            self._install(stat_key, snapshot)
+        return True
+
+    def current(self) -> ScheduleSnapshot:
+        """
+        Returns the current configuration without checking the file for changes,
+        loading it on first use. Use it together with a ScheduleWatcher.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._refresh()
+        return snapshot
+
+    def _cache_path(self, config_hash: str) -> Optional[str]:
+        """
+        Returns the on-disk cache file of a configuration, None when disabled.
+        """
+        if not self.cache_dir:
+            return None
+        return os.path.join(
+            self.cache_dir, f"payroll-schedules-{CACHE_FORMAT}-{config_hash}.json"
+        )
+
+    def _load_cache(self, config_hash: str) -> Dict[str, PaymentSchedule]:
+        """
+        Loads the parsed schedules of a configuration from the on-disk cache.
+        An unreadable cache file is ignored and rebuilt.
+        """
+        cache_path = self._cache_path(config_hash)
+        if cache_path is None or not os.path.exists(cache_path):
+            return {}
+        try:
+            with open(cache_path, "rb") as file:
+                return {
+                    name: schedule_from_json(schedule_json)
+                    for name, schedule_json in json.load(file).items()
+                }
+        except (OSError, ValueError, KeyError, AttributeError, TypeError):
+            return {}
+
+    def _store_cache(self, snapshot: ScheduleSnapshot):
+        """
+        Writes every parsed schedule of the configuration to the on-disk cache. A
+        schedule that cannot be parsed is left out and logged, so it does not fail
+        the lookups of the others; its own lookups still raise.
+        """
+        cache_path = self._cache_path(snapshot.config_hash)
+        if cache_path is None or os.path.exists(cache_path):
+            return
+        schedules = {}
+        for name, schedule_json in snapshot.config.items():
+            if not schedule_json:
+                continue
+            try:
+                schedules[name] = schedule_to_json(snapshot.get_schedule(name))
+            except (PayrollError, ValueError, TypeError, KeyError, AttributeError) as error:
+                logger.warning("Schedule '%s' left out of the cache: %s", name, error)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(schedules, file)
+        os.replace(temporary_path, cache_path)
+
+    def get_config(self) -> Dict[str, dict]:
+        """
+        Returns the payment schedules section of the configuration file.
+        """
+        with self._lock:
+            return self._refresh().config
+
+    def get_schedule(self, schedule_name: str) -> PaymentSchedule:
+        """
+        Retrieves a memoized payment schedule. The returned dataclass is shared and
+        must be treated as read-only.
+
+        Raises:
+            PaymentScheduleNotFound: If the payment schedule is not configured.
+        """
+        with self._lock:
+            snapshot = self._refresh()
+            cached = schedule_name in snapshot.schedules
+            schedule = snapshot.get_schedule(schedule_name)
+            self._in_use.add(schedule_name)
+            if not cached:
+                self._store_cache(snapshot)
+            return schedule
+
+    def get_snapshot(self, schedule_name: str) -> ScheduleSnapshot:
+        """
+        Retrieves the current configuration after looking up a payment schedule in
+        it, see get_schedule. Everything priced from the snapshot, e.g. the schedule,
+        its revisions and its holidays, comes from the same version.
+
+        Raises:
+            PaymentScheduleNotFound: If the payment schedule is not configured.
+        """
+        with self._lock:
+            self.get_schedule(schedule_name)
+            return self._snapshot
+
+    def get_compiled(self, schedule_name: str, round_slot_hours: bool = True) -> CompiledSchedule:
+        """
+        Retrieves a memoized compiled payment schedule.
+
+        Raises:
+            PaymentScheduleNotFound: If the payment schedule is not configured.
+        """
+        return self.get_snapshot(schedule_name).get_compiled(schedule_name, round_slot_hours)
+
+    def get_holidays(self, calendar_name: str) -> FrozenSet[date]:
+        """
+        Retrieves the memoized holidays of a holiday calendar.
+
+        Raises:
+            InvalidScheduleError: If the holiday calendar is not configured or has an
+                invalid date.
+        """
+        with self._lock:
+            return self._refresh().get_holidays(calendar_name)
+
+    def clear(self):
+        """
+        Drops the loaded configuration, forcing a reload on the next lookup.
+        """
+        with self._lock:
+            self._stat_key = None
+            self._snapshot = None
+            self._in_use.clear()
+
+
+class ScheduleWatcher:
+    """
+    Polls the configuration file of a registry from a background thread and swaps
+    in new versions once they are validated. Invalid configurations are reported
+    and skipped, leaving the current version in use.
+
+    Args:
+        registry (Optional[ScheduleRegistry]): The registry to reload, the
+            process-wide registry by default.
+        interval (float): The seconds between two checks of the file.
+        on_error (Optional[Callable[[Exception], None]]): Called with the error of
+            a configuration that could not be loaded.
+
+    Attributes:
+        last_error (Optional[Exception]): The error of the last failed reload.
+    """
+
+    def __init__(
+        self,
+        registry: Optional[ScheduleRegistry] = None,
+        interval: float = 1.0,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        self.registry = registry or get_registry()
+        self.interval = interval
+        self.on_error = on_error
+        self.last_error: Optional[Exception] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """
+        Checks the file once.
+
+        Returns:
+            bool: Whether a new version was installed.
+        """
+        try:
+            return self.registry.reload()
+        except (PayrollError, OSError) as error:
+            self.last_error = error
+            if self.on_error is not None:
+                self.on_error(error)
+            return False
+
+    def _run(self):
+        """
+        Checks the file every interval until stopped.
+        """
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """
+        Starts the background thread.
+        """
+        self.registry.current()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="schedule-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops the background thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_registry: Optional[ScheduleRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ScheduleRegistry:
+    """
+    Returns the process-wide registry of the default configuration file.
+    """
+    global _registry  # pylint: disable=global-statement
+    with _registry_lock:
+        if _registry is None:
+            _registry = ScheduleRegistry()
+        return _registry
 
 
 class ScheduleHandler:
@@ -22,41 +674,42 @@ class ScheduleHandler:
         PaymentScheduleNotFound: If the payment schedule with the given name is not found.
     """
 
-    def __init__(self):
-        self.schedule_config = self._read_config()
+    def __init__(self, registry: Optional[ScheduleRegistry] = None):
+        self.registry = registry or get_registry()
+
+    @property
+    def schedule_config(self) -> Dict[str, dict]:
+        """
+        The payment schedules section of the configuration file.
+        """
+        return self._read_config()
 
     def _read_config(self):
         """
-        Reads the payment schedules from the configuration file
+        Reads the payment schedules from the configuration file, through the
+        registry cache.
         """
-        module_path = os.path.dirname(os.path.abspath(__file__))
-        json_path = os.path.join(module_path, DEFAULT_CONFIG_FILE)
-        with open(json_path, "r", encoding="utf-8") as file:
-            config_data = json.load(file)
-            payment_schedules = config_data.get("payment_schedules")
-            return payment_schedules
+        return self.registry.get_config()
 
     def get_schedule(self, schedule_name: str) -> PaymentSchedule:
         """
-        Retrieves a payment schedule as a PaymentSchedule dataclass.        
+        Retrieves a payment schedule as a PaymentSchedule dataclass.
         """
-        schedule_json = self.schedule_config.get(schedule_name)
-        if not schedule_json:
-            raise PaymentScheduleNotFound(f"Schedule '{schedule_name}' not found")
+        return self.registry.get_schedule(schedule_name)
 
-        periods = []
-        for period_json in schedule_json.get("periods"):
-            days = period_json.get("days")
-            time_slots = []
-            for time_slot_json in period_json.get("time_slots"):
-                start = datetime.strptime(time_slot_json.get("start"), "%H:%M").time()
-                end = datetime.strptime(time_slot_json.get("end"), "%H:%M").time()
-                end = time(23, 59, 59) if end == time.min else end
-                rate = time_slot_json.get("rate")
-                time_slots.append(TimeSlot(start=start, end=end, rate=rate))
-            periods.append(Period(days=days, time_slots=time_slots))
-
-        return PaymentSchedule(name=schedule_name, periods=periods)
+    def get_snapshot(self, schedule_name: str) -> ScheduleSnapshot:
+        """
+        Retrieves the configuration version a payment schedule is looked up in.
+        """
+        return self.registry.get_snapshot(schedule_name)
+
+    def get_compiled_schedule(
+        self, schedule_name: str, round_slot_hours: bool = True
+    ) -> CompiledSchedule:
+        """
+        Retrieves a payment schedule compiled for pricing, see CompiledSchedule.
+        """
+        return self.registry.get_compiled(schedule_name, round_slot_hours)
 
     def __str__(self):
         return str(self.__dict__)
@@ -0,0 +1,410 @@
+"""
+This module contains a long-running asyncio payroll service. It keeps the parser
+and the compiled schedules warm and answers NAME=DAYhh:mm-hh:mm,... lines sent over
+TCP or a Unix socket, one JSON line per request, in request order.
+
+A request line may start with '@SCHEDULE ' to price it with another payment schedule,
+and the line 'STATS' returns the service counters and latency percentiles. Every
+payment response carries the configuration version it was priced with, which changes
+when the configuration is reloaded with --watch-config. Concurrent
+requests are coalesced into small batches for the calculator, and at most
+max_in_flight requests are accepted at a time; further requests wait, which stops
+reading from their connections.
+
+Usage:
+python -m payroll.server [--host HOST] [--port PORT | --unix PATH] [--watch-config SECONDS]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from collections import deque
+from time import perf_counter
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .calculator import PayrollCalculator
+from .errors import PayrollError
+from .parser import InputParser
+from .schedule import ScheduleWatcher
+from . import vectorized
+
+STATS_COMMAND = "STATS"
+SCHEDULE_PREFIX = "@"
+LATENCY_SAMPLES = 10_000
+# Below this many work histories per schedule, pricing them one by one is faster
+# than building the NumPy arrays.
+VECTORIZE_MIN_BATCH = 32
+
+
+class PayrollServer:
+    """
+    An asyncio payroll service with request micro-batching.
+
+    Args:
+        schedule_name (str): The payment schedule used when a request names none.
+        max_batch (int): The maximum number of requests priced together.
+        max_delay (float): The seconds a batch waits for more requests to arrive.
+        max_in_flight (int): The maximum number of requests accepted and not yet answered.
+        cache_size (int): The shift cache size of every calculator, see PayrollCalculator.
+        hot_reload (bool): Whether the calculators follow the configuration versions
+            installed by a ScheduleWatcher, see PayrollCalculator.
+    """
+
+    def __init__(
+        self,
+        schedule_name: str = "default",
+        max_batch: int = 64,
+        max_delay: float = 0.001,
+        max_in_flight: int = 1024,
+        cache_size: int = 0,
+        hot_reload: bool = False,
+    ):
+        self.schedule_name = schedule_name
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_in_flight = max_in_flight
+        self.cache_size = cache_size
+        self.hot_reload = hot_reload
+        self.input_parser = InputParser(fast=True)
+        self._calculators: Dict[str, PayrollCalculator] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.counters = {"requests": 0, "errors": 0, "batches": 0, "in_flight": 0}
+
+    def get_calculator(self, schedule_name: str) -> PayrollCalculator:
+        """
+        Returns the warm calculator of a payment schedule, creating it on first use.
+
+        Raises:
+            PaymentScheduleNotFound: If the payment schedule is not configured.
+        """
+        calculator = self._calculators.get(schedule_name)
+        if calculator is None:
+            calculator = PayrollCalculator(
+                schedule_name, cache_size=self.cache_size, hot_reload=self.hot_reload
+            )
+            self._calculators[schedule_name] = calculator
+        return calculator
+
+    async def start(
+        self, host: str = "127.0.0.1", port: int = 0, path: Optional[str] = None
+    ) -> asyncio.AbstractServer:
+        """
+        Starts listening on a TCP port, or on a Unix socket when a path is given.
+
+        Returns:
+            asyncio.AbstractServer: The listening server.
+        """
+        self.get_calculator(self.schedule_name)
+        self._queue = asyncio.Queue()
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self._batcher = asyncio.create_task(self._run_batcher())
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server
+
+    async def close(self):
+        """
+        Stops listening and cancels the batcher.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, line: str) -> asyncio.Future:
+        """
+        Queues a request line, waiting while max_in_flight requests are pending. The
+        latency of the request includes that wait.
+
+        Returns:
+            asyncio.Future: The future of the JSON-serializable response.
+        """
+        received = perf_counter()
+        await self._in_flight.acquire()
+        self.counters["in_flight"] += 1
+        future = asyncio.get_running_loop().create_future()
+        schedule_name = self.schedule_name
+        if line.startswith(SCHEDULE_PREFIX):
+            schedule_name, _, line = line[len(SCHEDULE_PREFIX):].partition(" ")
+        await self._queue.put((schedule_name, line, future, received))
+        return future
+
+    def _resolve(self, future: asyncio.Future, response: dict):
+        """
+        Answers a request and frees its in-flight slot.
+        """
+        if future.done():
+            return
+        future.set_result(response)
+        self.counters["in_flight"] -= 1
+        self._in_flight.release()
+
+    async def _run_batcher(self):
+        """
+        Takes the queued requests in batches of up to max_batch and prices them.
+        """
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            if queue.empty() and self.max_delay > 0:
+                await asyncio.sleep(self.max_delay)
+            while len(batch) < self.max_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                self._process(batch)
+            except Exception as error:  # pylint: disable=broad-except
+                # An unexpected failure must not leave the requests waiting forever.
+                for _, _, future, _ in batch:
+                    self._resolve(future, _error_response(error))
+
+    def _process(self, batch: List[Tuple[str, str, asyncio.Future, float]]):
+        """
+        Parses and prices a batch, resolving the future of every request.
+        """
+        self.counters["batches"] += 1
+        responses: List[Optional[dict]] = [None] * len(batch)
+        groups: Dict[str, List[Tuple[int, object]]] = {}
+        for index, (schedule_name, line, _, _) in enumerate(batch):
+            try:
+                work_history = self.input_parser.parse(line)
+                self.get_calculator(schedule_name)
+            except (PayrollError, ValueError) as error:
+                responses[index] = _error_response(error)
+                continue
+            groups.setdefault(schedule_name, []).append((index, work_history))
+
+        for schedule_name, items in groups.items():
+            calculator = self.get_calculator(schedule_name)
+            payments = None
+            if vectorized.np is not None and len(items) >= VECTORIZE_MIN_BATCH:
+                try:
+                    payments = calculator.calculate_payments_batch(
+                        [work_history for _, work_history in items]
+                    ).tolist()
+                    # The batch was priced with the schedule it left on the calculator;
+                    # only the event loop thread switches it.
+                    batch_version = calculator.compiled_schedule.version
+                except (PayrollError, ValueError):
+                    # Priced one by one below, so only the failing requests get an error.
+                    payments = None
+            for position, (index, work_history) in enumerate(items):
+                try:
+                    if payments is not None:
+                        payment, schedule_version = payments[position], batch_version
+                    else:
+                        payment, schedule_version = calculator.calculate_versioned_payment(
+                            work_history
+                        )
+                except (PayrollError, ValueError) as error:
+                    responses[index] = _error_response(error)
+                    continue
+                responses[index] = {
+                    "name": work_history.name,
+                    "payment": payment,
+                    "schedule": schedule_name,
+                    "schedule_version": schedule_version,
+                }
+
+        finished = perf_counter()
+        for (_, _, future, received), response in zip(batch, responses):
+            self.counters["requests"] += 1
+            if "error" in response:
+                self.counters["errors"] += 1
+            self._latencies.append(finished - received)
+            self._resolve(future, response)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves a connection, answering its requests in order.
+        """
+        pending: asyncio.Queue = asyncio.Queue()
+        responder = asyncio.create_task(self._respond(pending, writer))
+        try:
+            while True:
+                try:
+                    raw_line = await _read_line(reader)
+                    if raw_line is None:
+                        break
+                    line = raw_line.decode("utf-8").strip()
+                except ValueError as error:
+                    # Undecodable or too long: only this line is answered with an error.
+                    pending.put_nowait(self._reject(error))
+                    continue
+                if not line:
+                    continue
+                if line == STATS_COMMAND:
+                    # Answered by the responder, once the previous requests are done.
+                    pending.put_nowait(STATS_COMMAND)
+                else:
+                    pending.put_nowait(await self.submit(line))
+        finally:
+            pending.put_nowait(None)
+            await responder
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def _reject(self, error: Exception) -> asyncio.Future:
+        """
+        Answers a request line that could not be read without queueing it.
+
+        Returns:
+            asyncio.Future: The resolved future of the error response.
+        """
+        self.counters["requests"] += 1
+        self.counters["errors"] += 1
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(_error_response(error))
+        return future
+
+    async def _respond(self, pending: asyncio.Queue, writer: asyncio.StreamWriter):
+        """
+        Writes the responses of a connection in request order.
+        """
+        while True:
+            future = await pending.get()
+            if future is None:
+                break
+            if future == STATS_COMMAND:
+                response = self.stats()
+            else:
+                response = await future
+            writer.write(json.dumps(response).encode("utf-8") + b"\n")
+            if pending.empty():
+                try:
+                    await writer.drain()
+                except ConnectionError:
+                    break
+
+    def stats(self) -> dict:
+        """
+        Returns the service counters and the latency percentiles, in milliseconds,
+        of the last LATENCY_SAMPLES requests.
+        """
+        latencies = sorted(self._latencies)
+        stats = dict(self.counters)
+        stats["mean_batch"] = (
+            self.counters["requests"] / self.counters["batches"]
+            if self.counters["batches"]
+            else 0.0
+        )
+        for label, fraction in (("p50_ms", 0.5), ("p90_ms", 0.9), ("p99_ms", 0.99)):
+            stats[label] = (
+                latencies[min(int(fraction * len(latencies)), len(latencies) - 1)] * 1000
+                if latencies
+                else 0.0
+            )
+        stats["max_ms"] = latencies[-1] * 1000 if latencies else 0.0
+        return stats
+
+
+async def _read_line(reader: asyncio.StreamReader) -> Optional[bytes]:
+    """
+    Reads a request line, with its newline unless it ends the stream.
+
+    Raises:
+        ValueError: If the line is longer than the limit of the reader. The line is
+            discarded up to and including its newline.
+
+    Returns:
+        Optional[bytes]: The line, None at the end of the stream.
+    """
+    overrun = None
+    while True:
+        try:
+            raw_line = await reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as error:
+            raw_line = error.partial
+        except asyncio.LimitOverrunError as error:
+            # Drop the buffered part of the line and keep reading up to its newline.
+            overrun = error
+            await reader.readexactly(error.consumed)
+            continue
+        if overrun is not None:
+            raise ValueError(f"Request line too long: {overrun}")
+        return raw_line or None
+
+
+def _error_response(error: Exception) -> dict:
+    """
+    Returns the response of a request that could not be priced.
+    """
+    return {"error": type(error).__name__, "message": str(error)}
+
+
+async def serve(args: argparse.Namespace):
+    """
+    Runs the service until it is cancelled.
+    """
+    server = PayrollServer(
+        schedule_name=args.schedule,
+        max_batch=args.max_batch,
+        max_delay=args.max_delay_ms / 1000,
+        max_in_flight=args.max_in_flight,
+        cache_size=args.cache_size,
+        hot_reload=args.watch_config is not None,
+    )
+    watcher = None
+    if args.watch_config is not None:
+        watcher = ScheduleWatcher(
+            interval=args.watch_config,
+            on_error=lambda error: print(f"Configuration not reloaded: {error}", file=sys.stderr),
+        )
+        watcher.start()
+    listener = await server.start(args.host, args.port, args.unix)
+    sockets = ", ".join(str(sock.getsockname()) for sock in listener.sockets)
+    print(f"Payroll service listening on {sockets}", file=sys.stderr)
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+        if watcher is not None:
+            watcher.stop()
+
+
+def main(argv=None) -> int:
+    """
+    Parses the command line arguments and runs the service.
+    """
+    arg_parser = argparse.ArgumentParser(description="Run the payroll service.")
+    arg_parser.add_argument("--host", default="127.0.0.1", help="TCP host")
+    arg_parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    arg_parser.add_argument("--unix", help="Unix socket path, replaces --host/--port")
+    arg_parser.add_argument("--schedule", default="default", help="default schedule")
+    arg_parser.add_argument("--max-batch", type=int, default=64, help="requests per batch")
+    arg_parser.add_argument(
+        "--max-delay-ms", type=float, default=1.0, help="batching delay in milliseconds"
+    )
+    arg_parser.add_argument(
+        "--max-in-flight", type=int, default=1024, help="pending requests limit"
+    )
+    arg_parser.add_argument("--cache-size", type=int, default=0, help="shift cache size")
+    arg_parser.add_argument(
+        "--watch-config",
+        type=float,
+        metavar="SECONDS",
+        help="reload the configuration file when it changes, checking every SECONDS",
+    )
+    args = arg_parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,451 @@
+"""
+This module contains the structured output sinks of the batch mode. Instead of the
+human readable lines of format_result, the results and the rejected lines can be
+written as CSV, JSON Lines or binary records, optionally gzip compressed.
+
+Every sink formats the results in blocks and hands them to a large buffered
+binary stream, so the cost per row is the formatting of the row rather than a
+write call.
+
+Usage:
+    with open_sink("results.csv.gz", "csv", schedule_name="default", compress=True) as sink:
+        sink.write(price_lines(read_lines(sources), input_parser, payroll_calculator))
+"""
+import gzip
+import json
+import re
+import struct
+import builtins
+import sys
+from abc import ABC, abstractmethod
+from itertools import islice
+from json.encoder import encode_basestring  # pylint: disable=no-name-in-module
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from . import errors
+from .batch import STDIN_SOURCE
+from .data_classes import PaymentResult, RejectedLine
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+BLOCK_ROWS = 4096
+RESULT_COLUMNS = (
+    "source",
+    "line_number",
+    "name",
+    "payment",
+    "schedule",
+    "schedule_version",
+    "error_type",
+    "error",
+)
+CSV_SPECIAL_CHARACTERS = re.compile(r'[,"\r\n]')
+BINARY_MAGIC = b"PAYROLL4"
+# source index, line number, payment, schedule version, schedule index, error type
+# index, rejected flag and the size of the UTF-8 text that follows the record: the
+# employee name of a result, the error message of a rejected line.
+BINARY_RECORD = struct.Struct("<IIdIHHBI")
+BINARY_TRAILER = struct.Struct("<Q")
+
+
+class ResultSink(ABC):
+    """
+    The base class of the output sinks, which implement write_block.
+
+    Args:
+        stream (BinaryIO): The buffered binary stream receiving the output.
+        schedule_name (str): The payment schedule name written with the results that
+            do not record theirs, and with the rejected lines.
+        closers (Sequence[Callable[[], None]]): Called in order when the sink is
+            closed, e.g. to close the stream and the file underneath it.
+        state (Optional[dict]): The state of a sink whose output the stream continues,
+            see state. A new output is started, e.g. with a header, when None.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        schedule_name: str,
+        closers: Sequence[Callable[[], None]] = (),
+        state: Optional[dict] = None,
+    ):
+        self.stream = stream
+        self.schedule_name = schedule_name
+        self.closers = closers
+        if state is None:
+            self.start()
+        else:
+            self.restore(state)
+
+    def start(self):
+        """
+        Writes what precedes the first block of a new output, nothing by default.
+        """
+
+    def state(self) -> dict:
+        """
+        Returns the JSON-serializable state needed to continue the output, e.g. after
+        a checkpoint, nothing by default.
+        """
+        return {}
+
+    def restore(self, state: dict):
+        """
+        Restores the state of a sink whose output is continued.
+        """
+
+    def write(self, items: Iterable[Union[PaymentResult, RejectedLine]]) -> Tuple[int, int]:
+        """
+        Writes results and rejected lines in blocks of BLOCK_ROWS items.
+
+        Returns:
+            Tuple[int, int]: The number of priced and rejected lines.
+        """
+        priced = rejected = 0
+        iterator = iter(items)
+        while True:
+            block = list(islice(iterator, BLOCK_ROWS))
+            if not block:
+                break
+            rejects = sum(1 for item in block if isinstance(item, RejectedLine))
+            self.write_block(block)
+            priced += len(block) - rejects
+            rejected += rejects
+        return priced, rejected
+
+    @abstractmethod
+    def write_block(self, block: List[Union[PaymentResult, RejectedLine]]):
+        """
+        Writes a block of results, implemented by every sink.
+        """
+
+    def close(self):
+        """
+        Flushes the output and runs the closers.
+        """
+        self.stream.flush()
+        for closer in self.closers:
+            closer()
+
+    def __enter__(self) -> "ResultSink":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class CsvSink(ResultSink):
+    """
+    Writes one CSV row per line with the RESULT_COLUMNS, the error columns empty
+    for the priced lines and the payment columns empty for the rejected ones.
+    Fields are quoted the same way as csv.writer does.
+    """
+
+    def start(self):
+        self.stream.write((",".join(RESULT_COLUMNS) + "\n").encode("utf-8"))
+
+    def write_block(self, block):
+        schedule = _csv_field(self.schedule_name)
+        sources: Dict[str, str] = {}
+        schedules: Dict[str, str] = {"": schedule}
+        rows = []
+        append = rows.append
+        for item in block:
+            source = sources.get(item.source)
+            if source is None:
+                source = sources[item.source] = _csv_field(item.source)
+            if isinstance(item, RejectedLine):
+                append(
+                    f"{source},{item.line_number},,,{schedule},,{item.error_type},"
+                    f"{_csv_field(str(item.error))}\n"
+                )
+            else:
+                item_schedule = schedules.get(item.schedule)
+                if item_schedule is None:
+                    item_schedule = schedules[item.schedule] = _csv_field(item.schedule)
+                append(
+                    f"{source},{item.line_number},{_csv_field(item.name)},{item.payment!r},"
+                    f"{item_schedule},{item.schedule_version},,\n"
+                )
+        self.stream.write("".join(rows).encode("utf-8"))
+
+
+class JsonLinesSink(ResultSink):
+    """
+    Writes one JSON object per line with the RESULT_COLUMNS that apply to it.
+    """
+
+    def write_block(self, block):
+        schedule = encode_basestring(self.schedule_name)
+        schedules: Dict[str, str] = {"": schedule}
+        rows = []
+        append = rows.append
+        for item in block:
+            if isinstance(item, RejectedLine):
+                append(
+                    f'{{"source": {encode_basestring(item.source)}, '
+                    f'"line_number": {item.line_number}, "schedule": {schedule}, '
+                    f'"error_type": "{item.error_type}", '
+                    f'"error": {encode_basestring(str(item.error))}}}\n'
+                )
+            else:
+                item_schedule = schedules.get(item.schedule)
+                if item_schedule is None:
+                    item_schedule = schedules[item.schedule] = encode_basestring(item.schedule)
+                append(
+                    f'{{"source": {encode_basestring(item.source)}, '
+                    f'"line_number": {item.line_number}, '
+                    f'"name": {encode_basestring(item.name)}, '
+                    f'"payment": {item.payment!r}, "schedule": {item_schedule}, '
+                    f'"schedule_version": {item.schedule_version}}}\n'
+                )
+        self.stream.write("".join(rows).encode("utf-8"))
+
+
+class BinarySink(ResultSink):
+    """
+    Writes one BINARY_RECORD per line after the BINARY_MAGIC header, each followed
+    by its UTF-8 text: the employee name of a result, the error message of a
+    rejected line. On close a JSON trailer with the schedule name, the sources, the
+    schedules, the error types and the record count is written, followed by its
+    length as BINARY_TRAILER. The records refer to their source, schedule and error
+    type by index.
+
+    The records are not fixed-width: a table of the names could only be written
+    once every record is, so it would have to be held in memory or in the state of
+    the sink, which a checkpoint saves after every range. See read_binary_results.
+    """
+
+    def __init__(self, stream: BinaryIO, schedule_name: str, closers=(), state=None):
+        self._sources: Dict[str, int] = {}
+        self._schedules: Dict[str, int] = {schedule_name: 0}
+        self._error_types: Dict[str, int] = {}
+        self._records = 0
+        super().__init__(stream, schedule_name, closers, state)
+
+    def start(self):
+        self.stream.write(BINARY_MAGIC)
+
+    def state(self) -> dict:
+        return {
+            "sources": list(self._sources),
+            "schedules": list(self._schedules),
+            "error_types": list(self._error_types),
+            "records": self._records,
+        }
+
+    def restore(self, state: dict):
+        self._sources = {source: index for index, source in enumerate(state["sources"])}
+        self._schedules = {
+            schedule: index for index, schedule in enumerate(state["schedules"])
+        }
+        self._error_types = {
+            error_type: index for index, error_type in enumerate(state["error_types"])
+        }
+        self._records = state["records"]
+
+    def write_block(self, block):
+        pack = BINARY_RECORD.pack
+        sources, schedules, error_types = self._sources, self._schedules, self._error_types
+        records = []
+        append = records.append
+        for item in block:
+            source_index = sources.setdefault(item.source, len(sources))
+            if isinstance(item, RejectedLine):
+                error_type = error_types.setdefault(item.error_type, len(error_types))
+                message = str(item.error).encode("utf-8", errors="replace")
+                append(
+                    pack(source_index, item.line_number, 0.0, 0, 0, error_type, 1, len(message))
+                )
+                append(message)
+            else:
+                schedule = item.schedule or self.schedule_name
+                name = item.name.encode("utf-8")
+                append(
+                    pack(
+                        source_index,
+                        item.line_number,
+                        item.payment,
+                        item.schedule_version,
+                        schedules.setdefault(schedule, len(schedules)),
+                        0,
+                        0,
+                        len(name),
+                    )
+                )
+                append(name)
+        self.stream.write(b"".join(records))
+        self._records += len(block)
+
+    def close(self):
+        trailer = json.dumps({"schedule": self.schedule_name, **self.state()}).encode("utf-8")
+        self.stream.write(trailer + BINARY_TRAILER.pack(len(trailer)))
+        super().close()
+
+
+SINKS = {"csv": CsvSink, "jsonl": JsonLinesSink, "binary": BinarySink}
+
+
+def open_sink(
+    path: str,
+    output_format: str = "csv",
+    schedule_name: str = "default",
+    compress: bool = False,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+) -> ResultSink:
+    """
+    Opens an output sink.
+
+    Args:
+        path (str): The output file, '-' stands for stdout.
+        output_format (str): One of the SINKS formats.
+        schedule_name (str): The payment schedule name written with every result.
+        compress (bool): Whether to gzip the output.
+        buffer_size (int): The size of the write buffer in bytes.
+
+    Raises:
+        ValueError: If the format is unknown.
+
+    Returns:
+        ResultSink: The sink, to be closed once every result is written.
+    """
+    sink_class = SINKS.get(output_format)
+    if sink_class is None:
+        raise ValueError(f"Unknown output format: {output_format}")
+    if path == STDIN_SOURCE:
+        file, closers = sys.stdout.buffer, [sys.stdout.buffer.flush]
+    else:
+        file = open(path, "wb", buffering=buffer_size)  # pylint: disable=consider-using-with
+        closers = [file.close]
+    stream = file
+    if compress:
+        # The sinks write whole blocks, so the gzip stream needs no extra buffer.
+        stream = gzip.GzipFile(fileobj=file, mode="wb", compresslevel=6)
+        closers.insert(0, stream.close)
+    return sink_class(stream, schedule_name, closers)
+
+
+def read_binary_results(path: str) -> Iterator[Union[PaymentResult, RejectedLine]]:
+    """
+    Reads the records of a binary sink file back, gzip compressed or not. The file
+    is read in blocks of DEFAULT_BUFFER_SIZE bytes, so memory usage does not depend
+    on its size. The rejected lines have no raw line and their error has the
+    original error type and message, see _message_error_class.
+
+    Raises:
+        ValueError: If the file is not a binary sink file or is truncated.
+
+    Returns:
+        Iterator[Union[PaymentResult, RejectedLine]]: The records in file order.
+    """
+    with open(path, "rb") as file:
+        compressed = file.read(2) == b"\x1f\x8b"
+    with (gzip.open(path, "rb") if compressed else open(path, "rb")) as file:
+        if file.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+            raise ValueError(f"Not a binary payroll results file: {path}")
+        # A gzip stream seeks by decompressing, which is still done in blocks.
+        size = file.seek(0, 2)
+        file.seek(size - BINARY_TRAILER.size)
+        (trailer_size,) = BINARY_TRAILER.unpack(file.read(BINARY_TRAILER.size))
+        trailer_start = size - BINARY_TRAILER.size - trailer_size
+        file.seek(trailer_start)
+        trailer = json.loads(file.read(trailer_size))
+        file.seek(len(BINARY_MAGIC))
+        yield from _read_binary_records(file, trailer_start - len(BINARY_MAGIC), trailer)
+
+
+def _read_binary_records(
+    file: BinaryIO, remaining: int, trailer: dict
+) -> Iterator[Union[PaymentResult, RejectedLine]]:
+    """
+    Reads the records of a binary sink file positioned after its header.
+
+    Args:
+        file (BinaryIO): The binary sink file.
+        remaining (int): The size of the records.
+        trailer (dict): The trailer of the file.
+    """
+    sources: List[str] = trailer["sources"]
+    schedules: List[str] = trailer["schedules"]
+    error_classes = [
+        _message_error_class(_error_class(error_type)) for error_type in trailer["error_types"]
+    ]
+    unpack_from, record_size = BINARY_RECORD.unpack_from, BINARY_RECORD.size
+    pending = b""
+    while True:
+        chunk = file.read(min(DEFAULT_BUFFER_SIZE, remaining))
+        remaining -= len(chunk)
+        data = pending + chunk
+        offset = 0
+        while offset + record_size <= len(data):
+            fields = unpack_from(data, offset)
+            source_index, line_number, payment, version, schedule_index = fields[:5]
+            error_type, rejected, text_size = fields[5:]
+            text_end = offset + record_size + text_size
+            if text_end > len(data):
+                break  # The text continues in the next chunk.
+            text = data[offset + record_size : text_end].decode("utf-8")
+            offset = text_end
+            if rejected:
+                error = error_classes[error_type](text)
+                yield RejectedLine(sources[source_index], line_number, "", error)
+            else:
+                yield PaymentResult(
+                    sources[source_index],
+                    line_number,
+                    text,
+                    payment,
+                    version,
+                    schedules[schedule_index],
+                )
+        pending = data[offset:]
+        if not chunk:
+            if pending:
+                raise ValueError("Truncated binary payroll results file")
+            return
+
+
+def _csv_field(value: str) -> str:
+    """
+    Quotes a CSV field when it holds a separator, a quote or a line break.
+    """
+    if CSV_SPECIAL_CHARACTERS.search(value):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def _message_error_class(error_class: type) -> type:
+    """
+    Returns a class creating errors of a type from their message alone. The
+    classes whose constructor takes other arguments, e.g. UnicodeDecodeError, are
+    replaced with a subclass of the same name.
+    """
+    try:
+        error_class("")
+    except TypeError:
+        return type(
+            error_class.__name__,
+            (error_class,),
+            {"__init__": BaseException.__init__, "__str__": BaseException.__str__},
+        )
+    return error_class
+
+
+def _error_class(name: str) -> type:
+    """
+    Returns the payroll or built-in exception class of an error type name.
+    """
+    error_class = getattr(errors, name, None) or getattr(builtins, name, None)
+    if isinstance(error_class, type) and issubclass(error_class, Exception):
+        return error_class
+    return errors.PayrollError
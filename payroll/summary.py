@@ -0,0 +1,264 @@
+"""
+This module contains the streaming summary of a batch run. Every priced work
+history is itemized by schedule slot as it goes through the pipeline, and the
+summary keeps running sums per day of the week and per slot, the total hours, the
+top-N payments in a heap and a fixed-bucket histogram of the payments. Its memory
+does not depend on the number of lines, and the summaries of worker processes are
+merged into one.
+
+Usage:
+    summary = PayrollSummary(top_n=20)
+    calculator = SummarizingCalculator(payroll_calculator, summary)
+    items = price_lines(read_lines(["timesheet.txt"]), input_parser, calculator)
+    ...
+    summary.write_json(file)
+"""
+import heapq
+import json
+from datetime import date
+from typing import Dict, List, Optional, TextIO, Tuple, Union
+
+from .calculator import PayrollCalculator
+from .constants import DAYS_OF_WEEK
+from .data_classes import ColumnarWorkHistory, PaymentBreakdown, WorkHistory
+from .multi_schedule import MultiSchedulePayrollCalculator
+
+DEFAULT_TOP_N = 10
+DEFAULT_BUCKET_WIDTH = 50.0
+DEFAULT_BUCKET_COUNT = 40
+
+
+def _format_minutes(minutes: int) -> str:
+    """
+    Formats minutes since midnight as hh:mm.
+    """
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class PayrollSummary:
+    """
+    The summary statistics of the payments of a batch run, in fixed memory.
+
+    Args:
+        top_n (int): The number of highest payments kept.
+        bucket_width (float): The width in USD of the histogram buckets.
+        bucket_count (int): The number of histogram buckets, the last one counting
+            every payment above the others.
+
+    Raises:
+        ValueError: If a size is not positive.
+
+    Attributes:
+        payments (int): The number of payments added.
+        payment_total (float): The sum of the payments.
+        top (List[Tuple[float, str]]): The min-heap of the top_n highest payments
+            and their employee names.
+        histogram (List[int]): The number of payments per bucket, bucket i counting
+            the payments from i * bucket_width up to the next bucket.
+    """
+
+    def __init__(
+        self,
+        top_n: int = DEFAULT_TOP_N,
+        bucket_width: float = DEFAULT_BUCKET_WIDTH,
+        bucket_count: int = DEFAULT_BUCKET_COUNT,
+    ):
+        if top_n < 1 or bucket_width <= 0 or bucket_count < 1:
+            raise ValueError(
+                f"Invalid summary sizes: top {top_n}, {bucket_count} buckets of {bucket_width}"
+            )
+        self.top_n = top_n
+        self.bucket_width = bucket_width
+        self.bucket_count = bucket_count
+        self.clear()
+
+    def clear(self):
+        """
+        Resets every statistic.
+        """
+        self.payments = 0
+        self.payment_total = 0.0
+        self.top: List[Tuple[float, str]] = []
+        self.histogram = [0] * self.bucket_count
+        # The slots, hours and amounts of every schedule in use, summed at the
+        # index of the slot in the breakdowns and folded into the totals by slot
+        # name and by day only when the summary is read.
+        self._slot_totals: Dict[str, Tuple[list, List[float], List[float]]] = {}
+        self._hours_total = 0.0
+        self._by_day: Dict[str, List[float]] = {day: [0.0, 0.0] for day in DAYS_OF_WEEK}
+        self._by_slot: Dict[str, List[float]] = {}
+
+    def _add_payment(self, name: str, payment: float):
+        """
+        Adds a payment to the total, the top payments and the histogram.
+        """
+        self.payments += 1
+        self.payment_total += payment
+        if len(self.top) < self.top_n:
+            heapq.heappush(self.top, (payment, name))
+        elif (payment, name) > self.top[0]:
+            heapq.heapreplace(self.top, (payment, name))
+        bucket = int(payment // self.bucket_width)
+        self.histogram[min(max(bucket, 0), self.bucket_count - 1)] += 1
+
+    def add(self, breakdown: PaymentBreakdown, payment: Optional[float] = None):
+        """
+        Adds the payment of an employee itemized by schedule slot.
+
+        Args:
+            breakdown (PaymentBreakdown): The hours and pay per slot of the employee.
+            payment (Optional[float]): The payment counted, that of the breakdown by
+                default.
+        """
+        schedule = breakdown.schedule
+        totals = self._slot_totals.get(schedule)
+        if totals is None or totals[0] is not breakdown.slots:
+            # A new schedule, or a new version of it after a configuration reload
+            if totals is not None:
+                self._fold(schedule)
+            totals = self._slot_totals[schedule] = (breakdown.slots, [], [])
+        _, total_hours, total_amounts = totals
+        missing = len(breakdown.hours) - len(total_hours)
+        if missing > 0:
+            # The slots of the dates priced with other time slots are added as met.
+            total_hours.extend([0.0] * missing)
+            total_amounts.extend([0.0] * missing)
+        amounts = breakdown.amounts
+        # A shift only overlaps a few slots, and a slot without hours has no pay.
+        for index, hours in enumerate(breakdown.hours):
+            if hours:
+                total_hours[index] += hours
+                total_amounts[index] += amounts[index]
+        self._add_payment(breakdown.name, breakdown.payment if payment is None else payment)
+
+    def _fold(self, schedule: Optional[str] = None):
+        """
+        Moves the slot totals of a schedule, or of every schedule, to the totals by
+        slot name and by day.
+        """
+        schedules = list(self._slot_totals) if schedule is None else [schedule]
+        for schedule_name in schedules:
+            slots, hours, amounts = self._slot_totals.pop(schedule_name)
+            for (day, start, end, rate), slot_hours, amount in zip(slots, hours, amounts):
+                if not (slot_hours or amount):
+                    continue
+                key = f"{schedule_name} {day} {_format_minutes(start)}-{_format_minutes(end)}"
+                slot_totals = self._by_slot.setdefault(key, [rate, 0.0, 0.0])
+                slot_totals[1] += slot_hours
+                slot_totals[2] += amount
+                if day not in self._by_day:
+                    # The holiday or revised slots of a date, see calculate_breakdown
+                    day = DAYS_OF_WEEK[date.fromisoformat(day).weekday()]
+                day_totals = self._by_day[day]
+                day_totals[0] += slot_hours
+                day_totals[1] += amount
+                self._hours_total += slot_hours
+
+    def to_dict(self) -> Dict:
+        """
+        Returns the summary as a JSON-serializable dictionary, the top payments in
+        decreasing order.
+        """
+        self._fold()
+        return {
+            "payments": self.payments,
+            "payment_total": self.payment_total,
+            "hours_total": self._hours_total,
+            "by_day": {
+                day: {"hours": hours, "amount": amount}
+                for day, (hours, amount) in self._by_day.items()
+            },
+            "by_slot": {
+                key: {"rate": rate, "hours": hours, "amount": amount}
+                for key, (rate, hours, amount) in sorted(self._by_slot.items())
+            },
+            "top": [
+                {"name": name, "payment": payment}
+                for payment, name in sorted(self.top, reverse=True)
+            ],
+            "histogram": {
+                "bucket_width": self.bucket_width,
+                "counts": list(self.histogram),
+            },
+        }
+
+    def merge(self, other: Dict):
+        """
+        Adds a summary of the same sizes, e.g. from a worker process, see to_dict.
+
+        Raises:
+            ValueError: If the histograms have other buckets.
+        """
+        histogram = other["histogram"]
+        if (histogram["bucket_width"], len(histogram["counts"])) != (
+            self.bucket_width,
+            self.bucket_count,
+        ):
+            raise ValueError("Cannot merge summaries with different histogram buckets")
+        self.payments += other["payments"]
+        self.payment_total += other["payment_total"]
+        self._hours_total += other["hours_total"]
+        for day, totals in other["by_day"].items():
+            day_totals = self._by_day[day]
+            day_totals[0] += totals["hours"]
+            day_totals[1] += totals["amount"]
+        for key, totals in other["by_slot"].items():
+            slot_totals = self._by_slot.setdefault(key, [totals["rate"], 0.0, 0.0])
+            slot_totals[1] += totals["hours"]
+            slot_totals[2] += totals["amount"]
+        for entry in other["top"]:
+            item = (entry["payment"], entry["name"])
+            if len(self.top) < self.top_n:
+                heapq.heappush(self.top, item)
+            elif item > self.top[0]:
+                heapq.heapreplace(self.top, item)
+        for bucket, count in enumerate(histogram["counts"]):
+            self.histogram[bucket] += count
+
+    def write_json(self, file: TextIO):
+        """
+        Writes the summary as an indented JSON document.
+        """
+        json.dump(self.to_dict(), file, indent=2)
+        file.write("\n")
+
+
+class SummarizingCalculator:
+    """
+    A calculator adding every payment it calculates to a summary. It stands in for
+    the calculator of the batch pipelines: every work history is priced by the
+    wrapped calculator, with its shift cache, and itemized with calculate_breakdown
+    for the slot totals of the summary.
+
+    Args:
+        payroll_calculator (Union[PayrollCalculator, MultiSchedulePayrollCalculator]):
+            The calculator pricing the work histories.
+        summary (PayrollSummary): The summary receiving the payments.
+    """
+
+    def __init__(
+        self,
+        payroll_calculator: Union[PayrollCalculator, MultiSchedulePayrollCalculator],
+        summary: PayrollSummary,
+    ):
+        self.payroll_calculator = payroll_calculator
+        self.summary = summary
+
+    def calculate_scheduled_payment(
+        self, work_history: Union[WorkHistory, ColumnarWorkHistory]
+    ) -> Tuple[float, int, str]:
+        """
+        Calculates the payment for an employee together with the configuration
+        version and the payment schedule name, adding it to the summary.
+
+        Raises:
+            PaymentScheduleNotFound: If the payment schedule is not configured.
+            ValueError: If a work day falls on a day without payment configuration.
+        """
+        payroll_calculator = self.payroll_calculator
+        payment, version, schedule = payroll_calculator.calculate_scheduled_payment(work_history)
+        self.summary.add(payroll_calculator.calculate_breakdown(work_history), payment)
+        return payment, version, schedule
+
+    def __str__(self):
+        return str(self.__dict__)
@@ -0,0 +1,88 @@
+"""
+This file contains the tests for the batch pipeline module
+"""
+import io
+
+from payroll.batch import run_batch
+from payroll.calculator import PayrollCalculator
+from payroll.parser import InputParser
+
+
+class TestBatch:
+    """
+    Tests for the batch pipeline
+    """
+
+    @classmethod
+    def setup_class(cls):
+        """
+        Initialize module instances
+        """
+        cls.payroll_calculator = PayrollCalculator("default")
+        cls.input_parser = InputParser()
+
+    def test_run_batch(self, tmp_path):
+        """
+        Test a file with valid, blank and invalid lines
+        """
+        timesheet = tmp_path / "timesheet.txt"
+        timesheet.write_text(
+            "RENE=MO10:00-12:00,TU10:00-12:00,TH01:00-03:00,SA14:00-18:00,SU20:00-21:00\n"
+            "\n"
+            "BAD=XX10:00-12:00\n"
+            "ASTRID=MO10:00-12:00,TH12:00-14:00,SU20:00-21:00\n",
+            encoding="utf-8",
+        )
+        output, rejects = io.StringIO(), io.StringIO()
+        counts = run_batch(
+            [str(timesheet)],
+            self.input_parser,
+            self.payroll_calculator,
+            output,
+            rejects,
+        )
+        assert counts == (2, 1)
+        assert output.getvalue() == (
+            "The payment for RENE is: 215 USD\nThe payment for ASTRID is: 85 USD\n"
+        )
+        assert rejects.getvalue() == (
+            f"{timesheet}:3: InvalidDayAbbreviationError: Invalid day abbreviation: XX\n"
+        )
+
+    def test_run_batch_invalid_utf8(self, tmp_path):
+        """
+        Test a line that is not valid UTF-8 is rejected without stopping the run
+        """
+        timesheet = tmp_path / "timesheet.txt"
+        timesheet.write_bytes(b"JOS\xc9=MO10:00-12:00\nJOS\xc3\x89=MO10:00-12:00\n")
+        output, rejects = io.StringIO(), io.StringIO()
+        counts = run_batch(
+            [str(timesheet)],
+            self.input_parser,
+            self.payroll_calculator,
+            output,
+            rejects,
+        )
+        assert counts == (1, 1)
+        assert output.getvalue() == "The payment for JOS\u00c9 is: 30 USD\n"
+        assert rejects.getvalue().startswith(f"{timesheet}:1: UnicodeDecodeError: ")
+
+    def test_run_batch_holiday(self, tmp_path):
+        """
+        Test dated lines are priced with the holiday calendar of the schedule
+        """
+        timesheet = tmp_path / "timesheet.txt"
+        timesheet.write_text(
+            "RENE=2026-01-19T10:00-12:00\n"
+            "ASTRID=2026-01-20T10:00-12:00,MO10:00-12:00\n",
+            encoding="utf-8",
+        )
+        expected = "The payment for RENE is: 40 USD\nThe payment for ASTRID is: 60 USD\n"
+        cached_calculator = PayrollCalculator("default", cache_size=8)
+        for payroll_calculator in (self.payroll_calculator, cached_calculator):
+            output, rejects = io.StringIO(), io.StringIO()
+            counts = run_batch(
+                [str(timesheet)], InputParser(fast=True), payroll_calculator, output, rejects
+            )
+            assert counts == (2, 0)
+            assert output.getvalue() == expected
@@ -0,0 +1,36 @@
+"""
+This file contains the tests for the benchmark harness
+"""
+import json
+
+from payroll.benchmark import generate_lines, main
+from payroll.parser import InputParser
+
+
+class TestBenchmark:
+    """
+    Tests for the benchmark harness
+    """
+
+    def test_generate_lines(self):
+        """
+        Test the workload is reproducible and valid
+        """
+        lines = generate_lines(200, seed=3)
+        assert lines == generate_lines(200, seed=3)
+        assert lines != generate_lines(200, seed=4)
+        input_parser = InputParser()
+        for line in lines:
+            input_parser.parse(line)
+
+    def test_main(self, tmp_path):
+        """
+        Test the results are written as JSON
+        """
+        output = tmp_path / "results.json"
+        assert main(["--lines", "50", "--output", str(output)]) == 0
+        results = json.loads(output.read_text(encoding="utf-8"))
+        stages = {stage["stage"]: stage for stage in results["stages"]}
+        assert {"schedule_load", "parse", "parse_fast", "calculate"} <= set(stages)
+        assert stages["parse"]["calls"] == 50
+        assert "p99_us" in stages["calculate"]["latency"]
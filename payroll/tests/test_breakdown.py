@@ -0,0 +1,81 @@
+"""
+This file contains the tests for the itemized export module
+"""
+import csv
+import io
+
+import pytest
+
+from payroll.breakdown import breakdown_lines, write_breakdowns
+from payroll.calculator import PayrollCalculator
+from payroll.parser import InputParser
+
+LINE = "RENE=MO10:00-12:00,TU10:00-12:00,TH01:00-03:00,SA14:00-18:00,SU20:00-21:00,MO08:00-19:35"
+
+
+class TestBreakdown:
+    """
+    Tests for the itemized payments
+    """
+
+    @pytest.mark.parametrize("round_slot_hours", [True, False])
+    @pytest.mark.parametrize("columnar", [False, True])
+    def test_matches_total(self, round_slot_hours, columnar):
+        """
+        Test the breakdown payment is the calculated payment and the amounts add up
+        """
+        payroll_calculator = PayrollCalculator("default", round_slot_hours=round_slot_hours)
+        work_history = InputParser(columnar=columnar).parse(LINE)
+        breakdown = payroll_calculator.calculate_breakdown(work_history)
+        assert breakdown.payment == payroll_calculator.calculate_payment(work_history)
+        assert sum(breakdown.amounts) == pytest.approx(breakdown.payment)
+        items = list(breakdown.items())
+        monday = [item for item in items if item[0] == "MO"]
+        if round_slot_hours:
+            assert monday == [
+                ("MO", 1, 540, 25, 1, 25.0),
+                ("MO", 541, 1080, 15, 11, 165.0),
+                ("MO", 1081, 1440, 20, 2, 40.0),
+            ]
+        else:
+            assert monday[0][4] == 1.0 and monday[1][4] == pytest.approx(659 / 60)
+
+    def test_write_breakdowns(self):
+        """
+        Test the breakdowns are written as CSV rows with a total row per employee
+        """
+        lines = [("timesheet.txt", 1, "ASTRID=MO10:00-12:00,SU20:00-21:00"), ("t", 2, "BAD")]
+        items = breakdown_lines(lines, InputParser(), PayrollCalculator("default"))
+        output, rejects = io.StringIO(), io.StringIO()
+        assert write_breakdowns(items, output, rejects) == (1, 1)
+        rows = list(csv.reader(io.StringIO(output.getvalue())))
+        assert rows == [
+            ["name", "day", "slot_start", "slot_end", "rate", "hours", "amount"],
+            ["ASTRID", "MO", "09:01", "18:00", "15", "2.0", "30.0"],
+            ["ASTRID", "SU", "18:01", "24:00", "25", "1.0", "25.0"],
+            ["ASTRID", "TOTAL", "", "", "", "3.0", "55.0"],
+        ]
+        assert rejects.getvalue().startswith("t:2: InvalidInputFormatError")
+
+    def test_dated_work_days(self):
+        """
+        Test dated work days are itemized with the slots they are priced with, the
+        holiday time slots under the date of the holiday
+        """
+        payroll_calculator = PayrollCalculator("default")
+        input_parser = InputParser()
+        work_history = input_parser.parse(
+            "RENE=2026-01-20T10:00-12:00,2026-01-19T10:00-12:00,MO10:00-11:00"
+        )
+        breakdown = payroll_calculator.calculate_breakdown(work_history)
+        assert breakdown.payment == payroll_calculator.calculate_payment(work_history) == 85
+        assert list(breakdown.items()) == [
+            ("MO", 541, 1080, 15, 1, 15.0),
+            ("TU", 541, 1080, 15, 2, 30.0),
+            ("2026-01-19", 541, 1080, 20, 2, 40.0),
+        ]
+        holiday = payroll_calculator.calculate_breakdown(
+            input_parser.parse("ASTRID=2026-01-19T10:00-11:00")
+        )
+        assert holiday.slots is breakdown.slots
+        assert list(holiday.items()) == [("2026-01-19", 541, 1080, 20, 1, 20.0)]
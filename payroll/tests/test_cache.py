@@ -0,0 +1,71 @@
+"""
+This file contains the tests for the LRU cache and the memoized calculations
+"""
+from payroll.cache import LRUCache
+from payroll.calculator import PayrollCalculator
+from payroll.parser import InputParser
+
+
+class TestLRUCache:
+    """
+    Tests for LRUCache class
+    """
+
+    def test_eviction(self):
+        """
+        Test the least recently used entry is evicted
+        """
+        cache = LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+        assert cache.get("b", None) is None
+        assert cache.stats() == {
+            "size": 2,
+            "maxsize": 2,
+            "hits": 1,
+            "misses": 1,
+            "evictions": 1,
+        }
+
+    def test_memoized_calculator(self):
+        """
+        Test memoized payments equal the regular ones and reuse repeated shifts
+        """
+        input_str = "ASTRID=MO08:00-19:35,TU08:00-19:35,SA08:00-20:00,MO08:00-19:35"
+        payroll_calculator = PayrollCalculator("default")
+        memoized_calculator = PayrollCalculator("default", cache_size=10)
+        for input_parser in (InputParser(), InputParser(columnar=True)):
+            work_history = input_parser.parse(input_str)
+            assert memoized_calculator.calculate_payment(
+                work_history
+            ) == payroll_calculator.calculate_payment(work_history)
+        stats = memoized_calculator.shift_cache.stats()
+        assert stats["misses"] == 3 + 3
+        assert stats["hits"] == 1 + 1
+
+    def test_schedule_change_clears(self):
+        """
+        Test the cache is cleared when the compiled schedule changes
+        """
+        memoized_calculator = PayrollCalculator("default", cache_size=10)
+        work_history = InputParser().parse("ASTRID=MO08:00-19:35")
+        memoized_calculator.calculate_payment(work_history)
+        memoized_calculator.compiled_schedule = PayrollCalculator(
+            "default", round_slot_hours=False
+        ).compiled_schedule
+        memoized_calculator.calculate_payment(work_history)
+        assert memoized_calculator.shift_cache.stats()["misses"] == 2
+        assert len(memoized_calculator.shift_cache) == 1
+
+    def test_memoized_parser(self):
+        """
+        Test repeated lines are parsed once and return independent copies
+        """
+        input_parser = InputParser(fast=True, cache_size=10)
+        first = input_parser.parse("ASTRID=MO10:00-12:00")
+        first.schedule.clear()
+        second = input_parser.parse("ASTRID=MO10:00-12:00")
+        assert second == InputParser().parse("ASTRID=MO10:00-12:00")
+        assert input_parser.line_cache.stats()["hits"] == 1
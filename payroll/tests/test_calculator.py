@@ -47,3 +47,25 @@ class TestPayrollCalculator:
         work_history = self.input_parser.parse(input_str)
         payment = self.payroll_calculator.calculate_payment(work_history)
         assert int(payment) == 1000
+
+    def test_calculate_payment_columnar(self):
+        """
+        Test columnar work histories are priced like regular ones.
+        """
+        input_str = "ASTRID=MO08:00-19:35,TH12:00-14:00,SA08:00-20:00,SU20:00-21:00"
+        work_history = InputParser(columnar=True).parse(input_str)
+        payment = self.payroll_calculator.calculate_payment(work_history)
+        assert payment == self.payroll_calculator.calculate_payment(
+            self.input_parser.parse(input_str)
+        )
+
+    def test_calculate_versioned_payment(self):
+        """
+        Test the versioned payment matches the payment and its schedule version.
+        """
+        input_str = "ASTRID=MO10:00-12:00,TH12:00-14:00,SU20:00-21:00"
+        work_history = self.input_parser.parse(input_str)
+        calculator = PayrollCalculator("default", hot_reload=True)
+        payment, version = calculator.calculate_versioned_payment(work_history)
+        assert payment == self.payroll_calculator.calculate_payment(work_history)
+        assert version == calculator.compiled_schedule.version
@@ -0,0 +1,182 @@
+"""
+This file contains the tests for the checkpointed batch mode module
+"""
+import json
+import os
+
+import pytest
+
+from payroll import schedule
+from payroll.calculator import PayrollCalculator
+from payroll.checkpoint import load_checkpoint, run_checkpointed
+from payroll.errors import InvalidCheckpointError
+from payroll.parser import InputParser
+from payroll.schedule import DEFAULT_CONFIG_PATH, ScheduleRegistry
+
+LINES = [
+    "RENE=MO10:00-12:00,TU10:00-12:00,TH01:00-03:00,SA14:00-18:00,SU20:00-21:00",
+    "ASTRID=MO10:00-12:00,TH12:00-14:00,SU20:00-21:00",
+    "",
+    "BAD=MO10:00-09:00",
+    "JOSÉ=SA08:00-20:00,SU10:00-22:00",
+] * 20
+
+
+class FailingCalculator(PayrollCalculator):
+    """
+    A calculator that stops the run after pricing a number of lines
+    """
+
+    def __init__(self, limit: int):
+        super().__init__("default")
+        self.limit = limit
+
+    def calculate_scheduled_payment(self, work_history):
+        self.limit -= 1
+        if self.limit < 0:
+            raise KeyboardInterrupt
+        return super().calculate_scheduled_payment(work_history)
+
+
+def run(sources, calculator, output_path, output_format, checkpoint_path, **options):
+    """
+    Runs a checkpointed batch with the fast parser
+    """
+    return run_checkpointed(
+        sources,
+        InputParser(fast=True),
+        calculator,
+        str(output_path),
+        output_format,
+        str(checkpoint_path),
+        **options,
+    )
+
+
+@pytest.fixture(name="sources")
+def sources_fixture(tmp_path):
+    """
+    Writes two timesheet files
+    """
+    sources = []
+    for name in ("first.txt", "second.txt"):
+        path = tmp_path / name
+        path.write_text("\n".join(LINES) + "\n", encoding="utf-8")
+        sources.append(str(path))
+    return sources
+
+
+class TestRunCheckpointed:
+    """
+    Tests for run_checkpointed function
+    """
+
+    @pytest.mark.parametrize("output_format", ["csv", "jsonl", "binary"])
+    @pytest.mark.parametrize("limit", [0, 30, 100])
+    def test_resume_same_output(self, tmp_path, sources, output_format, limit):
+        """
+        Test a resumed run writes the same output as an uninterrupted one
+        """
+        expected_path = tmp_path / "expected"
+        output_path = tmp_path / "output"
+        checkpoint_path = str(tmp_path / "checkpoint")
+        calculator = PayrollCalculator("default")
+        expected = run(
+            sources, calculator, expected_path, output_format, checkpoint_path, interval=200
+        )
+
+        with pytest.raises(KeyboardInterrupt):
+            run(
+                sources,
+                FailingCalculator(limit),
+                output_path,
+                output_format,
+                checkpoint_path,
+                interval=200,
+            )
+        checkpoint = load_checkpoint(checkpoint_path)
+        assert checkpoint is None or checkpoint.priced <= limit
+
+        # A different interval must not change the output either.
+        resumed = run(
+            sources,
+            calculator,
+            output_path,
+            output_format,
+            checkpoint_path,
+            interval=500,
+            resume=True,
+        )
+        assert output_path.read_bytes() == expected_path.read_bytes()
+        assert (resumed.priced, resumed.rejected) == (expected.priced, expected.rejected)
+        assert (resumed.priced, resumed.rejected) == (120, 40)
+        assert resumed.payment_total == expected.payment_total
+        assert load_checkpoint(checkpoint_path) is None
+
+    def test_other_run(self, tmp_path, sources):
+        """
+        Test a checkpoint of another run is not resumed
+        """
+        output_path = tmp_path / "output"
+        checkpoint_path = tmp_path / "checkpoint"
+        with pytest.raises(KeyboardInterrupt):
+            run(sources, FailingCalculator(50), output_path, "csv", checkpoint_path, interval=200)
+        with pytest.raises(InvalidCheckpointError):
+            run(
+                sources[:1],
+                PayrollCalculator("default"),
+                output_path,
+                "csv",
+                checkpoint_path,
+                resume=True,
+            )
+
+    @pytest.mark.parametrize(
+        "change", ["append", "touch", "schedule", "schedule_map", "config"]
+    )
+    def test_changed_run(self, tmp_path, sources, change, monkeypatch):
+        """
+        Test a checkpoint is not resumed once a source or the configuration changed,
+        or with other schedules
+        """
+        output_path = tmp_path / "output"
+        checkpoint_path = tmp_path / "checkpoint"
+        with pytest.raises(KeyboardInterrupt):
+            run(sources, FailingCalculator(50), output_path, "csv", checkpoint_path, interval=200)
+        options = {}
+        if change == "append":
+            with open(sources[1], "a", encoding="utf-8") as file:
+                file.write(LINES[0] + "\n")
+        elif change == "touch":
+            stat = os.stat(sources[0])
+            os.utime(sources[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        elif change == "schedule":
+            options["schedule_name"] = "other"
+        elif change == "config":
+            with open(DEFAULT_CONFIG_PATH, encoding="utf-8") as file:
+                config = json.load(file)
+            config["payment_schedules"]["default"]["periods"][0]["time_slots"][1]["rate"] = 16
+            config_path = tmp_path / "config.json"
+            config_path.write_text(json.dumps(config), encoding="utf-8")
+            monkeypatch.setattr(schedule, "_registry", ScheduleRegistry(str(config_path)))
+        else:
+            options["schedule_map"] = {"RENE": "default"}
+        with pytest.raises(InvalidCheckpointError):
+            run(
+                sources,
+                PayrollCalculator("default"),
+                output_path,
+                "csv",
+                checkpoint_path,
+                resume=True,
+                **options,
+            )
+
+    def test_invalid_checkpoint_file(self, tmp_path):
+        """
+        Test an unreadable checkpoint file is reported
+        """
+        checkpoint_path = tmp_path / "checkpoint"
+        checkpoint_path.write_text("{", encoding="utf-8")
+        with pytest.raises(InvalidCheckpointError):
+            load_checkpoint(str(checkpoint_path))
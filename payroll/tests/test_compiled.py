@@ -0,0 +1,183 @@
+"""
+This file contains the tests for the compiled payment schedule module
+"""
+from datetime import datetime, time
+
+import pytest
+
+from payroll.compiled import CompiledSchedule, time_to_minutes
+from payroll.constants import END_OF_DAY
+from payroll.data_classes import PaymentSchedule, Period, TimeSlot, WorkDay
+from payroll.errors import InvalidScheduleError
+from payroll.schedule import ScheduleHandler
+
+
+def legacy_day_payment(day: WorkDay, time_slots: list) -> float:
+    """
+    Reference implementation of the original datetime based day pricing
+    """
+    day_payment = 0.0
+    for time_slot in time_slots:
+        overlap_start = datetime.combine(datetime.min, max(day.start, time_slot.start))
+        overlap_end = datetime.combine(datetime.min, min(day.end, time_slot.end))
+        overlap = (overlap_end - overlap_start).total_seconds() / 3600.0
+        day_payment += round(max(0, overlap)) * time_slot.rate
+    return day_payment
+
+
+class TestCompiledSchedule:
+    """
+    Tests for CompiledSchedule class
+    """
+
+    @classmethod
+    def setup_class(cls):
+        """
+        Test class initialization
+        """
+        cls.schedule = ScheduleHandler().get_schedule("default")
+        cls.float_schedule = PaymentSchedule(
+            name="float",
+            periods=[
+                Period(
+                    days=["MO"],
+                    time_slots=[
+                        TimeSlot(start=time(0, 1), end=time(7, 30), rate=12.3),
+                        TimeSlot(start=time(7, 30), end=time(18, 0), rate=0.1),
+                        TimeSlot(start=time(18, 1), end=END_OF_DAY, rate=17.7),
+                    ],
+                )
+            ],
+        )
+
+        cls.unordered_schedule = PaymentSchedule(
+            name="unordered",
+            periods=[
+                Period(
+                    days=["TU"],
+                    time_slots=[
+                        TimeSlot(start=time(12, 0), end=END_OF_DAY, rate=0.1),
+                        TimeSlot(start=time(0, 0), end=time(6, 0), rate=0.7),
+                        TimeSlot(start=time(6, 0), end=time(12, 0), rate=0.2),
+                    ],
+                )
+            ],
+        )
+
+    def test_time_to_minutes(self):
+        """
+        Test the minute conversion including the end of day sentinel
+        """
+        assert time_to_minutes(time(9, 1)) == 541
+        assert time_to_minutes(END_OF_DAY) == 1440
+        with pytest.raises(ValueError):
+            time_to_minutes(time(9, 1, 30))
+
+    @pytest.mark.parametrize(
+        "schedule_attr", ["schedule", "float_schedule", "unordered_schedule"]
+    )
+    def test_rounded_matches_legacy(self, schedule_attr):
+        """
+        Test the rounded mode is bit-for-bit equal to the datetime implementation,
+        also with fractional rates configured out of order
+        """
+        schedule = getattr(self, schedule_attr)
+        compiled = CompiledSchedule(schedule)
+        for day, time_slots in schedule.to_time_slots().items():
+            for start in range(0, 1440, 13):
+                for end in range(start + 1, 1440, 17):
+                    work_day = WorkDay(
+                        day=day,
+                        start=time(start // 60, start % 60),
+                        end=time(end // 60, end % 60),
+                    )
+                    expected = legacy_day_payment(work_day, time_slots)
+                    assert compiled.price_work_day(work_day) == expected
+
+    def test_prorated(self):
+        """
+        Test the prorated mode pays every minute worked
+        """
+        compiled = CompiledSchedule(self.schedule, round_slot_hours=False)
+        work_day = WorkDay(day="MO", start=time(8, 0), end=time(19, 35))
+        expected = (60 * 25 + 539 * 15 + 94 * 20) / 60
+        assert compiled.price_work_day(work_day) == pytest.approx(expected)
+
+    def test_missing_day(self):
+        """
+        Test that a day without configuration cannot be priced
+        """
+        compiled = CompiledSchedule(self.float_schedule)
+        with pytest.raises(ValueError):
+            compiled.get_day("TU")
+
+    def test_gaps(self):
+        """
+        Test the minutes no time slot covers are reported
+        """
+        compiled = CompiledSchedule(self.schedule)
+        assert compiled.gaps["MO"] == [(0, 1), (540, 541), (1080, 1081)]
+        assert CompiledSchedule(self.float_schedule).gaps == {"MO": [(0, 1), (1080, 1081)]}
+
+    def test_overlapping_slots(self):
+        """
+        Test overlapping time slots are rejected when the schedule is compiled
+        """
+        schedule = PaymentSchedule(
+            name="overlap",
+            periods=[
+                Period(
+                    days=["MO"],
+                    time_slots=[TimeSlot(start=time(8, 0), end=time(12, 0), rate=10)],
+                ),
+                Period(
+                    days=["MO"],
+                    time_slots=[TimeSlot(start=time(11, 0), end=time(13, 0), rate=5)],
+                ),
+            ],
+        )
+        with pytest.raises(InvalidScheduleError, match="overlap"):
+            CompiledSchedule(schedule)
+
+    def test_fine_grained_slots(self):
+        """
+        Test unordered quarter-hour slots are indexed and match the legacy payments
+        """
+        boundaries = [time(minute // 60, minute % 60) for minute in range(0, 1440, 15)]
+        boundaries.append(END_OF_DAY)
+        time_slots = [
+            TimeSlot(start=boundaries[quarter], end=boundaries[quarter + 1], rate=quarter % 7 + 1)
+            for quarter in reversed(range(96))
+        ]
+        schedule = PaymentSchedule(
+            name="quarters", periods=[Period(days=["WE"], time_slots=time_slots)]
+        )
+        compiled = CompiledSchedule(schedule)
+        assert compiled.gaps == {}
+        for start, end in [(0, 1439), (61, 62), (600, 1000), (1425, 1439)]:
+            work_day = WorkDay(
+                day="WE", start=time(start // 60, start % 60), end=time(end // 60, end % 60)
+            )
+            assert compiled.price_work_day(work_day) == legacy_day_payment(work_day, time_slots)
+
+    def test_configured_order_kept(self):
+        """
+        Test the index keeps the configured slot order, which schedules sharing their
+        tables must have in common
+        """
+        compiled = CompiledSchedule(self.unordered_schedule)
+        tuesday = compiled.get_day("TU")
+        assert tuesday.starts == [0, 360, 720]
+        assert tuesday.positions == [1, 2, 0]
+        assert not tuesday.in_order
+
+        time_slots = self.unordered_schedule.periods[0].time_slots
+        ordered_slots = sorted(time_slots, key=lambda slot: slot.start)
+        ordered = PaymentSchedule(
+            name="ordered", periods=[Period(days=["TU"], time_slots=ordered_slots)]
+        )
+        ordered_compiled = CompiledSchedule(ordered)
+        assert ordered_compiled.slots == compiled.slots
+        assert ordered_compiled.table_key != compiled.table_key
+        with pytest.raises(ValueError):
+            ordered_compiled.share_tables(compiled)
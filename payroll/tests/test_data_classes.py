@@ -0,0 +1,61 @@
+"""
+This file contains the tests for the payroll data classes
+"""
+import sys
+from datetime import date, time
+from typing import Optional, get_type_hints
+
+from payroll.constants import COLUMNAR_BYTES_PER_SHIFT
+from payroll.data_classes import ColumnarWorkHistory, WorkDay
+
+
+class TestColumnarWorkHistory:
+    """
+    Tests for ColumnarWorkHistory class
+    """
+
+    def test_schedule(self):
+        """
+        Test the arrays are exposed as WorkDay objects
+        """
+        work_history = ColumnarWorkHistory(name="ALICE")
+        work_history.append(0, 600, 720)
+        work_history.append(6, 0, 1439)
+        assert len(work_history) == 2
+        assert work_history.schedule == [
+            WorkDay(day="MO", start=time(10), end=time(12)),
+            WorkDay(day="SU", start=time(0), end=time(23, 59)),
+        ]
+
+    def test_memory_per_shift(self):
+        """
+        Test a month of shifts stays within the documented memory target
+        """
+        shifts = 31
+        work_history = ColumnarWorkHistory(name="MAXIMILIANO")
+        for shift in range(shifts):
+            work_history.append(shift % 7, 480, 1020)
+        size = sum(
+            sys.getsizeof(value)
+            for value in (
+                work_history,
+                work_history.name,
+                work_history.days,
+                work_history.starts,
+                work_history.ends,
+            )
+        )
+        assert not hasattr(work_history, "__dict__")
+        assert size / shifts <= COLUMNAR_BYTES_PER_SHIFT
+
+
+class TestWorkDay:
+    """
+    Tests for WorkDay class
+    """
+
+    def test_date_annotation(self):
+        """
+        Test the date field is annotated with the date class, not its own default
+        """
+        assert get_type_hints(WorkDay)["date"] == Optional[date]
@@ -0,0 +1,101 @@
+"""
+This file contains the tests for the concurrent ingestion module
+"""
+import gzip
+import threading
+
+import pytest
+
+from payroll.batch import read_lines
+from payroll.ingest import expand_sources, read_lines_concurrently
+
+LINES = [
+    "RENE=MO10:00-12:00,TU10:00-12:00,TH01:00-03:00,SA14:00-18:00,SU20:00-21:00",
+    "ASTRID=MO10:00-12:00,TH12:00-14:00,SU20:00-21:00",
+    "",
+    "BAD=MO10:00-09:00",
+]
+
+
+@pytest.fixture(name="site_files")
+def site_files_fixture(tmp_path):
+    """
+    Writes the timesheet files of five sites, some of them compressed
+    """
+    for site in range(5):
+        data = "\n".join(LINES * (site + 3)) + "\n"
+        if site % 2:
+            with gzip.open(tmp_path / f"site{site}.txt.gz", "wt", encoding="utf-8") as file:
+                file.write(data)
+        else:
+            (tmp_path / f"site{site}.txt").write_text(data, encoding="utf-8")
+    return tmp_path
+
+
+class TestExpandSources:
+    """
+    Tests for expand_sources function
+    """
+
+    def test_directory_and_pattern(self, site_files):
+        """
+        Test directories and patterns are expanded in name order
+        """
+        (site_files / ".hidden").write_text("", encoding="utf-8")
+        (site_files / "nested").mkdir()
+        names = [f"site{site}.txt" + (".gz" if site % 2 else "") for site in range(5)]
+        assert expand_sources([str(site_files)]) == [str(site_files / name) for name in names]
+        assert expand_sources([str(site_files / "*.gz"), "-"]) == [
+            str(site_files / "site1.txt.gz"),
+            str(site_files / "site3.txt.gz"),
+            "-",
+        ]
+
+    def test_no_file(self, tmp_path):
+        """
+        Test a pattern without matches is reported while missing files are kept
+        """
+        with pytest.raises(FileNotFoundError):
+            expand_sources([str(tmp_path / "*.txt")])
+        assert expand_sources([str(tmp_path / "missing.txt")]) == [str(tmp_path / "missing.txt")]
+
+
+class TestReadLinesConcurrently:
+    """
+    Tests for read_lines_concurrently function
+    """
+
+    @pytest.mark.parametrize("threads", [1, 2, 8])
+    @pytest.mark.parametrize("block_lines", [1, 5, 1024])
+    def test_matches_read_lines(self, site_files, threads, block_lines):
+        """
+        Test the lines are the same and in the same order as read sequentially
+        """
+        sources = expand_sources([str(site_files)])
+        lines = list(
+            read_lines_concurrently(sources, threads, queue_size=1, block_lines=block_lines)
+        )
+        assert lines == list(read_lines(sources))
+        assert lines[-1] == (sources[-1], 28, LINES[3])
+
+    def test_read_error(self, site_files):
+        """
+        Test a file that cannot be read stops the run after the previous lines
+        """
+        sources = [str(site_files / "site0.txt"), str(site_files / "missing.txt")]
+        lines = read_lines_concurrently(sources, threads=2)
+        assert len([next(lines) for _ in range(9)]) == 9
+        with pytest.raises(FileNotFoundError):
+            next(lines)
+
+    def test_close_stops_readers(self, site_files):
+        """
+        Test the reader threads blocked on full queues end when the consumer stops
+        """
+        sources = expand_sources([str(site_files)]) * 4
+        lines = read_lines_concurrently(sources, threads=4, queue_size=1, block_lines=1)
+        next(lines)
+        lines.close()
+        assert not [
+            thread for thread in threading.enumerate() if thread.name.startswith("payroll-reader")
+        ]
@@ -0,0 +1,64 @@
+"""
+This file contains the tests for the instrumentation module
+"""
+import pytest
+
+from payroll import instrumentation
+from payroll.calculator import PayrollCalculator
+from payroll.errors import InvalidDayAbbreviationError
+from payroll.parser import InputParser
+
+
+class TestInstrumentation:
+    """
+    Tests for the instrumentation module
+    """
+
+    def teardown_method(self):
+        """
+        Restore the original methods after every test
+        """
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_counters_and_timings(self):
+        """
+        Test lines, shifts, errors and stage timings are collected
+        """
+        original_parse = InputParser.parse
+        instrumentation.enable()
+        assert InputParser.parse is not original_parse
+        input_parser = InputParser(fast=True)
+        payroll_calculator = PayrollCalculator("default")
+        work_history = input_parser.parse("ASTRID=MO10:00-12:00,TH12:00-14:00")
+        payroll_calculator.calculate_payment(work_history)
+        with pytest.raises(InvalidDayAbbreviationError):
+            input_parser.parse("ASTRID=XX10:00-12:00")
+
+        snapshot = instrumentation.snapshot()
+        assert snapshot["counters"] == {
+            "lines": 1,
+            "shifts": 2,
+            "payments": 1,
+            "errors": 1,
+            "errors.InvalidDayAbbreviationError": 1,
+        }
+        assert snapshot["stages"]["parse"]["calls"] == 2
+        assert snapshot["stages"]["day_payments"]["calls"] == 2
+        assert "calculate_payment" in instrumentation.format_summary()
+
+        instrumentation.disable()
+        assert InputParser.parse is original_parse
+        input_parser.parse("ASTRID=MO10:00-12:00")
+        assert instrumentation.snapshot()["counters"]["lines"] == 1
+
+    def test_merge(self):
+        """
+        Test snapshots from other processes are added up
+        """
+        instrumentation.enable()
+        InputParser().parse("ASTRID=MO10:00-12:00")
+        snapshot = instrumentation.snapshot()
+        instrumentation.merge(snapshot)
+        assert instrumentation.snapshot()["counters"]["lines"] == 2
+        assert instrumentation.snapshot()["stages"]["parse"]["calls"] == 2
@@ -0,0 +1,115 @@
+"""
+This file contains the tests for the incremental payroll ledger module
+"""
+from datetime import date, time
+
+import pytest
+
+from payroll.calculator import PayrollCalculator
+from payroll.data_classes import WorkDay
+from payroll.errors import InvalidDayAbbreviationError, ShiftNotFoundError
+from payroll.ledger import PayrollLedger
+from payroll.parser import InputParser
+
+
+class TestPayrollLedger:
+    """
+    Tests for PayrollLedger class
+    """
+
+    @classmethod
+    def setup_class(cls):
+        """
+        Initialize module instances
+        """
+        cls.payroll_calculator = PayrollCalculator("default")
+        cls.input_parser = InputParser()
+
+    def price(self, input_str: str) -> float:
+        """
+        Prices a line with the calculator
+        """
+        return self.payroll_calculator.calculate_payment(self.input_parser.parse(input_str))
+
+    def test_edits_match_full_calculation(self):
+        """
+        Test the running totals follow shift edits
+        """
+        ledger = PayrollLedger(self.payroll_calculator)
+        work_history = self.input_parser.parse("ASTRID=MO10:00-12:00,TH12:00-14:00,SU20:00-21:00")
+        assert ledger.set_work_history(work_history) == 85
+
+        ledger.add_shift("ASTRID", WorkDay(day="SA", start=time(8, 0), end=time(20, 0)))
+        assert ledger.total("ASTRID") == self.price(
+            "ASTRID=MO10:00-12:00,TH12:00-14:00,SU20:00-21:00,SA08:00-20:00"
+        )
+        ledger.replace_shift(
+            "ASTRID",
+            WorkDay(day="MO", start=time(10, 0), end=time(12, 0)),
+            WorkDay(day="MO", start=time(18, 0), end=time(22, 0)),
+        )
+        ledger.remove_shift("ASTRID", WorkDay(day="SU", start=time(20, 0), end=time(21, 0)))
+        expected = self.price("ASTRID=MO18:00-22:00,TH12:00-14:00,SA08:00-20:00")
+        assert ledger.total("ASTRID") == expected
+        assert ledger.recompute("ASTRID") == expected
+
+        with pytest.raises(ShiftNotFoundError):
+            ledger.remove_shift("ASTRID", WorkDay(day="SU", start=time(20, 0), end=time(21, 0)))
+        assert ledger.total("ASTRID") == expected
+
+    def test_snapshot_and_diff(self):
+        """
+        Test the diff returns only the totals changed since a snapshot
+        """
+        ledger = PayrollLedger(self.payroll_calculator)
+        ledger.update(
+            self.input_parser.parse(f"E{index}=MO10:00-12:00") for index in range(100)
+        )
+        snapshot = ledger.snapshot()
+        assert snapshot.version == 100 and len(snapshot.totals) == 100
+
+        ledger.add_shift("E1", WorkDay(day="TU", start=time(10, 0), end=time(11, 0)))
+        ledger.add_shift("E1", WorkDay(day="TU", start=time(10, 0), end=time(11, 0)))
+        ledger.remove_employee("E2")
+        assert ledger.diff(snapshot) == {"E1": 60.0, "E2": None}
+        assert ledger.diff(ledger.version) == {}
+        assert snapshot.totals["E1"] == 30.0
+
+    def test_journal_limit(self):
+        """
+        Test a version older than the journal cannot be diffed
+        """
+        ledger = PayrollLedger(self.payroll_calculator, journal_size=2)
+        for _ in range(3):
+            ledger.add_shift("E", WorkDay(day="MO", start=time(10, 0), end=time(11, 0)))
+        assert ledger.diff(1) == {"E": 45.0}
+        with pytest.raises(ValueError):
+            ledger.diff(0)
+
+    def test_dated_shifts(self):
+        """
+        Test dated shifts are priced with the holidays of their date and kept apart
+        from the shifts on other dates
+        """
+        ledger = PayrollLedger(self.payroll_calculator)
+        line = "RENE=2026-12-25T10:00-12:00,2026-12-18T10:00-12:00"
+        assert ledger.set_work_history(self.input_parser.parse(line)) == self.price(line) == 70
+        ledger.remove_shift(
+            "RENE", WorkDay(day="FR", start=time(10, 0), end=time(12, 0), date=date(2026, 12, 18))
+        )
+        assert ledger.total("RENE") == 40
+        with pytest.raises(ShiftNotFoundError):
+            ledger.remove_shift("RENE", WorkDay(day="FR", start=time(10, 0), end=time(12, 0)))
+
+    def test_unknown_day(self):
+        """
+        Test a shift on an unknown day is rejected with a payroll error
+        """
+        ledger = PayrollLedger(self.payroll_calculator)
+        work_day = WorkDay(day="XX", start=time(10, 0), end=time(11, 0))
+        with pytest.raises(InvalidDayAbbreviationError):
+            ledger.add_shift("E", work_day)
+        ledger.add_shift("E", WorkDay(day="MO", start=time(10, 0), end=time(11, 0)))
+        with pytest.raises(InvalidDayAbbreviationError):
+            ledger.remove_shift("E", work_day)
+        assert ledger.total("E") == 15.0
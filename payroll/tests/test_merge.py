@@ -0,0 +1,127 @@
+"""
+This file contains the tests for the group-by-employee merge module
+"""
+from datetime import date
+
+import pytest
+
+from payroll.calculator import PayrollCalculator
+from payroll.data_classes import ColumnarWorkHistory, MergedWorkHistory, RejectedLine
+from payroll.merge import EmployeeMerger, price_merged
+from payroll.parser import InputParser
+
+LINES = [
+    "RENE=MO10:00-12:00,TU10:00-12:00",
+    "ASTRID=MO10:00-12:00,TH12:00-14:00",
+    "BAD=MO10:00-09:00",
+    "RENE=TU10:00-12:00,TH01:00-03:00,SA14:00-18:00,SU20:00-21:00,TU10:00-12:00",
+    "ASTRID=SU20:00-21:00",
+]
+
+
+def numbered(lines, source="site.txt"):
+    """
+    Numbers lines like read_lines
+    """
+    return [(source, line_number, line) for line_number, line in enumerate(lines, 1)]
+
+
+def many_lines():
+    """
+    Returns the lines of 300 employees split over three weeks, the third one
+    repeating a work day of the first one
+    """
+    days = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+    lines = []
+    for week in range(3):
+        for employee in range(300):
+            day = days[(employee + week % 2) % 7]
+            lines.append(f"E{employee}={day}{employee % 12:02d}:00-{employee % 12 + 8:02d}:00")
+            if week == 1:
+                lines.append(f"E{employee}=SU20:00-21:00")
+    return lines
+
+
+class TestEmployeeMerger:
+    """
+    Tests for EmployeeMerger class
+    """
+
+    @classmethod
+    def setup_class(cls):
+        """
+        Initialize module instances
+        """
+        cls.payroll_calculator = PayrollCalculator("default")
+        cls.input_parser = InputParser(fast=True)
+
+    def test_merge(self):
+        """
+        Test the lines of an employee are merged and their duplicate work days dropped
+        """
+        merger = EmployeeMerger()
+        items = list(merger.merge(numbered(LINES), self.input_parser))
+        assert isinstance(items[0], RejectedLine) and items[0].line_number == 3
+        rene, astrid = items[1:]
+        assert (rene.source, rene.line_number, rene.lines, rene.duplicates) == (
+            "site.txt",
+            1,
+            2,
+            2,
+        )
+        assert isinstance(rene.work_history, ColumnarWorkHistory)
+        assert rene.work_history.name == "RENE" and len(rene.work_history) == 5
+        assert (astrid.line_number, astrid.lines, astrid.duplicates) == (2, 2, 0)
+        assert merger.stats() == {"lines": 4, "employees": 2, "duplicates": 2, "spills": 0}
+
+        results = list(price_merged(items, self.payroll_calculator))
+        assert [(result.name, result.payment) for result in results[1:]] == [
+            ("RENE", 215),
+            ("ASTRID", 85),
+        ]
+
+    def test_dated_work_days(self):
+        """
+        Test dated work days are kept with their dates
+        """
+        lines = ["RENE=2026-10-05T10:00-12:00,MO10:00-12:00", "RENE=2026-10-05T10:00-12:00"]
+        (merged,) = EmployeeMerger().merge(numbered(lines), InputParser())
+        assert isinstance(merged, MergedWorkHistory) and merged.duplicates == 1
+        assert [work_day.date for work_day in merged.work_history.schedule] == [
+            None,
+            date(2026, 10, 5),
+        ]
+
+    @pytest.mark.parametrize("memory_budget", [2000, 20000])
+    def test_spill_matches_memory(self, tmp_path, memory_budget):
+        """
+        Test a merge spilled to disk gives the same employees as one in memory
+        """
+        lines = numbered(many_lines())
+        expected = {
+            merged.work_history.name: merged
+            for merged in EmployeeMerger().merge(lines, self.input_parser)
+        }
+        merger = EmployeeMerger(memory_budget, partitions=4, spill_dir=str(tmp_path))
+        spilled = list(merger.merge(lines, self.input_parser))
+        assert merger.spills > 0
+        assert len(spilled) == len(expected) == 300
+        for merged in spilled:
+            other = expected[merged.work_history.name]
+            assert merged.work_history == other.work_history
+            assert (merged.line_number, merged.lines, merged.duplicates) == (
+                other.line_number,
+                other.lines,
+                other.duplicates,
+            )
+        assert merger.stats()["duplicates"] == 300
+        assert not list(tmp_path.iterdir())
+
+    def test_invalid_options(self):
+        """
+        Test the memory budget and the partitions are checked
+        """
+        with pytest.raises(ValueError):
+            EmployeeMerger(memory_budget=0)
+        with pytest.raises(ValueError):
+            EmployeeMerger(partitions=1)
@@ -0,0 +1,124 @@
+"""
+This file contains the tests for the multi-schedule calculator module
+"""
+import json
+
+import pytest
+
+from payroll import schedule
+from payroll.batch import price_lines
+from payroll.errors import PaymentScheduleNotFound
+from payroll.multi_schedule import MultiSchedulePayrollCalculator
+from payroll.parser import InputParser
+from payroll.schedule import ScheduleRegistry
+
+WEEK = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+LINES = [
+    "RENE=MO10:00-12:00,TU23:00-23:59,SU08:00-14:00",
+    "ASTRID=MO10:00-12:00,TH12:14-14:00",
+    "ANDRES=SA00:00-23:59",
+]
+
+
+def flat_schedule(rate: int, day_rate: int) -> dict:
+    """
+    Returns a schedule with one rate before noon and another one after
+    """
+    time_slots = [
+        {"start": "00:00", "end": "12:00", "rate": rate},
+        {"start": "12:01", "end": "00:00", "rate": day_rate},
+    ]
+    return {"periods": [{"days": WEEK, "time_slots": time_slots}]}
+
+
+@pytest.fixture(name="registry")
+def registry_fixture(tmp_path, monkeypatch):
+    """
+    Installs a process-wide registry with three schedules, two of them identical
+    """
+    config = {
+        "payment_schedules": {
+            "day": flat_schedule(10, 20),
+            "copy": flat_schedule(10, 20),
+            "night": flat_schedule(40, 5),
+        }
+    }
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps(config), encoding="utf-8")
+    registry = ScheduleRegistry(str(config_path))
+    monkeypatch.setattr(schedule, "_registry", registry)
+    return registry
+
+
+class TestMultiSchedulePayrollCalculator:
+    """
+    Tests for MultiSchedulePayrollCalculator class
+    """
+
+    @pytest.mark.usefixtures("registry")
+    def test_resolves_schedules(self):
+        """
+        Test every work history is priced with the schedule of its employee
+        """
+        calculator = MultiSchedulePayrollCalculator(
+            "day", schedule_map={"RENE": "night", "ANDRES": "copy"}
+        )
+        work_histories = [InputParser().parse(line) for line in LINES]
+        payments = [calculator.calculate_payment(wh) for wh in work_histories]
+        assert payments == [
+            calculator.get_calculator(name).calculate_payment(wh)
+            for name, wh in zip(["night", "day", "copy"], work_histories)
+        ]
+        assert calculator.calculate_payment(work_histories[0], "day") != payments[0]
+
+    def test_shares_identical_tables(self, registry):
+        """
+        Test schedules with identical periods share their compiled days
+        """
+        day = registry.get_compiled("day")
+        copy = registry.get_compiled("copy")
+        assert copy.name == "copy"
+        assert copy.by_index is day.by_index
+        assert registry.get_compiled("night").by_index is not day.by_index
+
+    @pytest.mark.usefixtures("registry")
+    @pytest.mark.parametrize("round_slot_hours", [True, False])
+    def test_batch_matches_scalar(self, round_slot_hours):
+        """
+        Test a mixed batch is priced in one stacked table like the scalar calculator
+        """
+        pytest.importorskip("numpy")
+        calculator = MultiSchedulePayrollCalculator(
+            "day",
+            resolver=lambda wh: "night" if wh.name.startswith("A") else None,
+            round_slot_hours=round_slot_hours,
+        )
+        work_histories = [InputParser(columnar=True).parse(line) for line in LINES] * 3
+        payments = calculator.calculate_payments_batch(work_histories)
+        assert payments.tolist() == [calculator.calculate_payment(wh) for wh in work_histories]
+        assert len(calculator.calculators) == 2
+        schedule_names = ["copy", "night", "copy"] * 3
+        payments = calculator.calculate_payments_batch(work_histories, schedule_names)
+        assert payments.tolist() == [
+            calculator.calculate_payment(wh, name)
+            for wh, name in zip(work_histories, schedule_names)
+        ]
+
+    @pytest.mark.usefixtures("registry")
+    def test_batch_results_record_schedule(self):
+        """
+        Test the batch mode records the schedule of every result
+        """
+        calculator = MultiSchedulePayrollCalculator("day", schedule_map={"RENE": "night"})
+        lines = [("-", number, line) for number, line in enumerate(LINES, 1)]
+        results = list(price_lines(lines, InputParser(fast=True), calculator))
+        assert [result.schedule for result in results] == ["night", "day", "day"]
+
+    @pytest.mark.usefixtures("registry")
+    def test_unknown_schedule(self):
+        """
+        Test a work history mapped to an unknown schedule cannot be priced
+        """
+        calculator = MultiSchedulePayrollCalculator("day", schedule_map={"RENE": "unknown"})
+        with pytest.raises(PaymentScheduleNotFound):
+            calculator.calculate_payment(InputParser().parse(LINES[0]))
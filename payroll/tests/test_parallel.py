@@ -0,0 +1,57 @@
+"""
+This file contains the tests for the multi-process batch mode
+"""
+import io
+
+from payroll.batch import run_batch
+from payroll.calculator import PayrollCalculator
+from payroll.parallel import run_parallel, split_ranges
+from payroll.parser import InputParser
+
+LINES = [
+    "RENE=MO10:00-12:00,TU10:00-12:00,TH01:00-03:00,SA14:00-18:00,SU20:00-21:00",
+    "ASTRID=MO10:00-12:00,TH12:00-14:00,SU20:00-21:00",
+    "",
+    "BAD=MO10:00-09:00",
+    "ASTRID=SA08:00-20:00,SU10:00-22:00",
+]
+
+
+class TestParallel:
+    """
+    Tests for the multi-process batch mode
+    """
+
+    def test_split_ranges(self, tmp_path):
+        """
+        Test the ranges cover the file and end on line boundaries
+        """
+        timesheet = tmp_path / "timesheet.txt"
+        data = ("\n".join(LINES * 5)).encode("utf-8")
+        timesheet.write_bytes(data)
+        ranges = list(split_ranges(str(timesheet), chunk_size=30))
+        assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+            assert data[end - 1 : end] == b"\n"
+
+    def test_run_parallel_matches_batch(self, tmp_path):
+        """
+        Test the parallel output is equal to the sequential output
+        """
+        timesheet = tmp_path / "timesheet.txt"
+        timesheet.write_text("\n".join(LINES * 20) + "\n", encoding="utf-8")
+        sources = [str(timesheet), str(timesheet)]
+        expected_output, expected_rejects = io.StringIO(), io.StringIO()
+        expected_counts = run_batch(
+            sources,
+            InputParser(),
+            PayrollCalculator("default"),
+            expected_output,
+            expected_rejects,
+        )
+        output, rejects = io.StringIO(), io.StringIO()
+        counts = run_parallel(sources, output, rejects, workers=2, chunk_size=100)
+        assert counts == expected_counts
+        assert output.getvalue() == expected_output.getvalue()
+        assert rejects.getvalue() == expected_rejects.getvalue()
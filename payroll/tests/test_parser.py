@@ -1,11 +1,11 @@
 """
 This file contains the tests for the payroll parser module
 """
-from datetime import time
+from datetime import date, time
 import pytest
 
 from payroll.parser import InputParser
-from payroll.data_classes import WorkHistory, WorkDay
+from payroll.data_classes import ColumnarWorkHistory, WorkHistory, WorkDay
 from payroll.errors import (
     InvalidInputFormatError,
     InvalidDayIntervalFormatError,
@@ -74,3 +74,91 @@ class TestInputParser:
         input_str = "ALICE=MO10:00-09:00"
         with pytest.raises(InvalidTimeIntervalError):
             self.parser.parse(input_str)
+
+
+    def test_parse_dated_intervals(self):
+        """
+        Test dated intervals get the date and its day of the week
+        """
+        expected_output = WorkHistory(
+            name="ALICE",
+            schedule=[
+                WorkDay(
+                    day="SA",
+                    start=time(hour=10),
+                    end=time(hour=12),
+                    date=date(2026, 10, 10),
+                ),
+                WorkDay(day="MO", start=time(hour=10), end=time(hour=12)),
+            ],
+        )
+        input_str = "ALICE=2026-10-10T10:00-12:00,MO10:00-12:00"
+        assert self.parser.parse(input_str) == expected_output
+        assert InputParser(fast=True).parse(input_str) == expected_output
+        assert InputParser(fast=True).parse_bytes(input_str.encode()) == expected_output
+
+    @pytest.mark.parametrize("fast", [False, True])
+    def test_parse_invalid_date(self, fast):
+        """
+        Test a date that does not exist is an invalid day interval
+        """
+        with pytest.raises(InvalidDayIntervalFormatError):
+            InputParser(fast=fast).parse("ALICE=2026-02-30T10:00-12:00")
+
+
+class TestFastInputParser:
+    """
+    Tests for the fast parse mode of InputParser class
+    """
+
+    @classmethod
+    def setup_class(cls):
+        """
+        Test class initialization
+        """
+        cls.parser = InputParser()
+        cls.fast_parser = InputParser(fast=True)
+
+    def test_same_work_history(self):
+        """
+        Test both modes return the same work history
+        """
+        input_str = "ALICE=MO00:00-23:59,TU10:00-12:00,SU09:05-17:45\n"
+        assert self.fast_parser.parse(input_str) == self.parser.parse(input_str)
+
+    @pytest.mark.parametrize(
+        "input_str, error_class",
+        [
+            ("ALICE=", InvalidInputFormatError),
+            ("ALICE=MO10:00-12:00,WRONGFORMAT", InvalidDayIntervalFormatError),
+            ("ALICE=XX10:00-12:00", InvalidDayAbbreviationError),
+            ("ALICE=MO10:00-09:00", InvalidTimeIntervalError),
+            ("ALICE=MO10:00-24:00", ValueError),
+            ("ALICE=MO10:60-12:00", ValueError),
+        ],
+    )
+    def test_same_errors(self, input_str, error_class):
+        """
+        Test both modes raise the same error classes
+        """
+        for parser in (self.parser, self.fast_parser):
+            with pytest.raises(error_class):
+                parser.parse(input_str)
+
+    def test_columnar(self):
+        """
+        Test the columnar mode stores the same work days in arrays
+        """
+        input_str = "ALICE=MO00:00-23:59,TU10:00-12:00,SU09:05-17:45"
+        work_history = InputParser(columnar=True).parse(input_str)
+        assert isinstance(work_history, ColumnarWorkHistory)
+        assert list(work_history.days) == [0, 1, 6]
+        assert list(work_history.starts) == [0, 600, 545]
+        assert work_history.schedule == self.parser.parse(input_str).schedule
+
+    def test_columnar_rejects_dated_intervals(self):
+        """
+        Test the columnar mode cannot hold dated intervals
+        """
+        with pytest.raises(InvalidDayIntervalFormatError):
+            InputParser(columnar=True).parse("ALICE=2026-10-10T10:00-12:00")
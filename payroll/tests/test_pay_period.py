@@ -0,0 +1,142 @@
+"""
+This file contains the tests for the pay period module
+"""
+from datetime import date, time
+import json
+import os
+import pytest
+
+from payroll import schedule
+from payroll.calculator import PayrollCalculator
+from payroll.data_classes import WorkDay, WorkHistory
+from payroll.pay_period import PayPeriodIndex
+from payroll.schedule import ScheduleRegistry, parse_schedule
+
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR"]
+SCHEDULE_JSON = {
+    "effective_from": "2026-10-02",
+    "holiday_time_slots": [{"start": "00:00", "end": "00:00", "rate": 50}],
+    "periods": [
+        {"days": WEEKDAYS, "time_slots": [{"start": "00:00", "end": "00:00", "rate": 10}]}
+    ],
+    "revisions": [
+        {
+            "effective_from": "2026-10-08",
+            "periods": [
+                {"days": WEEKDAYS, "time_slots": [{"start": "00:00", "end": "00:00", "rate": 12}]}
+            ],
+        }
+    ],
+}
+
+
+def dated_shift(day: date) -> WorkDay:
+    """
+    Returns a two hour shift on a date
+    """
+    return WorkDay(day="MO", start=time(10, 0), end=time(12, 0), date=day)
+
+
+class TestPayPeriodIndex:
+    """
+    Tests for PayPeriodIndex class
+    """
+
+    @classmethod
+    def setup_class(cls):
+        """
+        Test class initialization
+        """
+        cls.pay_period = PayPeriodIndex(
+            parse_schedule("dated", SCHEDULE_JSON),
+            date(2026, 10, 1),
+            date(2026, 10, 14),
+            holidays=frozenset([date(2026, 10, 12)]),
+        )
+
+    @pytest.mark.parametrize(
+        "day, payment",
+        [
+            (date(2026, 10, 2), 20),  # first effective date
+            (date(2026, 10, 7), 20),  # last date before the revision
+            (date(2026, 10, 8), 24),  # revised rate
+            (date(2026, 10, 12), 100),  # holiday, kept by the revision
+        ],
+    )
+    def test_price_by_date(self, day, payment):
+        """
+        Test every date is priced with its revision and holiday time slots
+        """
+        assert self.pay_period.price_work_day(dated_shift(day)) == payment
+
+    @pytest.mark.parametrize(
+        "day",
+        [date(2026, 10, 1), date(2026, 10, 10), date(2026, 10, 15), None],
+    )
+    def test_unpriced_dates(self, day):
+        """
+        Test dates before the schedule, weekends, dates outside the period and
+        undated work days are rejected
+        """
+        with pytest.raises(ValueError):
+            self.pay_period.calculate_payment(WorkHistory("ALICE", [dated_shift(day)]))
+
+    def test_calculate_payment(self):
+        """
+        Test the payment of a work history adds up its dated work days
+        """
+        work_history = WorkHistory(
+            "ALICE", [dated_shift(date(2026, 10, 7)), dated_shift(date(2026, 10, 12))]
+        )
+        assert self.pay_period.calculate_payment(work_history) == 120
+        assert len(self.pay_period) == 14
+
+    def test_invalid_period(self):
+        """
+        Test a pay period cannot end before it starts
+        """
+        with pytest.raises(ValueError):
+            PayPeriodIndex(
+                parse_schedule("dated", SCHEDULE_JSON), date(2026, 10, 2), date(2026, 10, 1)
+            )
+
+    def test_calculator_holidays(self):
+        """
+        Test the calculator indexes its pay periods with the configured holiday calendar
+        """
+        calculator = PayrollCalculator("default")
+        pay_period = calculator.get_pay_period(date(2026, 10, 1), date(2026, 10, 31))
+        assert calculator.get_pay_period(date(2026, 10, 1), date(2026, 10, 31)) is pay_period
+        work_history = WorkHistory("ALICE", [dated_shift(date(2026, 10, 12))])
+        assert pay_period.calculate_payment(work_history) == 40
+        assert calculator.calculate_payment(work_history) == 40
+
+    def test_pinned_calendar(self, tmp_path, monkeypatch):
+        """
+        Test a calculator without hot reload prices dated work days with the holidays
+        of the configuration version it was compiled from
+        """
+        config_path = tmp_path / "config.json"
+
+        def write_config(holidays, mtime):
+            config = {
+                "holiday_calendars": {"us": holidays},
+                "payment_schedules": {"dated": dict(SCHEDULE_JSON, holiday_calendar="us")},
+            }
+            config_path.write_text(json.dumps(config), encoding="utf-8")
+            os.utime(config_path, ns=(mtime, mtime))
+
+        write_config([], 1_000_000_000)
+        registry = ScheduleRegistry(str(config_path))
+        monkeypatch.setattr(schedule, "_registry", registry)
+        pinned = PayrollCalculator("dated")
+        following = PayrollCalculator("dated", hot_reload=True)
+        write_config(["2026-10-05"], 2_000_000_000)
+        assert registry.reload()
+
+        work_history = WorkHistory("ALICE", [dated_shift(date(2026, 10, 5))])
+        assert pinned.calculate_payment(work_history) == 20
+        assert pinned.get_pay_period(date(2026, 10, 1), date(2026, 10, 7)).calculate_payment(
+            work_history
+        ) == 20
+        assert following.calculate_payment(work_history) == 100
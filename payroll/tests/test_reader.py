@@ -0,0 +1,120 @@
+"""
+This file contains the tests for the memory-mapped reader module
+"""
+import io
+
+import pytest
+
+from payroll.batch import run_batch
+from payroll.calculator import PayrollCalculator
+from payroll.errors import InvalidDayIntervalFormatError, InvalidTimeIntervalError
+from payroll.parser import InputParser
+from payroll.reader import MappedFile, run_mapped_batch
+
+LINES = [
+    "RENE=MO10:00-12:00,TU10:00-12:00,TH01:00-03:00,SA14:00-18:00,SU20:00-21:00",
+    "ASTRID=MO10:00-12:00,TH12:00-14:00,SU20:00-21:00\r",
+    "  ",
+    "BAD=MO10:00-09:00",
+    "JOSÉ=SA08:00-20:00,SU10:00-22:00",
+    "WRONG=MO24:00-25:00",
+]
+
+
+class TestMappedFile:
+    """
+    Tests for MappedFile class
+    """
+
+    def test_iter_lines(self, tmp_path):
+        """
+        Test the lines are found on the raw bytes, skipping blank lines
+        """
+        timesheet = tmp_path / "timesheet.txt"
+        timesheet.write_bytes(b"A=MO10:00-12:00\r\n\n  \nB=TU10:00-12:00")
+        with MappedFile(str(timesheet)) as mapped_file:
+            lines = [
+                (line_number, mapped_file.decode(start, end))
+                for line_number, start, end in mapped_file.iter_lines()
+            ]
+            assert mapped_file.count_lines() == 4
+        assert lines == [(1, "A=MO10:00-12:00"), (4, "B=TU10:00-12:00")]
+
+    def test_split_ranges(self, tmp_path):
+        """
+        Test the ranges cover the file and end on line boundaries
+        """
+        timesheet = tmp_path / "timesheet.txt"
+        data = ("\n".join(LINES * 5)).encode("utf-8")
+        timesheet.write_bytes(data)
+        with MappedFile(str(timesheet)) as mapped_file:
+            ranges = list(mapped_file.split_ranges(30))
+            line_count = sum(mapped_file.count_lines(start, end) for start, end in ranges)
+        assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+        assert line_count == len(LINES) * 5
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+            assert data[end - 1 : end] == b"\n"
+
+    def test_empty_file(self, tmp_path):
+        """
+        Test an empty file has no lines
+        """
+        timesheet = tmp_path / "timesheet.txt"
+        timesheet.write_bytes(b"")
+        with MappedFile(str(timesheet)) as mapped_file:
+            assert not list(mapped_file.iter_lines())
+            assert not list(mapped_file.split_ranges(10))
+
+    def test_run_mapped_batch_matches_batch(self, tmp_path):
+        """
+        Test the mapped batch output is equal to the text batch output
+        """
+        timesheet = tmp_path / "timesheet.txt"
+        timesheet.write_text("\n".join(LINES * 3) + "\n", encoding="utf-8")
+        expected_output, expected_rejects = io.StringIO(), io.StringIO()
+        expected_counts = run_batch(
+            [str(timesheet)],
+            InputParser(),
+            PayrollCalculator("default"),
+            expected_output,
+            expected_rejects,
+        )
+        output, rejects = io.StringIO(), io.StringIO()
+        counts = run_mapped_batch(
+            [str(timesheet)], InputParser(fast=True), PayrollCalculator("default"), output, rejects
+        )
+        assert counts == expected_counts == (9, 6)
+        assert output.getvalue() == expected_output.getvalue()
+        assert rejects.getvalue() == expected_rejects.getvalue()
+
+
+class TestParseBytes:
+    """
+    Tests for InputParser.parse_bytes
+    """
+
+    @pytest.mark.parametrize("columnar", [False, True])
+    def test_matches_parse(self, columnar):
+        """
+        Test the bytes parser returns the same work histories as the text parser
+        """
+        input_parser = InputParser(columnar=columnar)
+        line = LINES[0]
+        data = memoryview(b"xx" + line.encode("utf-8") + b"\n")
+        assert input_parser.parse_bytes(data, 2, len(data) - 1) == input_parser.parse(line)
+
+    @pytest.mark.parametrize(
+        "line, error",
+        [
+            (b"RENE=MO10:00-12:00,", InvalidDayIntervalFormatError),
+            (b"RENE=MO10:00-09:00", InvalidTimeIntervalError),
+            (b"RENE=MO10:00-12:00 ", InvalidDayIntervalFormatError),
+        ],
+    )
+    def test_errors(self, line, error):
+        """
+        Test malformed lines raise the errors of the text parser
+        """
+        with pytest.raises(error):
+            InputParser(fast=True).parse_bytes(line)
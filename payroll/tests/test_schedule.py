@@ -1,11 +1,27 @@
 """
 This file contains the tests for the payment schedule handler module
 """
-from datetime import time
+import os
+import json
+from datetime import date, time
+from time import sleep
 import pytest
 
-from payroll.schedule import ScheduleHandler, PaymentSchedule, TimeSlot, Period
-from payroll.errors import PaymentScheduleNotFound
+from payroll.schedule import (
+    ScheduleHandler,
+    ScheduleRegistry,
+    ScheduleWatcher,
+    PaymentSchedule,
+    parse_schedule,
+    schedule_from_json,
+    schedule_to_json,
+    TimeSlot,
+    Period,
+)
+from payroll.data_classes import WorkDay
+from payroll.errors import InvalidScheduleError, PaymentScheduleNotFound
+
+WORK_DAY = WorkDay(day="MO", start=time(9, 0), end=time(10, 0))
 
 
 class TestScheduleHandler:
@@ -45,6 +61,12 @@ class TestScheduleHandler:
                     ],
                 ),
             ],
+            holiday_calendar="us",
+            holiday_time_slots=[
+                TimeSlot(start=time(0, 1), end=time(9, 0), rate=30),
+                TimeSlot(start=time(9, 1), end=time(18, 0), rate=20),
+                TimeSlot(start=time(18, 1), end=time(23, 59, 59), rate=25),
+            ],
         )
         actual_schedule = self.schedule_handler.get_schedule(schedule_name)
         assert actual_schedule == expected_schedule
@@ -56,3 +78,214 @@ class TestScheduleHandler:
         schedule_name = "invalid_schedule"
         with pytest.raises(PaymentScheduleNotFound):
             self.schedule_handler.get_schedule(schedule_name)
+
+
+class TestScheduleRegistry:
+    """
+    Tests for ScheduleRegistry class
+    """
+
+    @staticmethod
+    def write_config(path, rate):
+        """
+        Writes a configuration with a single time slot at the given rate
+        """
+        config = {
+            "payment_schedules": {
+                "flat": {
+                    "periods": [
+                        {
+                            "days": ["MO"],
+                            "time_slots": [{"start": "00:00", "end": "00:00", "rate": rate}],
+                        }
+                    ]
+                }
+            }
+        }
+        path.write_text(json.dumps(config), encoding="utf-8")
+
+    def test_memoized_until_changed(self, tmp_path):
+        """
+        Test schedules are memoized and reloaded when the file content changes
+        """
+        config_path = tmp_path / "config.json"
+        self.write_config(config_path, 10)
+        registry = ScheduleRegistry(str(config_path))
+        compiled = registry.get_compiled("flat")
+        assert registry.get_compiled("flat") is compiled
+        assert registry.version == 1
+
+        self.write_config(config_path, 20)
+        os.utime(config_path, ns=(0, 0))
+        assert registry.get_compiled("flat") is not compiled
+        assert registry.get_schedule("flat").periods[0].time_slots[0].rate == 20
+        assert registry.version == 2
+
+    def test_disk_cache(self, tmp_path):
+        """
+        Test a cold registry loads the parsed schedules from the disk cache
+        """
+        config_path = tmp_path / "config.json"
+        cache_dir = tmp_path / "cache"
+        self.write_config(config_path, 10)
+        schedule = ScheduleRegistry(str(config_path), str(cache_dir)).get_schedule("flat")
+        assert len(list(cache_dir.iterdir())) == 1
+
+        cold_registry = ScheduleRegistry(str(config_path), str(cache_dir))
+        cold_registry.get_config()
+        assert cold_registry.current().schedules == {"flat": schedule}
+
+        (cache_file,) = cache_dir.iterdir()
+        cache_file.write_text('{"flat": {"periods": 1}}', encoding="utf-8")
+        broken_registry = ScheduleRegistry(str(config_path), str(cache_dir))
+        broken_registry.get_config()
+        assert broken_registry.current().schedules == {}
+        assert broken_registry.get_schedule("flat") == schedule
+
+    def test_disk_cache_skips_invalid_schedule(self, tmp_path):
+        """
+        Test a schedule that cannot be parsed does not fail the lookups of the others
+        """
+        config_path = tmp_path / "config.json"
+        cache_dir = tmp_path / "cache"
+        self.write_config(config_path, 10)
+        config = json.loads(config_path.read_text(encoding="utf-8"))
+        config["payment_schedules"]["broken"] = {"periods": [{"days": ["MO"]}]}
+        config_path.write_text(json.dumps(config), encoding="utf-8")
+
+        registry = ScheduleRegistry(str(config_path), str(cache_dir))
+        assert registry.get_schedule("flat").periods[0].time_slots[0].rate == 10
+        (cache_file,) = cache_dir.iterdir()
+        assert list(json.loads(cache_file.read_text(encoding="utf-8"))) == ["flat"]
+        with pytest.raises(TypeError):
+            registry.get_schedule("broken")
+
+    def test_cache_json_round_trip(self):
+        """
+        Test the JSON form of the disk cache keeps every field of a schedule
+        """
+        night_slots = [{"start": "09:00", "end": "00:00", "rate": 1.5}]
+        day_slots = [{"start": "08:30", "end": "17:00", "rate": 2}]
+        schedule = parse_schedule(
+            "dated",
+            {
+                "periods": [{"days": ["MO", "TU"], "time_slots": night_slots}],
+                "holiday_calendar": "us",
+                "holiday_time_slots": [{"start": "00:00", "end": "00:00", "rate": 3}],
+                "revisions": [
+                    {
+                        "effective_from": "2026-10-08",
+                        "periods": [{"days": ["MO"], "time_slots": day_slots}],
+                    }
+                ],
+            },
+        )
+        schedule_json = json.loads(json.dumps(schedule_to_json(schedule)))
+        assert schedule_from_json(schedule_json) == schedule
+
+    @pytest.mark.parametrize(
+        "schedule_json",
+        [
+            {"holiday_calendar": "unknown"},
+            {"revisions": [{"periods": []}]},
+            {"holiday_time_slots": [{"start": "09:00", "end": "10:00", "rate": 1}] * 2},
+        ],
+    )
+    def test_invalid_calendar(self, tmp_path, schedule_json):
+        """
+        Test unknown holiday calendars, undated revisions and overlapping holiday
+        time slots are rejected on reload
+        """
+        config_path = tmp_path / "config.json"
+        periods = [{"days": ["MO"], "time_slots": [{"start": "00:00", "end": "00:00", "rate": 1}]}]
+        config = {
+            "holiday_calendars": {"us": ["2026-10-12"]},
+            "payment_schedules": {"flat": {"periods": periods, **schedule_json}},
+        }
+        config_path.write_text(json.dumps(config), encoding="utf-8")
+        registry = ScheduleRegistry(str(config_path))
+        assert registry.get_holidays("us") == frozenset([date(2026, 10, 12)])
+        with pytest.raises(InvalidScheduleError):
+            ScheduleRegistry(str(config_path)).reload()
+
+    def test_lookup_skips_invalid_change(self, tmp_path):
+        """
+        Test a lookup keeps the current version when the changed configuration has
+        overlapping slots or lost a schedule in use
+        """
+        config_path = tmp_path / "config.json"
+        self.write_config(config_path, 10)
+        registry = ScheduleRegistry(str(config_path))
+        schedule = registry.get_schedule("flat")
+
+        slots = [{"start": "09:00", "end": "12:00", "rate": 20}] * 2
+        periods = [{"days": ["MO"], "time_slots": slots}]
+        config_path.write_text(
+            json.dumps({"payment_schedules": {"flat": {"periods": periods}}}), encoding="utf-8"
+        )
+        os.utime(config_path, ns=(0, 0))
+        assert registry.get_schedule("flat") is schedule
+        assert registry.get_compiled("flat").price_work_day(WORK_DAY) == 10
+        assert registry.version == 1
+
+        periods[0]["time_slots"] = slots[:1]
+        config_path.write_text(
+            json.dumps({"payment_schedules": {"other": {"periods": periods}}}), encoding="utf-8"
+        )
+        os.utime(config_path, ns=(1, 1))
+        assert registry.get_schedule("flat") is schedule
+        assert registry.version == 1
+        assert ScheduleRegistry(str(config_path)).reload()
+
+
+class TestScheduleWatcher:
+    """
+    Tests for ScheduleWatcher class
+    """
+
+    def test_swaps_validated_versions(self, tmp_path):
+        """
+        Test a changed configuration is swapped in and an invalid one is skipped
+        """
+        config_path = tmp_path / "config.json"
+        TestScheduleRegistry.write_config(config_path, 10)
+        registry = ScheduleRegistry(str(config_path))
+        errors = []
+        watcher = ScheduleWatcher(registry, on_error=errors.append)
+        old_compiled = registry.current().get_compiled("flat")
+        assert old_compiled.version == 1
+        assert not watcher.check()
+
+        TestScheduleRegistry.write_config(config_path, 20)
+        os.utime(config_path, ns=(0, 0))
+        assert watcher.check()
+        new_compiled = registry.current().get_compiled("flat")
+        assert new_compiled.version == 2
+        assert old_compiled.price_work_day(WORK_DAY) == 10
+        assert new_compiled.price_work_day(WORK_DAY) == 20
+
+        config_path.write_text('{"payment_schedules": {"flat": {"periods": [{}]}}}')
+        os.utime(config_path, ns=(1, 1))
+        assert not watcher.check()
+        assert isinstance(errors[0], InvalidScheduleError)
+        assert registry.current().get_compiled("flat") is new_compiled
+
+    def test_background_thread(self, tmp_path):
+        """
+        Test the background thread reloads the configuration
+        """
+        config_path = tmp_path / "config.json"
+        TestScheduleRegistry.write_config(config_path, 10)
+        registry = ScheduleRegistry(str(config_path))
+        watcher = ScheduleWatcher(registry, interval=0.01)
+        watcher.start()
+        try:
+            TestScheduleRegistry.write_config(config_path, 20)
+            os.utime(config_path, ns=(0, 0))
+            for _ in range(500):
+                if registry.version == 2:
+                    break
+                sleep(0.01)
+        finally:
+            watcher.stop()
+        assert registry.current().get_schedule("flat").periods[0].time_slots[0].rate == 20
@@ -0,0 +1,150 @@
+"""
+This file contains the tests for the asyncio payroll service
+"""
+import asyncio
+import json
+
+from payroll import schedule
+from payroll.server import PayrollServer
+from payroll.schedule import ScheduleRegistry, get_registry
+
+
+async def request_lines(port: int, lines: list) -> list:
+    """
+    Sends the lines over one connection and returns the decoded responses
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write("".join(f"{line}\n" for line in lines).encode("utf-8"))
+    await writer.drain()
+    responses = [json.loads(await reader.readline()) for _ in lines]
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+class TestPayrollServer:
+    """
+    Tests for PayrollServer class
+    """
+
+    def test_requests(self):
+        """
+        Test requests are answered in order, including errors and stats
+        """
+
+        async def scenario():
+            server = PayrollServer(max_in_flight=4)
+            listener = await server.start(port=0)
+            port = listener.sockets[0].getsockname()[1]
+            try:
+                return await request_lines(
+                    port,
+                    [
+                        "RENE=MO10:00-12:00,TU10:00-12:00,TH01:00-03:00,SA14:00-18:00,SU20:00-21:00",
+                        "BAD=XX10:00-12:00",
+                        "@missing ASTRID=MO10:00-12:00",
+                        "@default ASTRID=MO10:00-12:00,TH12:00-14:00,SU20:00-21:00",
+                        "STATS",
+                    ],
+                )
+            finally:
+                await server.close()
+
+        responses = asyncio.run(scenario())
+        assert responses[0] == {
+            "name": "RENE",
+            "payment": 215.0,
+            "schedule": "default",
+            "schedule_version": get_registry().version,
+        }
+        assert responses[1]["error"] == "InvalidDayAbbreviationError"
+        assert responses[2]["error"] == "PaymentScheduleNotFound"
+        assert responses[3]["payment"] == 85.0
+        assert responses[4]["requests"] == 4
+        assert responses[4]["errors"] == 2
+        assert responses[4]["in_flight"] == 0
+
+    def test_concurrent_clients(self):
+        """
+        Test concurrent connections are coalesced into batches
+        """
+
+        async def scenario():
+            server = PayrollServer(max_batch=100, max_delay=0.01, max_in_flight=50)
+            listener = await server.start(port=0)
+            port = listener.sockets[0].getsockname()[1]
+            try:
+                results = await asyncio.gather(
+                    *(
+                        request_lines(port, [f"E{client}=SA08:00-20:00,SU10:00-22:00"] * 40)
+                        for client in range(10)
+                    )
+                )
+                return results, server.stats()
+            finally:
+                await server.close()
+
+        results, stats = asyncio.run(scenario())
+        assert all(response["payment"] == 520 for lines in results for response in lines)
+        assert stats["requests"] == 400
+        assert stats["batches"] < 400
+        assert stats["p99_ms"] >= stats["p50_ms"] > 0
+
+    def test_unreadable_lines(self):
+        """
+        Test undecodable and too long lines are answered with errors and skipped
+        """
+
+        async def scenario():
+            server = PayrollServer()
+            listener = await server.start(port=0)
+            port = listener.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            try:
+                writer.write(b"RENE=MO10:00-12:00\xff\n")
+                writer.write(b"LONG=" + b"MO10:00-12:00," * 20_000 + b"\n")
+                writer.write(b"ASTRID=MO10:00-12:00\n")
+                await writer.drain()
+                return [json.loads(await reader.readline()) for _ in range(3)]
+            finally:
+                writer.close()
+                await writer.wait_closed()
+                await server.close()
+
+        responses = asyncio.run(scenario())
+        assert responses[0]["error"] == "UnicodeDecodeError"
+        assert responses[1]["error"] == "ValueError"
+        assert responses[2]["name"] == "ASTRID"
+        assert responses[2]["payment"] == 30.0
+
+    def test_pricing_error_in_batch(self, tmp_path, monkeypatch):
+        """
+        Test a pricing error only fails its own request of a batch
+        """
+        time_slots = [{"start": "00:00", "end": "00:00", "rate": 10}]
+        config = {
+            "payment_schedules": {
+                "default": {
+                    "holiday_calendar": "missing",
+                    "periods": [{"days": ["MO", "TU"], "time_slots": time_slots}],
+                }
+            }
+        }
+        config_path = tmp_path / "config.json"
+        config_path.write_text(json.dumps(config), encoding="utf-8")
+        monkeypatch.setattr(schedule, "_registry", ScheduleRegistry(str(config_path)))
+
+        async def scenario():
+            server = PayrollServer(max_delay=0.05)
+            listener = await server.start(port=0)
+            port = listener.sockets[0].getsockname()[1]
+            try:
+                return await request_lines(
+                    port, ["RENE=2026-10-05T10:00-12:00", "ASTRID=MO10:00-12:00"]
+                )
+            finally:
+                await server.close()
+
+        responses = asyncio.run(scenario())
+        assert responses[0]["error"] == "InvalidScheduleError"
+        assert responses[1]["payment"] == 20.0
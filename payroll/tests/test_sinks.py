@@ -0,0 +1,153 @@
+"""
+This file contains the tests for the structured output sinks module
+"""
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+from payroll import sinks
+from payroll.data_classes import PaymentResult, RejectedLine
+from payroll.errors import InvalidTimeIntervalError
+from payroll.sinks import RESULT_COLUMNS, ResultSink, open_sink, read_binary_results
+
+ITEMS = [
+    PaymentResult("timesheet.txt", 1, "RENE", 215.0, 1, "default"),
+    RejectedLine(
+        "timesheet.txt", 2, "BAD=MO10:00-09:00", InvalidTimeIntervalError("End time, before")
+    ),
+    PaymentResult("other.txt", 1, "JOSÉ", 85.5, 1, "night"),
+]
+
+
+class TestSinks:
+    """
+    Tests for the output sinks
+    """
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_csv(self, tmp_path, compress):
+        """
+        Test the CSV rows of results and rejected lines
+        """
+        path = tmp_path / "results.csv"
+        with open_sink(str(path), "csv", "default", compress) as sink:
+            assert sink.write(iter(ITEMS)) == (2, 1)
+        opener = gzip.open if compress else open
+        with opener(path, "rt", encoding="utf-8", newline="") as file:
+            rows = list(csv.reader(file))
+        assert rows[0] == list(RESULT_COLUMNS)
+        assert rows[1] == ["timesheet.txt", "1", "RENE", "215.0", "default", "1", "", ""]
+        assert rows[2] == [
+            "timesheet.txt",
+            "2",
+            "",
+            "",
+            "default",
+            "",
+            "InvalidTimeIntervalError",
+            "End time, before",
+        ]
+        assert (rows[3][2], rows[3][4]) == ("JOSÉ", "night")
+
+    def test_jsonl(self, tmp_path):
+        """
+        Test every line is a JSON object
+        """
+        path = tmp_path / "results.jsonl"
+        with open_sink(str(path), "jsonl", "default") as sink:
+            sink.write(ITEMS)
+        rows = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert rows[0] == {
+            "source": "timesheet.txt",
+            "line_number": 1,
+            "name": "RENE",
+            "payment": 215.0,
+            "schedule": "default",
+            "schedule_version": 1,
+        }
+        assert rows[1]["error_type"] == "InvalidTimeIntervalError"
+        assert (rows[2]["name"], rows[2]["schedule"]) == ("JOSÉ", "night")
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_binary_round_trip(self, tmp_path, compress, monkeypatch):
+        """
+        Test the binary records and the errors of the rejected lines are read back,
+        in blocks smaller than a record
+        """
+        path = tmp_path / "results.bin"
+        items = ITEMS * 50
+        with open_sink(str(path), "binary", "default", compress) as sink:
+            sink.write(items)
+        monkeypatch.setattr(sinks, "DEFAULT_BUFFER_SIZE", 7)
+        records = list(read_binary_results(str(path)))
+        assert len(records) == len(items)
+        assert records[0] == ITEMS[0]
+        assert records[-1] == ITEMS[2]
+        reject = records[1]
+        assert (reject.source, reject.line_number, reject.error_type) == (
+            "timesheet.txt",
+            2,
+            "InvalidTimeIntervalError",
+        )
+        assert isinstance(reject.error, InvalidTimeIntervalError)
+        assert str(reject.error) == "End time, before"
+
+    def test_binary_truncated(self, tmp_path):
+        """
+        Test a record cut short is reported
+        """
+        path = tmp_path / "results.bin"
+        with open_sink(str(path), "binary") as sink:
+            sink.write(ITEMS)
+        data = path.read_bytes()
+        trailer_size = int.from_bytes(data[-8:], "little")
+        records_end = len(data) - 8 - trailer_size
+        path.write_bytes(data[: records_end - 2] + data[records_end:])
+        with pytest.raises(ValueError):
+            list(read_binary_results(str(path)))
+
+    def test_binary_long_names(self, tmp_path):
+        """
+        Test names longer than a record field and error types of any length are kept
+        """
+        path = tmp_path / "results.bin"
+        long_name = "MARÍA JOSÉ " * 8
+        items = [
+            PaymentResult("timesheet.txt", 1, long_name, 30.0, 2, "default"),
+            RejectedLine("timesheet.txt", 2, "X", UnicodeDecodeError("utf-8", b"", 0, 1, "")),
+            RejectedLine("timesheet.txt", 3, "Y", InvalidTimeIntervalError("End time")),
+        ]
+        with open_sink(str(path), "binary") as sink:
+            sink.write(items)
+        records = list(read_binary_results(str(path)))
+        assert records[0] == items[0]
+        assert [record.error_type for record in records[1:]] == [
+            "UnicodeDecodeError",
+            "InvalidTimeIntervalError",
+        ]
+        messages = [str(item.error) for item in items[1:]]
+        assert [str(record.error) for record in records[1:]] == messages
+        assert isinstance(records[1].error, UnicodeDecodeError)
+
+    def test_abstract_sink(self):
+        """
+        Test a sink without write_block cannot be created
+        """
+
+        class IncompleteSink(ResultSink):
+            """
+            A sink missing write_block
+            """
+
+        with pytest.raises(TypeError):
+            IncompleteSink(io.BytesIO(), "default")
+
+    def test_unknown_format(self, tmp_path):
+        """
+        Test an unknown format is rejected
+        """
+        with pytest.raises(ValueError):
+            open_sink(str(tmp_path / "results"), "xml")
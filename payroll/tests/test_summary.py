@@ -0,0 +1,141 @@
+"""
+This file contains the tests for the batch summary module
+"""
+import io
+import json
+
+import pytest
+
+from payroll.batch import price_lines
+from payroll.calculator import PayrollCalculator
+from payroll.data_classes import PaymentResult
+from payroll.parallel import price_files_parallel
+from payroll.parser import InputParser
+from payroll.summary import PayrollSummary, SummarizingCalculator
+
+LINES = [
+    "RENE=MO10:00-12:00,TU10:00-12:00,TH01:00-03:00,SA14:00-18:00,SU20:00-21:00",
+    "ASTRID=MO10:00-12:00,TH12:00-14:00,SU20:00-21:00",
+    "BAD=MO10:00-09:00",
+    "JOSE=SA08:00-20:00,SU10:00-22:00",
+    "ANA=MO10:00-12:00",
+]
+
+
+def numbered(lines):
+    """
+    Numbers lines like read_lines
+    """
+    return [("timesheet.txt", line_number, line) for line_number, line in enumerate(lines, 1)]
+
+
+def summarize(lines, summary):
+    """
+    Prices the lines into the summary, returning the results
+    """
+    calculator = SummarizingCalculator(PayrollCalculator("default"), summary)
+    return list(price_lines(numbered(lines), InputParser(fast=True), calculator))
+
+
+class TestPayrollSummary:
+    """
+    Tests for PayrollSummary class
+    """
+
+    def test_summary(self):
+        """
+        Test the summary of a run matches its results
+        """
+        summary = PayrollSummary(top_n=2, bucket_width=100, bucket_count=3)
+        items = summarize(LINES, summary)
+        expected = list(
+            price_lines(numbered(LINES), InputParser(fast=True), PayrollCalculator("default"))
+        )
+        results = [item for item in items if isinstance(item, PaymentResult)]
+        assert results == [item for item in expected if isinstance(item, PaymentResult)]
+        payments = [result.payment for result in results]
+        assert payments == [215, 85, 520, 30]
+
+        result = summary.to_dict()
+        assert result["payments"] == 4
+        assert result["payment_total"] == sum(payments)
+        assert sum(day["amount"] for day in result["by_day"].values()) == sum(payments)
+        assert sum(slot["amount"] for slot in result["by_slot"].values()) == sum(payments)
+        assert result["hours_total"] == 11 + 5 + 24 + 2
+        assert result["by_day"]["SU"] == {"hours": 14.0, "amount": 310.0}
+        assert result["by_slot"]["default SU 18:01-24:00"] == {
+            "rate": 25,
+            "hours": 6.0,
+            "amount": 150.0,
+        }
+        assert result["top"] == [
+            {"name": "JOSE", "payment": 520},
+            {"name": "RENE", "payment": 215},
+        ]
+        assert result["histogram"] == {"bucket_width": 100, "counts": [2, 0, 2]}
+        assert json.loads(json.dumps(result)) == result
+
+    def test_dated_holiday(self):
+        """
+        Test a dated holiday line is priced like without a summary and counted in
+        the day of the week of its date
+        """
+        summary = PayrollSummary()
+        lines = ["RENE=2026-12-25T10:00-12:00", "ANA=FR10:00-12:00"]
+        items = summarize(lines, summary)
+        assert [item.payment for item in items] == [40, 30]
+        result = summary.to_dict()
+        assert result["payment_total"] == 70
+        assert result["by_day"]["FR"] == {"hours": 4.0, "amount": 70.0}
+        assert result["by_slot"]["default 2026-12-25 09:01-18:00"] == {
+            "rate": 20,
+            "hours": 2.0,
+            "amount": 40.0,
+        }
+
+    def test_merge(self):
+        """
+        Test merging the summaries of two halves gives the summary of the whole
+        """
+        whole = PayrollSummary(top_n=3)
+        summarize(LINES * 3, whole)
+        first, second = PayrollSummary(top_n=3), PayrollSummary(top_n=3)
+        summarize(LINES[:2], first)
+        summarize(LINES[2:] + LINES * 2, second)
+        first.merge(second.to_dict())
+        assert first.to_dict() == whole.to_dict()
+
+        with pytest.raises(ValueError):
+            first.merge(PayrollSummary(bucket_count=2).to_dict())
+
+    def test_parallel_workers(self, tmp_path):
+        """
+        Test the partial summaries of the workers merge into the sequential summary
+        """
+        timesheet = tmp_path / "timesheet.txt"
+        timesheet.write_text("\n".join(LINES * 20) + "\n", encoding="utf-8")
+        expected = PayrollSummary()
+        summarize(LINES * 20, expected)
+        summary = PayrollSummary()
+        items = price_files_parallel([str(timesheet)], workers=2, chunk_size=200, summary=summary)
+        assert len(list(items)) == 100
+        assert summary.to_dict() == expected.to_dict()
+
+    def test_write_json(self):
+        """
+        Test the summary is written as a JSON document
+        """
+        summary = PayrollSummary()
+        summarize(LINES, summary)
+        output = io.StringIO()
+        summary.write_json(output)
+        assert json.loads(output.getvalue()) == summary.to_dict()
+
+    def test_invalid_sizes(self):
+        """
+        Test the sizes of the summary are checked
+        """
+        with pytest.raises(ValueError):
+            PayrollSummary(top_n=0)
+        with pytest.raises(ValueError):
+            PayrollSummary(bucket_width=0)
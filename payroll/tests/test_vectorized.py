@@ -0,0 +1,105 @@
+"""
+This file contains the tests for the NumPy batch calculations
+"""
+from datetime import time
+
+import pytest
+
+from payroll import vectorized
+from payroll.calculator import PayrollCalculator
+from payroll.compiled import CompiledSchedule
+from payroll.constants import END_OF_DAY
+from payroll.data_classes import PaymentSchedule, Period, TimeSlot
+from payroll.parser import InputParser
+
+np = pytest.importorskip("numpy")
+
+
+class TestVectorized:
+    """
+    Tests for the batch methods of PayrollCalculator
+    """
+
+    @classmethod
+    def setup_class(cls):
+        """
+        Initialize module instances
+        """
+        cls.input_parser = InputParser()
+        cls.work_histories = [
+            cls.input_parser.parse(line)
+            for line in [
+                "RENE=MO10:00-12:00,TU10:00-12:00,TH01:00-03:00,SA14:00-18:00,SU20:00-21:00",
+                "ASTRID=MO10:00-12:00,TH12:00-14:00,SU20:00-21:00",
+                "ASTRID=SA08:00-20:00,SU10:00-22:00",
+                "ASTRID=MO08:00-19:35,TU08:29-09:31,WE00:00-23:59,FR17:31-18:30",
+            ]
+        ]
+
+    @pytest.mark.parametrize("round_slot_hours", [True, False])
+    def test_batch_matches_scalar(self, round_slot_hours):
+        """
+        Test the batch results are equal to the scalar calculation
+        """
+        payroll_calculator = PayrollCalculator("default", round_slot_hours)
+        expected = [
+            payroll_calculator.calculate_payment(work_history)
+            for work_history in self.work_histories
+        ]
+        payments = payroll_calculator.calculate_payments_batch(self.work_histories)
+        assert payments.tolist() == expected
+
+    def test_columns(self):
+        """
+        Test pricing shifts given as parallel arrays
+        """
+        payroll_calculator = PayrollCalculator("default")
+        payments = payroll_calculator.calculate_payments_columns(
+            employee_index=[0, 0, 2],
+            day_index=[0, 5, 6],
+            start_minute=[600, 480, 1200],
+            end_minute=[720, 1200, 1260],
+        )
+        assert payments.tolist() == [30 + 260, 0, 25]
+
+    def test_batch_columnar(self):
+        """
+        Test columnar work histories are priced from their arrays
+        """
+        payroll_calculator = PayrollCalculator("default")
+        columnar_parser = InputParser(columnar=True)
+        columnar_histories = [
+            columnar_parser.parse(f"{work_history.name}=" + ",".join(
+                f"{day.day}{day.start:%H:%M}-{day.end:%H:%M}" for day in work_history.schedule
+            ))
+            for work_history in self.work_histories
+        ]
+        payments = payroll_calculator.calculate_payments_batch(columnar_histories)
+        expected = payroll_calculator.calculate_payments_batch(self.work_histories)
+        assert payments.tolist() == expected.tolist()
+
+    def test_unordered_float_rates(self):
+        """
+        Test the rounded batch adds the slot payments in the configured slot order
+        """
+        schedule = PaymentSchedule(
+            name="unordered",
+            periods=[
+                Period(
+                    days=["MO"],
+                    time_slots=[
+                        TimeSlot(start=time(12, 0), end=END_OF_DAY, rate=0.1),
+                        TimeSlot(start=time(0, 0), end=time(6, 0), rate=0.7),
+                        TimeSlot(start=time(6, 0), end=time(12, 0), rate=0.2),
+                    ],
+                )
+            ],
+        )
+        compiled = CompiledSchedule(schedule)
+        shifts = [
+            (start, end) for start in range(0, 1440, 37) for end in range(start + 1, 1440, 41)
+        ]
+        payments = vectorized.SlotTable(compiled).price(
+            [0] * len(shifts), [start for start, _ in shifts], [end for _, end in shifts]
+        )
+        assert payments.tolist() == [compiled.by_index[0].price(*shift) for shift in shifts]
@@ -0,0 +1,240 @@
+"""
+This module contains the NumPy implementation of the payment calculation. Work days
+are handled as parallel arrays of (employee index, day index, start minute, end minute)
+and priced against a padded slot table of the compiled schedule in a handful of array
+operations. NumPy is an optional dependency only needed for these batch calculations.
+"""
+from array import array
+from typing import Optional, Sequence, Tuple, Union
+
+from .compiled import CompiledSchedule
+from .constants import DAY_INDEX, DAYS_OF_WEEK
+from .data_classes import ColumnarWorkHistory, WorkHistory
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without numpy
+    np = None
+
+
+def require_numpy():
+    """
+    Returns the numpy module, raising a descriptive error when it is not installed.
+    """
+    if np is None:
+        raise ImportError("The batch calculations require numpy: pip install numpy")
+    return np
+
+
+def flatten_work_histories(work_histories: Sequence[WorkHistory]) -> Tuple:
+    """
+    Converts work histories into the parallel arrays used by the batch calculations.
+
+    Args:
+        work_histories (Sequence[WorkHistory]): The work histories to convert,
+            the arrays of a ColumnarWorkHistory are copied in one go.
+
+    Raises:
+        ValueError: If a work day has an unknown day abbreviation or a date, since
+            dated work days are priced by calculate_payment with the holidays and
+            revisions of the schedule.
+
+    Returns:
+        Tuple: The employee index, day index, start minute and end minute arrays.
+    """
+    numpy = require_numpy()
+    # The shifts of every employee are appended to the same buffers, converted to
+    # arrays once at the end.
+    days, starts, ends = array("H"), array("H"), array("H")
+    counts = []
+    for work_history in work_histories:
+        if isinstance(work_history, ColumnarWorkHistory):
+            days.extend(work_history.days)
+            starts.extend(work_history.starts)
+            ends.extend(work_history.ends)
+            counts.append(len(work_history))
+            continue
+        for work_day in work_history.schedule:
+            if work_day.date is not None:
+                raise ValueError(
+                    f"Dated work day {work_day.date} cannot be priced by its day of the week"
+                )
+            day_index = DAY_INDEX.get(work_day.day)
+            if day_index is None:
+                raise ValueError(
+                    f"Failed to get payement configuration for {work_day.day}"
+                )
+            days.append(day_index)
+            starts.append(work_day.start.hour * 60 + work_day.start.minute)
+            ends.append(work_day.end.hour * 60 + work_day.end.minute)
+        counts.append(len(work_history.schedule))
+    return (
+        numpy.repeat(numpy.arange(len(counts), dtype=numpy.intp), counts),
+        numpy.frombuffer(days, dtype=numpy.uint16).astype(numpy.intp),
+        numpy.frombuffer(starts, dtype=numpy.uint16).astype(numpy.int64),
+        numpy.frombuffer(ends, dtype=numpy.uint16).astype(numpy.int64),
+    )
+
+
+class SlotTable:
+    """
+    The compiled schedule laid out as padded (day, slot) arrays.
+
+    Days without configuration are marked as missing, and the shorter days are padded
+    with empty slots, which never overlap a shift and so add nothing to a payment.
+
+    Several compiled schedules with the same pricing mode can be stacked in one
+    table: the days of the schedule at position p are the rows p * 7 to p * 7 + 6,
+    so the shifts of many schedules are priced in the same array operations.
+
+    Args:
+        compiled_schedule (Union[CompiledSchedule, Sequence[CompiledSchedule]]): The
+            compiled schedule to lay out, or the compiled schedules to stack.
+
+    Raises:
+        ValueError: If the stacked schedules have different pricing modes.
+
+    Attributes:
+        round_slot_hours (bool): The pricing mode of the compiled schedule.
+        configured (ndarray): Whether each day of the week has time slots.
+        starts, ends, rates (ndarray): The (day, slot) slot tables.
+        boundaries, segment_rates, cumulative (List[ndarray]): The prefix sums per day.
+    """
+
+    def __init__(
+        self, compiled_schedule: Union[CompiledSchedule, Sequence[CompiledSchedule]]
+    ):
+        numpy = require_numpy()
+        compiled_schedules = (
+            [compiled_schedule]
+            if isinstance(compiled_schedule, CompiledSchedule)
+            else list(compiled_schedule)
+        )
+        if len({compiled.round_slot_hours for compiled in compiled_schedules}) > 1:
+            raise ValueError("Cannot stack schedules with different pricing modes")
+        compiled_days = [day for compiled in compiled_schedules for day in compiled.by_index]
+        width = max([len(day.starts) for day in compiled_days if day] or [0])
+        shape = (len(compiled_days), width)
+        self.round_slot_hours = compiled_schedules[0].round_slot_hours
+        self.configured = numpy.array([day is not None for day in compiled_days])
+        self.starts = numpy.zeros(shape, dtype=numpy.int64)
+        self.ends = numpy.zeros(shape, dtype=numpy.int64)
+        self.rates = numpy.zeros(shape, dtype=numpy.float64)
+        self.boundaries, self.segment_rates, self.cumulative = [], [], []
+        for index, day in enumerate(compiled_days):
+            if day is None:
+                for prefix in (self.boundaries, self.segment_rates, self.cumulative):
+                    prefix.append(None)
+                continue
+            # The columns follow the configured order of the slots, the order in
+            # which the rounded mode adds the slot payments.
+            self.starts[index, day.positions] = day.starts
+            self.ends[index, day.positions] = day.ends
+            self.rates[index, day.positions] = day.rates
+            self.boundaries.append(numpy.array(day.boundaries, dtype=numpy.int64))
+            self.segment_rates.append(numpy.array(day.segment_rates, dtype=numpy.float64))
+            self.cumulative.append(numpy.array(day.cumulative, dtype=numpy.float64))
+
+    def price(self, day_index, start_minute, end_minute):
+        """
+        Prices every shift of the arrays.
+
+        Args:
+            day_index (ndarray): The DAYS_OF_WEEK index of every shift.
+            start_minute (ndarray): The start of every shift in minutes since midnight.
+            end_minute (ndarray): The end of every shift in minutes since midnight.
+
+        Raises:
+            ValueError: If a shift falls on a day without configuration.
+
+        Returns:
+            ndarray: The payment of every shift.
+        """
+        numpy = require_numpy()
+        day_index = numpy.asarray(day_index, dtype=numpy.intp)
+        start_minute = numpy.asarray(start_minute, dtype=numpy.int64)
+        end_minute = numpy.asarray(end_minute, dtype=numpy.int64)
+        missing = ~self.configured[day_index]
+        if missing.any():
+            day = DAYS_OF_WEEK[int(day_index[missing.argmax()]) % len(DAYS_OF_WEEK)]
+            raise ValueError(f"Failed to get payement configuration for {day}")
+        if self.round_slot_hours:
+            return self._price_rounded(day_index, start_minute, end_minute)
+        return self._price_prorated(day_index, start_minute, end_minute)
+
+    def _price_rounded(self, day_index, start_minute, end_minute):
+        """
+        Rounds the overlap with every slot to whole hours, like CompiledDay does.
+        """
+        numpy = require_numpy()
+        overlap = numpy.minimum(end_minute[:, None], self.ends[day_index]) - numpy.maximum(
+            start_minute[:, None], self.starts[day_index]
+        )
+        slot_payments = numpy.rint(numpy.maximum(overlap, 0) / 60.0) * self.rates[day_index]
+        # Summing the slots column by column keeps the scalar addition order, so the
+        # results stay bit-for-bit equal to CompiledDay even with fractional rates.
+        payments = numpy.zeros(len(day_index), dtype=numpy.float64)
+        for column in range(slot_payments.shape[1]):
+            payments += slot_payments[:, column]
+        return payments
+
+    def _price_prorated(self, day_index, start_minute, end_minute):
+        """
+        Prices every shift from the prefix sums of its day.
+        """
+        numpy = require_numpy()
+        payments = numpy.zeros(len(day_index), dtype=numpy.float64)
+        for index, boundaries in enumerate(self.boundaries):
+            if boundaries is None:
+                continue
+            selected = numpy.flatnonzero(day_index == index)
+            if not len(selected):
+                continue
+            accumulated = []
+            for minute in (start_minute[selected], end_minute[selected]):
+                segment = (
+                    numpy.minimum(
+                        numpy.searchsorted(boundaries, minute, side="right"),
+                        len(boundaries) - 1,
+                    )
+                    - 1
+                )
+                accumulated.append(
+                    self.cumulative[index][segment]
+                    + self.segment_rates[index][segment] * (minute - boundaries[segment])
+                )
+            payments[selected] = (accumulated[1] - accumulated[0]) / 60.0
+        return payments
+
+
+def calculate_payments(
+    slot_table: SlotTable,
+    employee_index,
+    day_index,
+    start_minute,
+    end_minute,
+    employee_count: Optional[int] = None,
+):
+    """
+    Prices every shift and sums the payments per employee.
+
+    Args:
+        slot_table (SlotTable): The slot table of the payment schedule.
+        employee_index (ndarray): The employee of every shift.
+        day_index (ndarray): The DAYS_OF_WEEK index of every shift.
+        start_minute (ndarray): The start of every shift in minutes since midnight.
+        end_minute (ndarray): The end of every shift in minutes since midnight.
+        employee_count (Optional[int]): The number of employees, by default one more
+            than the highest employee index.
+
+    Returns:
+        ndarray: The payment of every employee.
+    """
+    numpy = require_numpy()
+    employee_index = numpy.asarray(employee_index, dtype=numpy.intp)
+    shift_payments = slot_table.price(day_index, start_minute, end_minute)
+    if employee_count is None:
+        employee_count = int(employee_index.max()) + 1 if len(employee_index) else 0
+    # bincount accumulates the weights in input order, which reproduces the
+    # sequential per employee sum of the scalar calculator.
+    return numpy.bincount(employee_index, weights=shift_payments, minlength=employee_count)